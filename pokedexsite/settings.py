@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from decouple import config
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -80,6 +82,57 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+#
+# CACHE_BACKEND selects redis, memcached, file or locmem (the default, per
+# process); CACHE_LOCATION is the server URL/address or directory, e.g.
+# redis://127.0.0.1:6379/1, 127.0.0.1:11211 or /var/tmp/pokedex_cache.
+# Redis needs the redis package and memcached the pymemcache package.
+# Every alias goes through pokemon.cache_backends.InstrumentedCache, which
+# counts hits/misses (manage.py cache_stats) and compresses large values.
+
+CACHE_BACKENDS = {
+    'redis': 'django.core.cache.backends.redis.RedisCache',
+    'memcached': 'django.core.cache.backends.memcached.PyMemcacheCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'dummy': 'django.core.cache.backends.dummy.DummyCache',
+}
+CACHE_BACKEND = config('CACHE_BACKEND', default='locmem')
+CACHE_LOCATION = config('CACHE_LOCATION', default='')
+CACHE_KEY_PREFIX = config('CACHE_KEY_PREFIX', default='pokedex')
+
+
+def cache_settings(alias, timeout, **options):
+    """CACHES entry for alias on the configured backend; aliases are kept apart by key prefix."""
+    location = CACHE_LOCATION
+    if CACHE_BACKEND == 'file':
+        location = os.path.join(location or BASE_DIR / 'cache', alias)
+    elif CACHE_BACKEND == 'locmem':
+        location = f'{location}{alias}'
+    if CACHE_BACKEND in ('file', 'locmem'):
+        options.setdefault('MAX_ENTRIES', config('CACHE_MAX_ENTRIES', default=10000, cast=int))
+    return {
+        'BACKEND': 'pokemon.cache_backends.InstrumentedCache',
+        'LOCATION': location,
+        'TIMEOUT': timeout,
+        'KEY_PREFIX': f'{CACHE_KEY_PREFIX}:{alias}',
+        'OPTIONS': {'BACKEND': CACHE_BACKENDS[CACHE_BACKEND], **options},
+    }
+
+
+CACHES = {
+    'default': cache_settings('default', config('CACHE_TIMEOUT', default=300, cast=int)),
+    # Raw PokeAPI payloads: large, rarely changing, stored compressed
+    'pokeapi': cache_settings(
+        'pokeapi',
+        config('POKEAPI_CACHE_TIMEOUT', default=60 * 60 * 24, cast=int),
+        COMPRESS_MIN_BYTES=1024,
+    ),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -121,3 +174,18 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+# PokeAPI response store: compressed on-disk HTTP cache used by sync_pokemon.
+# Set POKEAPI_RESPONSE_STORE_PATH to None to disable it.
+POKEAPI_RESPONSE_STORE_PATH = BASE_DIR / 'pokeapi_cache.sqlite3'
+POKEAPI_RESPONSE_STORE_MAX_AGE = 60 * 60 * 24  # seconds before stored responses are revalidated
+POKEAPI_RESPONSE_STORE_MAX_BYTES = 200 * 1024 * 1024
+
+# Answer list filtering/sorting and search from a process-local in-memory index
+POKEMON_STAT_INDEX = True
+
+# Answer the autocomplete API from a process-local prefix/trigram index
+POKEMON_SEARCH_INDEX = True
+
+# Finished full-dex exports, one file per data version and format
+POKEMON_EXPORT_DIR = BASE_DIR / 'exports'
@@ -0,0 +1,192 @@
+# pokemon/cache_backends.py
+import logging
+import pickle
+import threading
+import zlib
+from collections import Counter
+from typing import Dict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache, DEFAULT_TIMEOUT
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+METRIC_NAMES = ('hits', 'misses', 'sets', 'compressed', 'raw_bytes', 'stored_bytes')
+
+_MISSING = object()
+
+
+class CompressedValue:
+    """A pickled value stored zlib-compressed."""
+    __slots__ = ('data',)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __getstate__(self):
+        return self.data
+
+    def __setstate__(self, state):
+        self.data = state
+
+
+class InstrumentedCache(BaseCache):
+    """
+    Cache backend that wraps another backend with compression and metrics.
+
+    Configured like any backend; OPTIONS['BACKEND'] names the wrapped
+    backend (Redis, memcached, file or locmem), and the remaining OPTIONS
+    are passed on to it. Values whose pickle is at least
+    OPTIONS['COMPRESS_MIN_BYTES'] long are stored zlib-compressed, which
+    shrinks PokeAPI payloads several times over.
+
+    Hits, misses and writes are counted per process and added to counters
+    kept in the wrapped backend every METRICS_FLUSH_INTERVAL operations, so
+    a shared backend aggregates them across workers (see cache_stats).
+    """
+
+    METRICS_FLUSH_INTERVAL = 100
+    METRICS_KEY = 'cache_metrics'
+
+    _registry = {}  # key prefix -> (metrics, unflushed, lock) shared by this process
+    _registry_lock = threading.Lock()
+
+    def __init__(self, location, params):
+        params = dict(params)
+        options = dict(params.get('OPTIONS') or {})
+        backend = options.pop('BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+        self.compress_min_bytes = options.pop('COMPRESS_MIN_BYTES', None)
+        self.compress_level = options.pop('COMPRESS_LEVEL', 6)
+        params['OPTIONS'] = options
+        super().__init__(params)
+        self._cache = import_string(backend)(location, params)
+        # Django creates a backend instance per thread; counters are per alias
+        with self._registry_lock:
+            self._metrics, self._unflushed, self._metrics_lock = self._registry.setdefault(
+                self.key_prefix, (Counter(), Counter(), threading.Lock())
+            )
+
+    # Compression
+
+    def _encode(self, value):
+        if self.compress_min_bytes is None or isinstance(value, (int, float, bool, type(None))):
+            self._count(sets=1)
+            return value
+        raw = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        counts = {'sets': 1, 'raw_bytes': len(raw), 'stored_bytes': len(raw)}
+        if len(raw) >= self.compress_min_bytes:
+            compressed = zlib.compress(raw, self.compress_level)
+            if len(compressed) < len(raw):
+                counts.update(compressed=1, stored_bytes=len(compressed))
+                value = CompressedValue(compressed)
+        self._count(**counts)
+        return value
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, CompressedValue):
+            return pickle.loads(zlib.decompress(value.data))
+        return value
+
+    # Metrics
+
+    def _count(self, **deltas):
+        with self._metrics_lock:
+            self._metrics.update(deltas)
+            self._unflushed.update(deltas)
+            operations = self._unflushed['hits'] + self._unflushed['misses'] + self._unflushed['sets']
+            due = operations >= self.METRICS_FLUSH_INTERVAL
+        if due:
+            self.flush_metrics()
+
+    def flush_metrics(self):
+        """Add this process's unflushed counts to the shared counters."""
+        with self._metrics_lock:
+            deltas = Counter(self._unflushed)
+            self._unflushed.clear()
+        for name, delta in deltas.items():
+            if not delta:
+                continue
+            key = f"{self.METRICS_KEY}:{name}"
+            try:
+                self._cache.add(key, 0, None)
+                self._cache.incr(key, delta)
+            except Exception as e:
+                logger.debug(f"Could not flush cache metric {key}: {e}")
+
+    def local_metrics(self) -> Dict[str, int]:
+        with self._metrics_lock:
+            return {name: self._metrics[name] for name in METRIC_NAMES}
+
+    def shared_metrics(self) -> Dict[str, int]:
+        """Counts flushed by every process using the wrapped backend."""
+        keys = [f"{self.METRICS_KEY}:{name}" for name in METRIC_NAMES]
+        values = self._cache.get_many(keys)
+        return {name: int(values.get(key) or 0) for name, key in zip(METRIC_NAMES, keys)}
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics.clear()
+            self._unflushed.clear()
+        self._cache.delete_many([f"{self.METRICS_KEY}:{name}" for name in METRIC_NAMES])
+
+    # Delegated cache API
+
+    def get(self, key, default=None, version=None):
+        value = self._cache.get(key, _MISSING, version=version)
+        if value is _MISSING:
+            self._count(misses=1)
+            return default
+        self._count(hits=1)
+        return self._decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self._cache.get_many(keys, version=version)
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return {key: self._decode(value) for key, value in found.items()}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._cache.set(key, self._encode(value), timeout=timeout, version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.add(key, self._encode(value), timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.set_many(
+            {key: self._encode(value) for key, value in data.items()}, timeout=timeout, version=version
+        )
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._cache.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self._cache.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self._cache.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._cache.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._cache.incr(key, delta, version=version)
+
+    def clear(self):
+        return self._cache.clear()
+
+    def close(self, **kwargs):
+        return self._cache.close(**kwargs)
+
+
+def cache_metrics(shared: bool = True) -> Dict[str, Dict[str, int]]:
+    """Metrics of every configured InstrumentedCache, by alias."""
+    metrics = {}
+    for alias in caches:
+        backend = caches[alias]
+        if isinstance(backend, InstrumentedCache):
+            if shared:
+                backend.flush_metrics()
+            metrics[alias] = backend.shared_metrics() if shared else backend.local_metrics()
+    return metrics
@@ -0,0 +1,182 @@
+# pokemon/dump_reader.py
+import gzip
+import json
+import logging
+import os
+import re
+import tarfile
+from typing import Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Endpoints read from a dump, in the order they are streamed. Species come
+# first so that Pokemon details can be paired without being buffered.
+DUMP_RESOURCES = ('pokemon-species', 'pokemon', 'evolution-chain', 'type')
+
+# Matches e.g. "pokemon/25.json", "api/v2/pokemon/25/index.json" or a PokeAPI URL
+RESOURCE_PATH_RE = re.compile(
+    r'(?:^|/)(?P<resource>pokemon-species|pokemon|evolution-chain|type)/(?P<id>\d+)(?:/index)?(?:\.json)?/?$'
+)
+
+# Top-level keys kept from each payload; everything else (moves, flavor
+# texts, game indices...) is dropped while streaming to keep memory flat.
+KEPT_KEYS = {
+    'pokemon': ('id', 'name', 'height', 'weight', 'base_experience', 'sprites',
+                'stats', 'types', 'abilities', 'species'),
+    'pokemon-species': ('id', 'name', 'is_legendary', 'is_mythical', 'evolution_chain'),
+    'evolution-chain': ('id', 'chain'),
+    'type': ('id', 'name', 'damage_relations'),
+}
+
+
+def parse_resource_path(path: str) -> Optional[Tuple[str, int]]:
+    """Return (resource, id) for a dump path or URL, or None if it is not one we import."""
+    match = RESOURCE_PATH_RE.search(path.replace('\\', '/').split('?')[0])
+    if not match:
+        return None
+    return match.group('resource'), int(match.group('id'))
+
+
+def slim_payload(resource: str, data: Dict) -> Dict:
+    """Keep only the keys the importer uses."""
+    slim = {key: data[key] for key in KEPT_KEYS[resource] if key in data}
+    sprites = slim.get('sprites')
+    if sprites:
+        other = sprites.get('other') or {}
+        slim['sprites'] = {
+            'front_default': sprites.get('front_default'),
+            'back_default': sprites.get('back_default'),
+            'other': {'official-artwork': other.get('official-artwork') or {}},
+        }
+    return slim
+
+
+class PokemonDumpReader:
+    """
+    Stream PokeAPI payloads from a local dump.
+
+    Supported layouts:
+      * a directory mirroring the API, e.g. pokemon/25.json or
+        api/v2/pokemon/25/index.json (as in the PokeAPI api-data repo)
+      * a .tar, .tar.gz or .tgz archive with the same layout
+      * a .jsonl or .jsonl.gz file with one {"endpoint": "pokemon/25", "data": {...}}
+        object per line ("url" may be used instead of "endpoint")
+
+    Files are parsed one at a time and slimmed down to the fields we import,
+    so memory use does not grow with the size of the dump.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(self.path)
+
+    def records(self) -> Iterator[Tuple[str, int, Dict]]:
+        """Yield (resource, id, payload) for every importable record in the dump."""
+        if os.path.isdir(self.path):
+            records = self._directory_records()
+        elif self.path.endswith(('.jsonl', '.jsonl.gz', '.ndjson', '.ndjson.gz')):
+            records = self._jsonl_records()
+        elif tarfile.is_tarfile(self.path):
+            records = self._tar_records()
+        else:
+            raise ValueError(f"Unsupported dump format: {self.path}")
+
+        for resource, object_id, data in records:
+            yield resource, object_id, slim_payload(resource, data)
+
+    def pokemon_payloads(self, chains: Optional[Dict[int, Dict]] = None,
+                         types: Optional[Dict[str, Dict]] = None) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        """
+        Yield (detail, species) pairs ready for PokemonDataManager.
+
+        Details are yielded as soon as their species has been read; those
+        whose species never shows up are yielded at the end with None.
+        Evolution chains are collected into `chains` and types into `types`
+        (by name) when given.
+        """
+        species_by_id = {}
+        waiting = {}  # species id -> [details]
+
+        for resource, object_id, data in self.records():
+            if resource == 'pokemon-species':
+                species_by_id[object_id] = data
+                for detail in waiting.pop(object_id, []):
+                    yield detail, data
+            elif resource == 'pokemon':
+                species_id = self._species_id(data) or object_id
+                if species_id in species_by_id:
+                    yield data, species_by_id[species_id]
+                else:
+                    waiting.setdefault(species_id, []).append(data)
+            elif resource == 'evolution-chain' and chains is not None:
+                chains[object_id] = data
+            elif resource == 'type' and types is not None and data.get('name'):
+                types[data['name']] = data
+
+        for details in waiting.values():
+            for detail in details:
+                yield detail, None
+
+    @staticmethod
+    def _species_id(detail: Dict) -> Optional[int]:
+        species_url = (detail.get('species') or {}).get('url')
+        parsed = parse_resource_path(species_url) if species_url else None
+        return parsed[1] if parsed and parsed[0] == 'pokemon-species' else None
+
+    def _directory_records(self) -> Iterator[Tuple[str, int, Dict]]:
+        roots = [self.path] + [
+            os.path.join(self.path, *parts)
+            for parts in (('api', 'v2'), ('data', 'api', 'v2'))
+        ]
+        for resource in DUMP_RESOURCES:
+            for root in roots:
+                resource_dir = os.path.join(root, resource)
+                if os.path.isdir(resource_dir):
+                    break
+            else:
+                continue
+
+            entries = []
+            for entry in os.scandir(resource_dir):
+                name = entry.name[:-len('.json')] if entry.name.endswith('.json') else entry.name
+                if not name.isdigit():
+                    continue
+                file_path = os.path.join(entry.path, 'index.json') if entry.is_dir() else entry.path
+                if os.path.isfile(file_path):
+                    entries.append((int(name), file_path))
+
+            for object_id, file_path in sorted(entries):
+                with open(file_path, 'rb') as f:
+                    yield resource, object_id, json.load(f)
+
+    def _jsonl_records(self) -> Iterator[Tuple[str, int, Dict]]:
+        opener = gzip.open if self.path.endswith('.gz') else open
+        with opener(self.path, 'rt', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    logger.warning(f"Skipping invalid JSON on line {line_number}: {e}")
+                    continue
+                parsed = parse_resource_path(record.get('endpoint') or record.get('url') or '')
+                if parsed and isinstance(record.get('data'), dict):
+                    yield parsed[0], parsed[1], record['data']
+
+    def _tar_records(self) -> Iterator[Tuple[str, int, Dict]]:
+        # Stream mode reads members sequentially without seeking
+        with tarfile.open(self.path, mode='r|*') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                parsed = parse_resource_path(member.name)
+                if not parsed:
+                    continue
+                f = archive.extractfile(member)
+                if f is None:
+                    continue
+                with f:
+                    yield parsed[0], parsed[1], json.load(f)
@@ -0,0 +1,217 @@
+# pokemon/export.py
+import csv
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .models import Pokemon, PokemonAbilityLink
+from .services import DataVersion
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FIELDS = (
+    'pokedex_id', 'name', 'height', 'weight', 'base_experience', 'is_legendary', 'is_mythical',
+    'hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed', 'total_stats',
+    'types', 'abilities', 'hidden_abilities',
+)
+LIST_FIELDS = ('types', 'abilities', 'hidden_abilities')
+
+EXPORT_FORMATS = {
+    # format: (file extension, content type)
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+    'csv': ('csv', 'text/csv'),
+    'columnar': ('columnar.ndjson', 'application/x-ndjson'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+class ExportUnavailable(Exception):
+    pass
+
+
+def export_rows(chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    Yield one dict per Pokemon, in pokedex order.
+
+    Rows are read with .iterator(chunk_size) and types/abilities are
+    prefetched one chunk at a time, so memory use does not grow with the
+    size of the dex: three queries per chunk.
+    """
+    ability_links = PokemonAbilityLink.objects.select_related('ability').order_by('slot')
+    queryset = Pokemon.objects.order_by('pokedex_id').prefetch_related(
+        'types', Prefetch('ability_links', queryset=ability_links)
+    )
+    for pokemon in queryset.iterator(chunk_size=chunk_size):
+        row = {field: getattr(pokemon, field) for field in EXPORT_FIELDS if field not in LIST_FIELDS}
+        row['types'] = [pokemon_type.name for pokemon_type in pokemon.types.all()]
+        links = list(pokemon.ability_links.all())
+        row['abilities'] = [link.ability.name for link in links if not link.is_hidden]
+        row['hidden_abilities'] = [link.ability.name for link in links if link.is_hidden]
+        yield row
+
+
+def _batches(rows: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ndjson_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    for row in rows:
+        yield (json.dumps(row, separators=(',', ':')) + '\n').encode()
+
+
+def csv_chunks(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """CSV with list fields joined by '|'."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow(['|'.join(row[field]) if field in LIST_FIELDS else row[field] for field in EXPORT_FIELDS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def columnar_chunks(rows: Iterable[Dict], batch_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Record batches as NDJSON: each line holds one array per field for up to
+    batch_size rows, which maps directly onto Arrow record batches or
+    pandas.DataFrame(line) without re-pivoting rows.
+    """
+    for batch in _batches(rows, batch_size):
+        columns = {field: [row[field] for row in batch] for field in EXPORT_FIELDS}
+        yield (json.dumps(columns, separators=(',', ':')) + '\n').encode()
+
+
+def write_parquet(rows: Iterable[Dict], path, batch_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Write rows to a Parquet file (a path or a seekable binary file object),
+    one row group per batch; needs pyarrow.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportUnavailable('Parquet export needs pyarrow (pip install pyarrow)')
+
+    schema = pa.schema(
+        [(field, pa.list_(pa.string())) if field in LIST_FIELDS
+         else (field, pa.string()) if field == 'name'
+         else (field, pa.bool_()) if field.startswith('is_')
+         else (field, pa.int32())
+         for field in EXPORT_FIELDS]
+    )
+    with pq.ParquetWriter(path if hasattr(path, 'write') else str(path), schema) as writer:
+        for batch in _batches(rows, batch_size):
+            columns = {field: [row[field] for row in batch] for field in EXPORT_FIELDS}
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+
+
+def export_chunks(export_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream the whole dex in a text format (ndjson, csv or columnar)."""
+    rows = export_rows(chunk_size)
+    if export_format == 'ndjson':
+        return ndjson_chunks(rows)
+    if export_format == 'csv':
+        return csv_chunks(rows)
+    if export_format == 'columnar':
+        return columnar_chunks(rows, chunk_size)
+    raise ExportUnavailable(f"Cannot stream format {export_format!r}")
+
+
+class ExportCache:
+    """
+    Finished exports kept on disk, one file per data version and format.
+
+    A repeated export of unchanged data is served straight from the file;
+    a sync bumps the data version, so the next export is written afresh.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or getattr(settings, 'POKEMON_EXPORT_DIR', None) or
+                             os.path.join(tempfile.gettempdir(), 'pokedex_exports'))
+
+    def path(self, export_format: str, version: Optional[str] = None) -> str:
+        version = re.sub(r'[^\w-]', '_', version or DataVersion.get())
+        extension = EXPORT_FORMATS[export_format][0]
+        return os.path.join(self.directory, f"pokemon-{version}.{extension}")
+
+    def get(self, export_format: str, version: Optional[str] = None) -> Optional[str]:
+        path = self.path(export_format, version)
+        return path if os.path.exists(path) else None
+
+    def stream_and_store(self, export_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         version: Optional[str] = None) -> Iterator[bytes]:
+        """
+        Stream an export while writing it to the cache; the file only
+        appears once the stream has completed.
+        """
+        path = self.path(export_format, version)
+        os.makedirs(self.directory, exist_ok=True)
+        chunks = export_chunks(export_format, chunk_size)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        completed = False
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(temp_path, path)
+            completed = True
+            self._remove_stale(export_format, keep=path)
+        finally:
+            if not completed and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def build(self, export_format: str, chunk_size: int = DEFAULT_CHUNK_SIZE, version: Optional[str] = None) -> str:
+        """Write the export for the current version to the cache (if missing) and return its path."""
+        path = self.get(export_format, version)
+        if path:
+            return path
+        path = self.path(export_format, version)
+        if export_format == 'parquet':
+            os.makedirs(self.directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            os.close(fd)
+            try:
+                write_parquet(export_rows(chunk_size), temp_path, chunk_size)
+                os.replace(temp_path, path)
+            finally:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            self._remove_stale(export_format, keep=path)
+        else:
+            for _ in self.stream_and_store(export_format, chunk_size, version):
+                pass
+        return path
+
+    def _remove_stale(self, export_format: str, keep: str):
+        """Drop exports of other data versions in the same format."""
+        suffix = f".{EXPORT_FORMATS[export_format][0]}"
+        for name in os.listdir(self.directory):
+            if not (name.startswith('pokemon-') and name.endswith(suffix)):
+                continue
+            version = name[len('pokemon-'):-len(suffix)]
+            if '.' in version or name == os.path.basename(keep):
+                continue  # another format, or the current export
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError as e:
+                logger.warning(f"Could not remove stale export {name}: {e}")
@@ -0,0 +1,94 @@
+# pokemon/http_cache.py
+import hashlib
+import logging
+from functools import wraps
+
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from .services import DataVersion
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_PREFIX = 'json_response'
+
+
+def _request_data_version(request) -> str:
+    # Read once per request so the ETag, Last-Modified and cache key agree
+    if not hasattr(request, '_pokemon_data_version'):
+        request._pokemon_data_version = DataVersion.get()
+    return request._pokemon_data_version
+
+
+def data_version_etag(request, *args, **kwargs) -> str:
+    """Strong ETag for a GET of this URL against the current data version."""
+    key = f"{_request_data_version(request)}:{request.get_full_path()}"
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+
+def data_version_last_modified(request, *args, **kwargs):
+    return DataVersion.last_modified(_request_data_version(request))
+
+
+def cache_by_data_version(max_age: int = 60, timeout: int = 60 * 60 * 24):
+    """
+    Cache a read-only JSON view until the Pokemon data changes.
+
+    Responses get a strong ETag and Last-Modified derived from DataVersion,
+    so conditional requests are answered with 304 without running the view.
+    The serialized body of successful responses is also kept in the cache
+    under the same ETag; a hit returns the stored bytes without touching the
+    ORM. A sync bumps the version, which changes every ETag and key at once.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def cached_view(request, *args, **kwargs):
+            # Namespaced by data version, so a bumped version never reads old bodies
+            cache_key = f"{RESPONSE_CACHE_PREFIX}:{_request_data_version(request)}:{data_version_etag(request)}"
+            cached = cache.get(cache_key)
+            if cached is not None:
+                content_type, content = cached
+                return HttpResponse(content, content_type=content_type)
+
+            response = view_func(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(cache_key, (response['Content-Type'], response.content), timeout)
+            return response
+
+        conditional_view = condition(
+            etag_func=data_version_etag,
+            last_modified_func=data_version_last_modified,
+        )(cached_view)
+
+        @wraps(view_func)
+        def view(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD') and response.status_code in (200, 304):
+                patch_cache_control(response, public=True, max_age=max_age)
+            return response
+
+        return view
+    return decorator
+
+
+def prefetch_uncached_fragments(pokemon_list, fragment_name: str, *lookups, vary_on=None):
+    """
+    Prefetch lookups only for the Pokemon whose {% cache fragment_name
+    pokemon.pk pokemon.render_version %} fragment is not cached, so cached
+    renders skip the related-object queries entirely. vary_on(pokemon)
+    returns the tag's vary-on values when it has others.
+    """
+    vary_on = vary_on or (lambda pokemon: [pokemon.pk, pokemon.render_version])
+    keys = {
+        make_template_fragment_key(fragment_name, vary_on(pokemon)): pokemon
+        for pokemon in pokemon_list
+    }
+    cached = cache.get_many(list(keys))
+    misses = [pokemon for key, pokemon in keys.items() if key not in cached]
+    if misses:
+        prefetch_related_objects(misses, *lookups)
+    return misses
@@ -0,0 +1,165 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from pokemon.models import Pokemon
+from pokemon.search_index import SearchIndex
+import json
+import random
+import string
+import time
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def make_typo(name, rng, edits):
+    """Apply `edits` random substitutions, deletions, insertions or transpositions to name."""
+    for _ in range(edits):
+        if len(name) < 3:
+            break
+        i = rng.randrange(1, len(name) - 1)
+        operation = rng.choice(('substitute', 'delete', 'insert', 'transpose'))
+        if operation == 'substitute':
+            name = name[:i] + rng.choice(string.ascii_lowercase) + name[i + 1:]
+        elif operation == 'delete':
+            name = name[:i] + name[i + 1:]
+        elif operation == 'insert':
+            name = name[:i] + rng.choice(string.ascii_lowercase) + name[i:]
+        else:
+            name = name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+    return name
+
+
+class Command(BaseCommand):
+    help = 'Benchmark autocomplete/fuzzy search latency over every Pokemon in the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queries',
+            type=int,
+            default=5000,
+            help='Number of generated queries to time (default: 5000)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for query generation (default: 0)'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=10,
+            help='Results per query, as served by the autocomplete API (default: 10)'
+        )
+        parser.add_argument(
+            '--compare-orm',
+            type=int,
+            default=0,
+            metavar='N',
+            help='Also time the icontains ORM query for the first N queries'
+        )
+        parser.add_argument(
+            '--max-p95-ms',
+            type=float,
+            default=None,
+            help='Fail if the p95 search latency exceeds this many milliseconds'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['queries'] < 1:
+            raise CommandError('--queries must be at least 1')
+
+        started_at = time.perf_counter()
+        index = SearchIndex.build(version='benchmark')
+        build_ms = (time.perf_counter() - started_at) * 1000
+        if not index.names:
+            raise CommandError('No Pokemon in the database; run sync_pokemon or import_pokemon_dump first')
+
+        rng = random.Random(options['seed'])
+        queries = []
+        for _ in range(options['queries']):
+            position = rng.randrange(len(index.names))
+            name = index.names[position]
+            kind = rng.choice(('prefix', 'exact', 'typo', 'typo'))
+            if kind == 'prefix':
+                query = name[:rng.randint(2, max(2, len(name)))]
+            elif kind == 'exact':
+                query = name
+            else:
+                query = make_typo(name, rng, rng.choice((1, 1, 2)))
+            queries.append((kind, query, index.pokedex_ids[position]))
+
+        timings = {'all': [], 'prefix': [], 'exact': [], 'typo': []}
+        typo_found = 0
+        for kind, query, pokedex_id in queries:
+            query_started_at = time.perf_counter_ns()
+            hits = index.search(query, limit=options['limit'])
+            elapsed_ms = (time.perf_counter_ns() - query_started_at) / 1e6
+            timings['all'].append(elapsed_ms)
+            timings[kind].append(elapsed_ms)
+            if kind == 'typo' and any(hit.pokedex_id == pokedex_id for hit in hits):
+                typo_found += 1
+
+        results = {
+            'pokemon': len(index.names),
+            'queries': len(queries),
+            'build_ms': round(build_ms, 2),
+            'deletion_index_keys': len(index._deletes),
+            'typo_recall': round(typo_found / len(timings['typo']), 4) if timings['typo'] else None,
+            'latency_ms': {},
+        }
+        for kind, values in timings.items():
+            if not values:
+                continue
+            values.sort()
+            results['latency_ms'][kind] = {
+                'p50': round(percentile(values, 0.50), 4),
+                'p95': round(percentile(values, 0.95), 4),
+                'p99': round(percentile(values, 0.99), 4),
+                'max': round(values[-1], 4),
+            }
+
+        if options['compare_orm']:
+            orm_timings = []
+            for _, query, _ in queries[:options['compare_orm']]:
+                query_started_at = time.perf_counter_ns()
+                list(Pokemon.objects.filter(Q(name__icontains=query) | Q(pokedex_id__icontains=query))
+                     .values_list('pokedex_id', flat=True)[:options['limit']])
+                orm_timings.append((time.perf_counter_ns() - query_started_at) / 1e6)
+            orm_timings.sort()
+            results['orm_icontains_ms'] = {
+                'p50': round(percentile(orm_timings, 0.50), 4),
+                'p95': round(percentile(orm_timings, 0.95), 4),
+            }
+
+        p95 = results['latency_ms']['all']['p95']
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.stdout.write(
+                f'Indexed {results["pokemon"]} Pokemon in {build_ms:.1f}ms '
+                f'({results["deletion_index_keys"]} deletion keys)'
+            )
+            for kind, latency in results['latency_ms'].items():
+                self.stdout.write(
+                    f'  {kind:<7} p50 {latency["p50"]:.3f}ms  p95 {latency["p95"]:.3f}ms  '
+                    f'p99 {latency["p99"]:.3f}ms  max {latency["max"]:.3f}ms'
+                )
+            if results['typo_recall'] is not None:
+                self.stdout.write(f'  typo recall (target in top {options["limit"]}): {results["typo_recall"]:.1%}')
+            if 'orm_icontains_ms' in results:
+                orm = results['orm_icontains_ms']
+                self.stdout.write(f'  ORM icontains p50 {orm["p50"]:.3f}ms  p95 {orm["p95"]:.3f}ms')
+
+        if options['max_p95_ms'] is not None and p95 > options['max_p95_ms']:
+            raise CommandError(f'p95 latency {p95:.3f}ms exceeds --max-p95-ms {options["max_p95_ms"]}')
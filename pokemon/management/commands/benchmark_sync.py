@@ -0,0 +1,226 @@
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from pokemon.models import SyncRun
+from pokemon.pokeapi_stub import PokeAPIStubServer, StubFixtures
+from pokemon.services import DataVersion, PokeAPIService
+import io
+import json
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Isolated caches, so stub payloads never reach the configured (possibly shared) PokeAPI cache
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-sync'},
+    'pokeapi': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-sync-pokeapi'},
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark sync_pokemon end to end against a local PokeAPI stub server and a scratch database'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=300,
+            help='Number of synthetic Pokemon to serve (default: 300)'
+        )
+        parser.add_argument(
+            '--fixtures',
+            default=None,
+            help='Serve recorded payloads from a PokeAPI dump (directory, .tar.gz or .jsonl) instead'
+        )
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=20.0,
+            help='Stub response latency in milliseconds (default: 20)'
+        )
+        parser.add_argument(
+            '--throttle-rate',
+            type=float,
+            default=0.0,
+            help='Fraction of requests answered with 429 Too Many Requests (default: 0)'
+        )
+        parser.add_argument(
+            '--retry-after',
+            type=float,
+            default=0.05,
+            help='Retry-After seconds sent with injected 429s (default: 0.05)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='sync_pokemon --concurrency (default: 8)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='sync_pokemon --batch-size (default: 50)'
+        )
+        parser.add_argument(
+            '--pipeline-depth',
+            type=int,
+            default=2,
+            help='sync_pokemon --pipeline-depth (default: 2)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for synthetic fixtures and 429 injection (default: 0)'
+        )
+        parser.add_argument(
+            '--min-rate',
+            type=float,
+            default=None,
+            help='Fail if fewer Pokemon per second than this are synced'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Append the results as one JSON line to this file, to track them over time'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count must be at least 1')
+        if not 0 <= options['throttle_rate'] < 1:
+            raise CommandError('--throttle-rate must be between 0 and 1')
+
+        if options['fixtures']:
+            try:
+                fixtures = StubFixtures.from_dump(options['fixtures'])
+            except (FileNotFoundError, ValueError) as e:
+                raise CommandError(f'Could not load fixtures: {e}')
+        else:
+            fixtures = StubFixtures.synthetic(options['count'], seed=options['seed'])
+        if not fixtures.pokemon_ids:
+            raise CommandError('The fixtures contain no Pokemon')
+
+        # A scratch copy of the schema, so the configured database is never written
+        test_database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES):
+                results = self.run_benchmark(fixtures, options)
+        finally:
+            connection.creation.destroy_test_db(test_database_name, verbosity=0)
+            # The sync bumped the version stamp for the scratch data
+            cache.delete(DataVersion.CACHE_KEY)
+
+        if options['output']:
+            with open(options['output'], 'a') as f:
+                f.write(json.dumps(results, separators=(',', ':')) + '\n')
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.write_report(results)
+
+        if options['min_rate'] is not None and results['pokemon_per_second'] < options['min_rate']:
+            raise CommandError(
+                f'{results["pokemon_per_second"]} Pokemon/s is below --min-rate {options["min_rate"]}'
+            )
+
+    def run_benchmark(self, fixtures, options):
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        stub = PokeAPIStubServer(
+            fixtures,
+            latency=options['latency'] / 1000,
+            throttle_rate=options['throttle_rate'],
+            retry_after=options['retry_after'],
+            seed=options['seed'],
+        )
+        sync_output = io.StringIO()
+        with stub, connection.execute_wrapper(count_query):
+            started_at = time.monotonic()
+            try:
+                call_command(
+                    'sync_pokemon',
+                    limit=len(fixtures.pokemon_ids),
+                    batch_size=options['batch_size'],
+                    concurrency=options['concurrency'],
+                    pipeline_depth=options['pipeline_depth'],
+                    rate_limit=0,
+                    base_url=stub.base_url,
+                    no_response_store=True,
+                    stdout=sync_output,
+                )
+            except CommandError as e:
+                raise CommandError(f'sync_pokemon failed: {e}\n{sync_output.getvalue()}')
+            elapsed = time.monotonic() - started_at
+
+        run = SyncRun.objects.order_by('-pk').first()
+        synced = run.stats.get('created', 0) + run.stats.get('updated', 0)
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'fixtures': fixtures.source,
+            'pokemon': len(fixtures.pokemon_ids),
+            'options': {
+                name: options[name]
+                for name in ('latency', 'throttle_rate', 'retry_after', 'concurrency', 'batch_size',
+                             'pipeline_depth', 'seed')
+            },
+            'elapsed_seconds': round(elapsed, 3),
+            'pokemon_per_second': round(synced / elapsed, 1) if elapsed else 0.0,
+            'http': {
+                'requests': stub.counts['requests'],
+                'throttled': stub.counts['throttled'],
+                'not_found': stub.counts['not_found'],
+                'by_endpoint': PokeAPIService.get_endpoint_stats(),
+            },
+            'db_queries': len(queries),
+            'db_queries_per_pokemon': round(len(queries) / synced, 2) if synced else None,
+            'peak_rss_mb': peak_rss_mb(),
+            'sync': run.stats,
+            'timings': run.timings,
+        }
+
+    def write_report(self, results):
+        http = results['http']
+        self.stdout.write(
+            f'Synced {results["sync"].get("created", 0) + results["sync"].get("updated", 0)} of '
+            f'{results["pokemon"]} Pokemon from {results["fixtures"]} fixtures in {results["elapsed_seconds"]:.2f}s'
+        )
+        self.stdout.write(self.style.SUCCESS(f'  {results["pokemon_per_second"]} Pokemon/s'))
+        self.stdout.write(
+            f'  HTTP: {http["requests"]} requests, {http["throttled"]} throttled (429), '
+            f'{http["not_found"]} not found'
+        )
+        self.stdout.write(
+            f'  DB: {results["db_queries"]} queries ({results["db_queries_per_pokemon"]} per Pokemon)'
+        )
+        if results['peak_rss_mb'] is not None:
+            self.stdout.write(f'  peak RSS: {results["peak_rss_mb"]} MB')
+        self.stdout.write('  timings: ' + ', '.join(
+            f'{stage} {seconds:.2f}s' for stage, seconds in results['timings'].items()
+        ))
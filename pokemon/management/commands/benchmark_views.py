@@ -0,0 +1,348 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from pokemon.management.commands.benchmark_search import make_typo, percentile
+from pokemon.models import Pokemon, PokemonType, UserFavorite, GENERATION_RANGES
+from pokemon.pokeapi_stub import StubFixtures
+from pokemon.services import DataVersion, PokemonDataManager
+from pokemon.views import PokemonListView
+from urllib.parse import urlencode
+import json
+import random
+import time
+import uuid
+
+# Isolated caches, so benchmark responses never reach the configured (possibly shared) caches
+BENCHMARK_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-views'},
+    'pokeapi': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmark-views-pokeapi'},
+}
+BASELINE_SLACK_MS = 1.0  # p95 increases below this are noise, whatever --tolerance says
+LIST_FILTERS = ('none', 'search', 'type', 'generation', 'total_stats')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark latency and query counts of the list, detail, search, favorites, random and stats views '
+        'through the test client, against a seeded scratch database'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--count',
+            type=int,
+            default=1025,
+            help='Number of synthetic Pokemon to seed (default: 1025)'
+        )
+        parser.add_argument(
+            '--favorites',
+            type=int,
+            default=60,
+            help='Favorites of the benchmark session; other sessions get as many again in total (default: 60)'
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=30,
+            help='Timed requests per scenario (default: 30)'
+        )
+        parser.add_argument(
+            '--warmup',
+            type=int,
+            default=3,
+            help='Untimed requests per scenario before timing (default: 3)'
+        )
+        parser.add_argument(
+            '--cold',
+            action='store_true',
+            help='Clear the response and fragment caches before every request (indexes stay built)'
+        )
+        parser.add_argument(
+            '--only',
+            default=None,
+            help='Only run scenarios whose name contains this text'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed for the dataset and the requested URLs (default: 0)'
+        )
+        parser.add_argument(
+            '--max-p95-ms',
+            type=float,
+            default=None,
+            help='Fail if any scenario\'s p95 latency exceeds this many milliseconds'
+        )
+        parser.add_argument(
+            '--max-queries',
+            type=int,
+            default=None,
+            help='Fail if any request runs more database queries than this'
+        )
+        parser.add_argument(
+            '--baseline',
+            default=None,
+            help='Fail on regressions against the last results in this file (as written by --output)'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.25,
+            help=f'Allowed p95 increase over --baseline as a fraction, beyond {BASELINE_SLACK_MS}ms (default: 0.25)'
+        )
+        parser.add_argument(
+            '--output',
+            default=None,
+            help='Append the results as one JSON line to this file, to track them over time'
+        )
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the results as JSON'
+        )
+
+    def handle(self, *args, **options):
+        if options['count'] < 1:
+            raise CommandError('--count must be at least 1')
+        if options['requests'] < 1:
+            raise CommandError('--requests must be at least 1')
+
+        baseline = self.load_baseline(options['baseline']) if options['baseline'] else None
+
+        # A scratch copy of the schema, so the configured database is never written
+        test_database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            with override_settings(CACHES=BENCHMARK_CACHES, ALLOWED_HOSTS=['testserver'], DEBUG=False):
+                results = self.run_benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(test_database_name, verbosity=0)
+
+        if options['output']:
+            with open(options['output'], 'a') as f:
+                f.write(json.dumps(results, separators=(',', ':')) + '\n')
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.write_report(results)
+
+        failures = self.check_thresholds(results, options, baseline)
+        if failures:
+            raise CommandError('Benchmark thresholds failed:\n  ' + '\n  '.join(failures))
+
+    def load_baseline(self, path):
+        try:
+            with open(path) as f:
+                lines = [line for line in f if line.strip()]
+            return json.loads(lines[-1])
+        except (OSError, IndexError, ValueError) as e:
+            raise CommandError(f'Could not read baseline {path}: {e}')
+
+    # Dataset
+
+    def seed(self, options):
+        """Write the synthetic dex with types, damage relations, evolution chains and favorites."""
+        fixtures = StubFixtures.synthetic(options['count'], seed=options['seed'])
+        payloads = fixtures.payloads
+        PokemonDataManager.sync_pokemon_types()
+
+        pokemon = [
+            (payloads[f"pokemon/{pokemon_id}"], payloads[f"pokemon-species/{pokemon_id}"])
+            for pokemon_id in fixtures.pokemon_ids
+        ]
+        for start in range(0, len(pokemon), 500):
+            PokemonDataManager.bulk_upsert_pokemon(pokemon[start:start + 500])
+
+        chains = {
+            int(endpoint.split('/')[1]): data for endpoint, data in payloads.items()
+            if endpoint.startswith('evolution-chain/')
+        }
+        PokemonDataManager.bulk_write_evolution_chains(chains)
+        PokemonDataManager.write_type_relations({
+            endpoint.split('/')[1]: data for endpoint, data in payloads.items() if endpoint.startswith('type/')
+        })
+
+        # The benchmark session's favorites, among other sessions' so the session filter has work to do
+        rng = random.Random(options['seed'])
+        client = Client()
+        session_key = client.session.session_key
+        pokemon_pks = list(Pokemon.objects.values_list('pk', flat=True))
+        favorites = [
+            UserFavorite(session_key=session_key, pokemon_id=pk)
+            for pk in rng.sample(pokemon_pks, min(options['favorites'], len(pokemon_pks)))
+        ]
+        for _ in range(10):
+            other_session = uuid.uuid4().hex
+            favorites.extend(
+                UserFavorite(session_key=other_session, pokemon_id=pk)
+                for pk in rng.sample(pokemon_pks, min(options['favorites'] // 10 + 1, len(pokemon_pks)))
+            )
+        UserFavorite.objects.bulk_create(favorites)
+
+        DataVersion.bump()
+        return client
+
+    # Scenarios
+
+    def build_scenarios(self):
+        """
+        (name, url factory, expected status) for each view and list filter/sort
+        combination. Factories take the RNG and pick a fresh target per request,
+        so cached and uncached responses mix as they would in traffic.
+        """
+        pokedex_ids = list(Pokemon.objects.values_list('pokedex_id', flat=True))
+        names = [name.lower() for name in Pokemon.objects.values_list('name', flat=True)]
+        type_names = list(PokemonType.objects.filter(pokemon__isnull=False).distinct().values_list('name', flat=True))
+        generations = [generation for generation, (first, _) in GENERATION_RANGES.items() if first <= max(pokedex_ids)]
+
+        def url(name, query=None, **kwargs):
+            path = reverse(f'pokemon:{name}', kwargs=kwargs or None)
+            return f'{path}?{urlencode(query)}' if query else path
+
+        filters = {
+            'none': lambda rng: {},
+            'search': lambda rng: {'search': rng.choice(names)[:rng.randint(3, 9)]},
+            'type': lambda rng: {'type': rng.choice(type_names)},
+            'generation': lambda rng: {'generation': rng.choice(generations)},
+            'total_stats': lambda rng: {'min_total': rng.randrange(200, 400, 25), 'max_total': rng.randrange(400, 700, 25)},
+        }
+
+        scenarios = []
+        for filter_name in LIST_FILTERS:
+            for sort in PokemonListView.sort_fields:
+                scenarios.append((
+                    f'list {filter_name} sort={sort}',
+                    lambda rng, make_filter=filters[filter_name], sort=sort: url('list', {**make_filter(rng), 'sort': sort}),
+                    200,
+                ))
+        last_page = max(1, (len(pokedex_ids) + PokemonListView.paginate_by - 1) // PokemonListView.paginate_by)
+        scenarios += [
+            ('list reverse', lambda rng: url('list', {'sort': rng.choice(PokemonListView.sort_fields), 'reverse': 'true'}), 200),
+            ('list multi-sort', lambda rng: url('list', {'sort': '-total_stats,name', 'type': rng.choice(type_names)}), 200),
+            ('list page', lambda rng: url('list', {'page': rng.randint(1, last_page)}), 200),
+            ('list cursor', lambda rng: url('list', {'paginate': 'cursor', 'sort': '-total_stats'}), 200),
+            ('detail by id', lambda rng: url('detail', pk=rng.choice(pokedex_ids)), 200),
+            ('detail by name', lambda rng: url('detail', pk=rng.choice(names)), 200),
+            ('search prefix', lambda rng: url('search_api', {'q': rng.choice(names)[:rng.randint(2, 9)]}), 200),
+            ('search exact', lambda rng: url('search_api', {'q': rng.choice(names)}), 200),
+            ('search typo', lambda rng: url('search_api', {'q': make_typo(rng.choice(names), rng, 1)}), 200),
+            ('favorites', lambda rng: url('favorites'), 200),
+            ('favorites sorted', lambda rng: url('favorites', {'sort': rng.choice(('total_stats', 'date_added', 'name'))}), 200),
+            ('random', lambda rng: url('random'), 302),
+            ('random filtered', lambda rng: url('random', {'type': rng.choice(type_names)}), 302),
+            ('stats json', lambda rng: url('stats_api', pokedex_id=rng.choice(pokedex_ids)), 200),
+        ]
+        return scenarios
+
+    # Measurement
+
+    def run_benchmark(self, options):
+        started_at = time.monotonic()
+        client = self.seed(options)
+        seed_seconds = time.monotonic() - started_at
+
+        scenarios = self.build_scenarios()
+        if options['only']:
+            scenarios = [scenario for scenario in scenarios if options['only'] in scenario[0]]
+            if not scenarios:
+                raise CommandError(f'No scenario name contains {options["only"]!r}')
+
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        rng = random.Random(options['seed'])
+        views = {}
+        with connection.execute_wrapper(count_query):
+            for name, make_url, expected_status in scenarios:
+                timings, query_counts, unexpected = [], [], {}
+                for iteration in range(options['warmup'] + options['requests']):
+                    request_url = make_url(rng)
+                    if options['cold']:
+                        self.clear_caches()
+                    queries.clear()
+                    request_started_at = time.perf_counter_ns()
+                    response = client.get(request_url)
+                    elapsed_ms = (time.perf_counter_ns() - request_started_at) / 1e6
+                    if response.status_code != expected_status:
+                        unexpected[request_url] = response.status_code
+                    if iteration >= options['warmup']:
+                        timings.append(elapsed_ms)
+                        query_counts.append(len(queries))
+
+                timings.sort()
+                query_counts.sort()
+                views[name] = {
+                    'p50_ms': round(percentile(timings, 0.50), 3),
+                    'p95_ms': round(percentile(timings, 0.95), 3),
+                    'max_ms': round(timings[-1], 3),
+                    'queries_p50': percentile(query_counts, 0.50),
+                    'queries_max': query_counts[-1],
+                    'unexpected_status': dict(list(unexpected.items())[:5]),
+                }
+
+        return {
+            'timestamp': timezone.now().isoformat(),
+            'pokemon': options['count'],
+            'favorites': options['favorites'],
+            'options': {name: options[name] for name in ('requests', 'warmup', 'cold', 'seed')},
+            'stat_index': getattr(settings, 'POKEMON_STAT_INDEX', True),
+            'search_index': getattr(settings, 'POKEMON_SEARCH_INDEX', True),
+            'seed_seconds': round(seed_seconds, 2),
+            'views': views,
+        }
+
+    def clear_caches(self):
+        """Empty every cache but keep the data version stamp, so in-process indexes are not rebuilt."""
+        version = DataVersion.get()
+        for alias in BENCHMARK_CACHES:
+            caches[alias].clear()
+        cache.set(DataVersion.CACHE_KEY, version, None)
+
+    # Reporting
+
+    def check_thresholds(self, results, options, baseline):
+        failures = []
+        for name, view in results['views'].items():
+            if view['unexpected_status']:
+                failures.append(f'{name}: unexpected status codes {view["unexpected_status"]}')
+            if options['max_p95_ms'] is not None and view['p95_ms'] > options['max_p95_ms']:
+                failures.append(f'{name}: p95 {view["p95_ms"]:.2f}ms exceeds --max-p95-ms {options["max_p95_ms"]}')
+            if options['max_queries'] is not None and view['queries_max'] > options['max_queries']:
+                failures.append(f'{name}: {view["queries_max"]} queries exceeds --max-queries {options["max_queries"]}')
+
+            previous = (baseline or {}).get('views', {}).get(name)
+            if previous is None:
+                continue
+            allowed_ms = previous['p95_ms'] * (1 + options['tolerance']) + BASELINE_SLACK_MS
+            if view['p95_ms'] > allowed_ms:
+                failures.append(
+                    f'{name}: p95 {view["p95_ms"]:.2f}ms regressed from {previous["p95_ms"]:.2f}ms '
+                    f'(allowed {allowed_ms:.2f}ms)'
+                )
+            if view['queries_max'] > previous['queries_max']:
+                failures.append(f'{name}: queries rose from {previous["queries_max"]} to {view["queries_max"]}')
+        return failures
+
+    def write_report(self, results):
+        self.stdout.write(
+            f'Seeded {results["pokemon"]} Pokemon and {results["favorites"]} favorites in {results["seed_seconds"]:.1f}s; '
+            f'{results["options"]["requests"]} requests per scenario'
+            f'{" with cold caches" if results["options"]["cold"] else ""}'
+        )
+        width = max(len(name) for name in results['views'])
+        self.stdout.write(f'  {"scenario":<{width}}  {"p50":>8}  {"p95":>8}  {"max":>8}  queries')
+        for name, view in results['views'].items():
+            line = (
+                f'  {name:<{width}}  {view["p50_ms"]:>6.2f}ms  {view["p95_ms"]:>6.2f}ms  {view["max_ms"]:>6.2f}ms  '
+                f'{view["queries_p50"]}-{view["queries_max"]}'
+            )
+            self.stdout.write(self.style.ERROR(line) if view['unexpected_status'] else line)
@@ -0,0 +1,46 @@
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from pokemon.cache_backends import cache_metrics
+import json
+
+
+class Command(BaseCommand):
+    help = 'Show cache hit/miss and compression metrics for every configured cache'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--json',
+            action='store_true',
+            help='Print the metrics as JSON'
+        )
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after printing them'
+        )
+
+    def handle(self, *args, **options):
+        metrics = cache_metrics()
+
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2))
+        elif not metrics:
+            self.stdout.write(self.style.WARNING('No instrumented caches are configured'))
+        else:
+            for alias, counts in metrics.items():
+                self.stdout.write(self.format_metrics(alias, counts))
+
+        if options['reset']:
+            for alias in metrics:
+                caches[alias].reset_metrics()
+            self.stdout.write(self.style.SUCCESS('Cache metrics reset'))
+
+    def format_metrics(self, alias, counts):
+        lookups = counts['hits'] + counts['misses']
+        hit_rate = counts['hits'] / lookups if lookups else 0
+        ratio = counts['stored_bytes'] / counts['raw_bytes'] if counts['raw_bytes'] else 1
+        return (
+            f'{alias}: {counts["hits"]} hits, {counts["misses"]} misses ({hit_rate:.1%} hit rate), '
+            f'{counts["sets"]} sets, {counts["compressed"]} compressed '
+            f'({counts["raw_bytes"]} -> {counts["stored_bytes"]} bytes, {ratio:.0%})'
+        )
@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand, CommandError
+from pokemon.export import (
+    EXPORT_FORMATS, DEFAULT_CHUNK_SIZE, ExportCache, ExportUnavailable, export_chunks, export_rows, write_parquet,
+)
+import shutil
+import sys
+import tempfile
+import time
+
+
+class Command(BaseCommand):
+    help = 'Export every Pokemon with stats, types and abilities as NDJSON, CSV, columnar NDJSON or Parquet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=sorted(EXPORT_FORMATS),
+            default='ndjson',
+            help='Output format (default: ndjson); parquet needs pyarrow'
+        )
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Output file, or - for stdout (default)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help=f'Pokemon read and prefetched per database round trip (default: {DEFAULT_CHUNK_SIZE})'
+        )
+        parser.add_argument(
+            '--no-cache',
+            action='store_true',
+            help='Read from the database without reusing or storing the export for this data version'
+        )
+
+    def handle(self, *args, **options):
+        export_format = options['format']
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        started_at = time.monotonic()
+        export_cache = ExportCache()
+        output = sys.stdout.buffer if options['output'] == '-' else open(options['output'], 'wb')
+        try:
+            cached_path = None if options['no_cache'] else export_cache.get(export_format)
+            if cached_path is None and export_format == 'parquet' and not options['no_cache']:
+                cached_path = export_cache.build(export_format, options['chunk_size'])
+
+            if cached_path:
+                with open(cached_path, 'rb') as f:
+                    shutil.copyfileobj(f, output)
+                source = f'cached export {cached_path}'
+            elif export_format == 'parquet':
+                # Parquet needs a seekable file; a private one keeps the shared export cache untouched
+                with tempfile.TemporaryFile() as f:
+                    write_parquet(export_rows(options['chunk_size']), f, options['chunk_size'])
+                    f.seek(0)
+                    shutil.copyfileobj(f, output)
+                source = 'database'
+            else:
+                if options['no_cache']:
+                    chunks = export_chunks(export_format, options['chunk_size'])
+                else:
+                    chunks = export_cache.stream_and_store(export_format, options['chunk_size'])
+                for chunk in chunks:
+                    output.write(chunk)
+                source = 'database'
+        except ExportUnavailable as e:
+            raise CommandError(str(e))
+        finally:
+            if output is not sys.stdout.buffer:
+                output.close()
+
+        if options['output'] != '-':
+            elapsed = time.monotonic() - started_at
+            self.stdout.write(
+                self.style.SUCCESS(f'Exported Pokemon as {export_format} to {options["output"]} '
+                                   f'from {source} in {elapsed:.2f}s')
+            )
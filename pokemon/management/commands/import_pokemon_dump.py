@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+from pokemon.dump_reader import PokemonDumpReader
+from pokemon.services import DataVersion, PokemonDataManager, SyncStats
+import time
+
+
+class Command(BaseCommand):
+    help = 'Import Pokemon from a local PokeAPI dump (directory, .tar.gz or .jsonl) instead of the network'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Dump directory, .tar/.tar.gz archive or .jsonl/.jsonl.gz file'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of Pokemon written per database batch (default: 500)'
+        )
+        parser.add_argument(
+            '--skip-unchanged',
+            action='store_true',
+            help='Do not rewrite Pokemon whose stored data hash matches the dump'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        try:
+            reader = PokemonDumpReader(options['path'])
+        except FileNotFoundError:
+            raise CommandError(f'Dump not found: {options["path"]}')
+
+        self.stdout.write(self.style.SUCCESS(f'Importing Pokemon from {options["path"]}'))
+        PokemonDataManager.sync_pokemon_types()
+
+        stats = SyncStats()
+        started_at = time.monotonic()
+        batch = []
+        chains = {}
+        types = {}
+        chain_ids = set()
+
+        def write_batch():
+            PokemonDataManager.bulk_upsert_pokemon(
+                batch, skip_unchanged=options['skip_unchanged'], stats=stats
+            )
+            self.stdout.write(f'Imported {stats.seen} Pokemon so far')
+            batch.clear()
+
+        try:
+            for payload in reader.pokemon_payloads(chains=chains, types=types):
+                chain_id = PokemonDataManager.evolution_chain_id(payload[1])
+                if chain_id:
+                    chain_ids.add(chain_id)
+                batch.append(payload)
+                stats.seen += 1
+                stats.fetched += 1
+                if len(batch) >= batch_size:
+                    write_batch()
+            if batch:
+                write_batch()
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        # Chains are written once every Pokemon they reference is in the database
+        referenced_chains = {chain_id: data for chain_id, data in chains.items() if chain_id in chain_ids}
+        if referenced_chains:
+            written = PokemonDataManager.bulk_write_evolution_chains(referenced_chains)
+            self.stdout.write(f'Imported {written} evolution chains')
+        missing_chains = chain_ids - set(chains)
+        if missing_chains:
+            self.stdout.write(
+                self.style.WARNING(f'{len(missing_chains)} referenced evolution chains are not in the dump')
+            )
+
+        if types:
+            updated = PokemonDataManager.write_type_relations(types)
+            self.stdout.write(f'Imported damage relations of {updated} types')
+
+        DataVersion.bump()
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Import completed in {elapsed:.1f}s: read {stats.seen}, created {stats.created}, '
+                f'updated {stats.updated}, unchanged {stats.unchanged}, failed {stats.failed}'
+            )
+        )
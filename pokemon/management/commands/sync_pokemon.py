@@ -1,10 +1,42 @@
 
+from datetime import timedelta
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from pokemon.services import PokemonDataManager, PokeAPIService
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from pokemon.cache_backends import InstrumentedCache
+from pokemon.models import SyncRun
+from pokemon.services import DataVersion, PokemonDataManager, PokeAPIService, SyncStats
+from pokemon.sync_pipeline import SyncPipeline
+import re
 import time
 
 
+DURATION_UNITS = {'s': 'seconds', 'm': 'minutes', 'h': 'hours', 'd': 'days', 'w': 'weeks'}
+
+
+def parse_duration(value):
+    """Parse durations such as '90s', '12h' or '7d'; a bare number means days."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*', value)
+    if not match:
+        raise CommandError(f'Invalid duration: {value!r} (expected e.g. 12h, 7d, 2w)')
+    amount, unit = match.groups()
+    return timedelta(**{DURATION_UNITS[unit or 'd']: float(amount)})
+
+
+def parse_since(value):
+    """Parse an ISO date or datetime into an aware datetime."""
+    since = parse_datetime(value)
+    if since is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Invalid --since value: {value!r} (expected ISO date or datetime)')
+        since = timezone.datetime.combine(date, timezone.datetime.min.time())
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
 class Command(BaseCommand):
     help = 'Sync Pokemon data from PokeAPI'
 
@@ -30,68 +62,414 @@ class Command(BaseCommand):
         parser.add_argument(
             '--delay',
             type=float,
-            default=0.1,
-            help='Delay between requests to avoid rate limiting (seconds)'
+            default=0.0,
+            help='Extra delay between batches (seconds); --rate-limit is usually enough'
+        )
+        parser.add_argument(
+            '--pipeline-depth',
+            type=int,
+            default=2,
+            help='Batches fetched and parsed ahead of the database writer (default: 2)'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Number of parallel PokeAPI requests (default: 1, sequential)'
+        )
+        parser.add_argument(
+            '--rate-limit',
+            type=float,
+            default=20.0,
+            help='Maximum PokeAPI requests per second, 0 to disable (default: 20)'
+        )
+        parser.add_argument(
+            '--pool-size',
+            type=int,
+            default=None,
+            help='HTTP keep-alive connection pool size (default: at least --concurrency)'
+        )
+        parser.add_argument(
+            '--max-retries',
+            type=int,
+            default=PokeAPIService.MAX_RETRIES,
+            help='Retries for transient PokeAPI errors such as 429 and 5xx (default: %(default)s)'
+        )
+        parser.add_argument(
+            '--base-url',
+            default=None,
+            help='Override the PokeAPI base URL, e.g. a local mirror or stub server'
+        )
+        parser.add_argument(
+            '--revalidate',
+            action='store_true',
+            help='Revalidate every stored PokeAPI response with a conditional request'
+        )
+        parser.add_argument(
+            '--no-response-store',
+            action='store_true',
+            help='Do not read or write the persistent PokeAPI response store'
+        )
+        parser.add_argument(
+            '--skip-evolutions',
+            action='store_true',
+            help='Do not fetch and store evolution chains for the synced Pokemon'
+        )
+        parser.add_argument(
+            '--skip-abilities',
+            action='store_true',
+            help='Do not fetch descriptions and effects of abilities that have none yet'
+        )
+        parser.add_argument(
+            '--skip-type-chart',
+            action='store_true',
+            help='Do not fetch the damage relations of each type'
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Continue the last sync run from its last committed batch, with its original options'
+        )
+        parser.add_argument(
+            '--retry-passes',
+            type=int,
+            default=3,
+            help='Dead-letter passes retrying Pokemon that failed to sync (default: 3)'
+        )
+        incremental = parser.add_mutually_exclusive_group()
+        incremental.add_argument(
+            '--since',
+            default=None,
+            help='Incremental sync: skip Pokemon cached at or after this ISO date/datetime'
+        )
+        incremental.add_argument(
+            '--stale-after',
+            default=None,
+            help='Incremental sync: only refresh Pokemon cached longer ago than this, e.g. 12h or 7d'
         )
 
     def handle(self, *args, **options):
-        limit = options['limit']
-        offset = options['offset']
-        batch_size = options['batch_size']
-        delay = options['delay']
+        if options['concurrency'] < 1:
+            raise CommandError('--concurrency must be at least 1')
 
-        self.stdout.write(
-            self.style.SUCCESS(f'Starting Pokemon sync: {limit} Pokemon from offset {offset}')
+        # The client settings below are shared by the whole process; they are
+        # put back when the run ends, so callers in the same process (tests,
+        # benchmark_sync, a shell) are unaffected
+        with PokeAPIService.run_settings():
+            self.configure_client(options)
+            self.sync(options)
+
+    def configure_client(self, options):
+        """Apply this run's base URL, retries, rate limit, pool size and response store options."""
+        concurrency = options['concurrency']
+        if options['base_url']:
+            PokeAPIService.BASE_URL = options['base_url'].rstrip('/')
+        PokeAPIService.set_rate_limit(options['rate_limit'])
+        PokeAPIService.MAX_RETRIES = options['max_retries']
+        PokeAPIService.configure_session(
+            options['pool_size'] or max(PokeAPIService.POOL_SIZE, concurrency)
         )
+        PokeAPIService.reset_endpoint_stats()
+        if options['no_response_store']:
+            PokeAPIService.set_response_store(None)
+        if options['revalidate']:
+            PokeAPIService.RESPONSE_STORE_MAX_AGE = 0
+
+    def sync(self, options):
+        """Start or resume a sync run and report on it."""
+        delay = options['delay']
+        concurrency = options['concurrency']
+
+        if options['resume']:
+            run = self.run_to_resume()
+        else:
+            run = self.start_run(options)
+        run_options = run.options
+        stale_before = parse_datetime(run_options['stale_before']) if run_options.get('stale_before') else None
+        batch_size = run.batch_size
+        end_offset = run.offset + run.limit
+
+        if options['resume']:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Resuming sync run {run.pk} ({run.status}) at offset {run.next_offset} of '
+                    f'{run.offset}-{end_offset} with {len(run.failed_ids)} failed Pokemon to retry '
+                    f'(concurrency {concurrency})'
+                )
+            )
+            run.status = SyncRun.STATUS_RUNNING
+            run.error = ''
+            run.save(update_fields=['status', 'error', 'updated_at'])
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Starting Pokemon sync run {run.pk}: {run.limit} Pokemon from offset {run.offset} '
+                    f'(concurrency {concurrency})'
+                )
+            )
 
         # Sync types first
+        started_at = time.monotonic()
         self.stdout.write('Syncing Pokemon types...')
         PokemonDataManager.sync_pokemon_types()
         self.stdout.write(self.style.SUCCESS('Pokemon types synced successfully'))
 
-        # Sync Pokemon in batches
-        total_synced = 0
-        current_offset = offset
-
-        while total_synced < limit:
-            current_batch_size = min(batch_size, limit - total_synced)
+        if not run_options.get('skip_type_chart'):
+            self.stdout.write('Syncing type damage relations...')
+            try:
+                updated = PokemonDataManager.sync_type_relations(concurrency=concurrency)
+                self.stdout.write(self.style.SUCCESS(f'Updated damage relations of {updated} types'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error syncing type damage relations: {e}'))
+        self.add_timing(run, 'types', started_at)
 
-            self.stdout.write(
-                f'Syncing batch: {current_offset + 1} to {current_offset + current_batch_size}'
-            )
+        if stale_before:
+            self.stdout.write(f'Incremental sync: skipping Pokemon cached since {stale_before:%Y-%m-%d %H:%M:%S %Z}')
 
-            try:
-                with transaction.atomic():
-                    synced_pokemon = PokemonDataManager.sync_pokemon_batch(
-                        limit=current_batch_size,
-                        offset=current_offset
-                    )
+        # Sync Pokemon in batches: fetching and parsing run ahead in a pipeline
+        # while each batch is written, and the run is checkpointed in the same
+        # transaction as the batch, so next_offset always matches the data
+        stats = SyncStats(**run.stats)
+        evolution_chain_ids = set(run.evolution_chain_ids)
+        failed_ids = {int(pokemon_id): attempts for pokemon_id, attempts in run.failed_ids.items()}
+        current_offset = run.next_offset
+        error = None
+        pipeline = SyncPipeline(
+            current_offset, end_offset, batch_size,
+            concurrency=concurrency,
+            stale_before=stale_before,
+            depth=options['pipeline_depth'],
+            delay=delay,
+        )
 
-                    if synced_pokemon:
-                        self.stdout.write(
-                            self.style.SUCCESS(
-                                f'Successfully synced {len(synced_pokemon)} Pokemon'
-                            )
-                        )
-                        total_synced += len(synced_pokemon)
-                    else:
+        try:
+            batches = pipeline.batches()
+            while True:
+                try:
+                    batch = next(batches, None)
+                    if batch is None:
+                        break
+                    if batch.exhausted:
+                        current_offset = end_offset
+                        self.save_run(run, stats, evolution_chain_ids, failed_ids, next_offset=current_offset)
                         self.stdout.write(
-                            self.style.WARNING('No Pokemon synced in this batch')
+                            self.style.WARNING(f'No Pokemon returned for batch at offset {batch.offset}')
                         )
                         break
 
+                    with transaction.atomic():
+                        synced_pokemon = PokemonDataManager.write_parsed_pokemon(
+                            batch.parsed, skip_unchanged=stale_before is not None, stats=batch.stats
+                        )
+                        # Totals only take in batches that were committed
+                        batch_stats = SyncStats(**stats.as_dict())
+                        batch_stats.add(batch.stats)
+                        batch_failed_ids = dict(failed_ids)
+                        for pokemon_id in batch.failed_ids:
+                            batch_failed_ids[pokemon_id] = batch_failed_ids.get(pokemon_id, 0) + 1
+                        self.save_run(run, batch_stats, evolution_chain_ids | batch.evolution_chain_ids,
+                                      batch_failed_ids, next_offset=batch.offset + batch.size)
+                    stats, failed_ids = batch_stats, batch_failed_ids
+                    evolution_chain_ids |= batch.evolution_chain_ids
+                    current_offset = batch.offset + batch.size
+
+                except Exception as e:
+                    # Nothing of the failed batch was committed; --resume retries it
+                    error = e
+                    self.stdout.write(
+                        self.style.ERROR(f'Error syncing batch at offset {current_offset}: {e}')
+                    )
+                    break
+
+                message = f'Synced {batch.offset + 1} to {batch.offset + batch.size}: {len(synced_pokemon)} Pokemon written'
+                if batch.failed_ids:
+                    message += f', {len(batch.failed_ids)} failed and will be retried'
+                    self.stdout.write(self.style.WARNING(message))
+                else:
+                    self.stdout.write(self.style.SUCCESS(message))
+            batches.close()
+            run.timings['batches'] = round(run.timings.get('batches', 0.0) + pipeline.elapsed, 3)
+            for name, stage in pipeline.stages.items():
+                key = f'{name}_busy'
+                run.timings[key] = round(run.timings.get(key, 0.0) + stage.busy, 3)
+            self.stdout.write('  pipeline: ' + ', '.join(
+                f'{name} {report["busy"]}% busy ({report["waiting"]}% waiting, {report["blocked"]}% blocked)'
+                for name, report in pipeline.report().items()
+            ))
+
+            if error is None and failed_ids:
+                try:
+                    self.retry_failed(run, options['retry_passes'], concurrency, stale_before,
+                                      stats, evolution_chain_ids, failed_ids)
+                except Exception as e:
+                    error = e
+                    self.stdout.write(self.style.ERROR(f'Error retrying failed Pokemon: {e}'))
+        except KeyboardInterrupt:
+            run.status = SyncRun.STATUS_INTERRUPTED
+            run.save(update_fields=['status', 'updated_at'])
+            DataVersion.bump()
+            self.stdout.write(self.style.WARNING(f'Interrupted; continue sync run {run.pk} with --resume'))
+            raise
+
+        if error is not None:
+            run.status = SyncRun.STATUS_FAILED
+            run.error = str(error)
+            run.save(update_fields=['status', 'error', 'updated_at'])
+            DataVersion.bump()
+            raise CommandError(
+                f'Sync run {run.pk} failed at offset {current_offset}: {error}. '
+                f'Continue it with --resume'
+            )
+
+        # Evolution chains are shared between species, possibly across batches,
+        # so they are fetched once each after all Pokemon have been written
+        if evolution_chain_ids and not run_options.get('skip_evolutions'):
+            started_at = time.monotonic()
+            self.stdout.write(f'Syncing {len(evolution_chain_ids)} evolution chains...')
+            try:
+                chains_synced = PokemonDataManager.sync_evolution_chains(
+                    evolution_chain_ids, concurrency=concurrency
+                )
+                self.stdout.write(self.style.SUCCESS(f'Synced {chains_synced} evolution chains'))
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'Error syncing evolution chains: {e}'))
+            self.add_timing(run, 'evolution_chains', started_at)
+
+        # Abilities are shared by many Pokemon; each one not yet fetched is
+        # fetched once, so an interrupted run picks up where it stopped
+        if not run_options.get('skip_abilities'):
+            started_at = time.monotonic()
+            self.stdout.write('Syncing ability descriptions...')
+            try:
+                updated, failed = PokemonDataManager.sync_ability_descriptions(concurrency=concurrency)
+                message = f'Updated descriptions of {updated} abilities'
+                if failed:
+                    self.stdout.write(self.style.WARNING(f'{message}, {failed} could not be fetched'))
+                else:
+                    self.stdout.write(self.style.SUCCESS(message))
             except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f'Error syncing batch: {e}')
+                self.stdout.write(self.style.ERROR(f'Error syncing ability descriptions: {e}'))
+            self.add_timing(run, 'abilities', started_at)
+
+        # Let in-process indexes and caches know the data changed
+        DataVersion.bump()
+
+        stats.failed = len(failed_ids)
+        self.save_run(run, stats, evolution_chain_ids, failed_ids,
+                      status=SyncRun.STATUS_COMPLETED, finished_at=timezone.now())
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Pokemon sync completed! Total synced: {stats.created + stats.updated} '
+                f'(fetched {stats.fetched}, skipped {stats.skipped} fresh, '
+                f'unchanged {stats.unchanged}, created {stats.created}, '
+                f'updated {stats.updated}, failed {stats.failed})'
+            )
+        )
+        if failed_ids:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'  still failing after {options["retry_passes"]} retry passes: '
+                    f'{", ".join(str(pokemon_id) for pokemon_id in sorted(failed_ids))} '
+                    f'(retry them with --resume)'
                 )
+            )
+        self.stdout.write('  timings: ' + ', '.join(f'{stage} {seconds:.1f}s' for stage, seconds in run.timings.items()))
+
+        for endpoint_type, counts in sorted(PokeAPIService.get_endpoint_stats().items()):
+            line = (
+                f'  {endpoint_type}: {counts.get("requests", 0)} requests, '
+                f'{counts.get("retries", 0)} retries, {counts.get("failures", 0)} failures, '
+                f'{counts.get("stored", 0)} served from disk, {counts.get("revalidated", 0)} revalidated'
+            )
+            self.stdout.write(self.style.WARNING(line) if counts.get('failures') else line)
+
+        pokeapi_cache = PokeAPIService.get_cache()
+        if isinstance(pokeapi_cache, InstrumentedCache):
+            metrics = pokeapi_cache.local_metrics()
+            self.stdout.write(
+                f'  cache: {metrics["hits"]} hits, {metrics["misses"]} misses, '
+                f'{metrics["raw_bytes"]} bytes stored as {metrics["stored_bytes"]}'
+            )
+
+    def start_run(self, options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        stale_before = None
+        if options['since']:
+            stale_before = parse_since(options['since'])
+        elif options['stale_after']:
+            stale_before = timezone.now() - parse_duration(options['stale_after'])
+
+        return SyncRun.objects.create(
+            offset=options['offset'],
+            limit=options['limit'],
+            batch_size=options['batch_size'],
+            next_offset=options['offset'],
+            options={
+                'stale_before': stale_before.isoformat() if stale_before else None,
+                'skip_evolutions': options['skip_evolutions'],
+                'skip_abilities': options['skip_abilities'],
+                'skip_type_chart': options['skip_type_chart'],
+            },
+        )
+
+    def run_to_resume(self):
+        """The last sync run, unless it completed with nothing left to retry."""
+        run = SyncRun.objects.order_by('-started_at', '-pk').first()
+        if run is None:
+            raise CommandError('There is no sync run to resume')
+        if run.is_finished and not run.failed_ids:
+            raise CommandError(f'Sync run {run.pk} completed; there is nothing to resume')
+        return run
+
+    def retry_failed(self, run, passes, concurrency, stale_before, stats, evolution_chain_ids, failed_ids):
+        """
+        Dead-letter passes: retry the Pokemon that failed, each pass after a
+        growing pause. IDs still failing stay on the run with their attempt
+        counts, so a later --resume retries them again.
+        """
+        started_at = time.monotonic()
+        for retry_pass in range(passes):
+            pending = sorted(failed_ids)
+            if not pending:
                 break
+            time.sleep(min(PokeAPIService.BACKOFF_MAX, PokeAPIService.BACKOFF_BASE * (2 ** retry_pass)))
+            self.stdout.write(f'Retrying {len(pending)} failed Pokemon (pass {retry_pass + 1} of {passes})...')
+
+            still_failed = []
+            with transaction.atomic():
+                PokemonDataManager.sync_pokemon_ids(
+                    pending,
+                    concurrency=concurrency,
+                    stale_before=stale_before,
+                    stats=stats,
+                    evolution_chain_ids=evolution_chain_ids,
+                    failed_ids=still_failed
+                )
+                for pokemon_id in pending:
+                    if pokemon_id in still_failed:
+                        failed_ids[pokemon_id] += 1
+                    else:
+                        del failed_ids[pokemon_id]
+                self.add_timing(run, 'dead_letters', started_at)
+                self.save_run(run, stats, evolution_chain_ids, failed_ids)
+            started_at = time.monotonic()
 
-            current_offset += current_batch_size
+            recovered = len(pending) - len(still_failed)
+            self.stdout.write(f'Recovered {recovered} Pokemon, {len(still_failed)} still failing')
 
-            # Add delay to avoid rate limiting
-            if delay > 0:
-                time.sleep(delay)
+    @staticmethod
+    def add_timing(run, stage, started_at):
+        run.timings[stage] = round(run.timings.get(stage, 0.0) + time.monotonic() - started_at, 3)
 
-        self.stdout.write(
-            self.style.SUCCESS(f'Pokemon sync completed! Total synced: {total_synced}')
-        )
\ No newline at end of file
+    @staticmethod
+    def save_run(run, stats, evolution_chain_ids, failed_ids, **fields):
+        """Checkpoint the run's progress (inside the caller's transaction, if any)."""
+        run.stats = stats.as_dict()
+        run.evolution_chain_ids = sorted(evolution_chain_ids)
+        run.failed_ids = {str(pokemon_id): attempts for pokemon_id, attempts in sorted(failed_ids.items())}
+        for name, value in fields.items():
+            setattr(run, name, value)
+        run.save()
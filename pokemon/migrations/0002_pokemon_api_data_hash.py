@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemon',
+            name='api_data_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
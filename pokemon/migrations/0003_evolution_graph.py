@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0002_pokemon_api_data_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='evolutionchain',
+            name='graph',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='pokemon',
+            name='evolution_chain',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='members', to='pokemon.evolutionchain'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+def populate_evolution_graphs(apps, schema_editor):
+    """Build EvolutionChain.graph and Pokemon.evolution_chain from existing Evolution rows."""
+    EvolutionChain = apps.get_model('pokemon', 'EvolutionChain')
+    Evolution = apps.get_model('pokemon', 'Evolution')
+    Pokemon = apps.get_model('pokemon', 'Pokemon')
+
+    types_by_pokemon_pk = defaultdict(list)
+    for pokemon_pk, type_name, type_color in Pokemon.types.through.objects.values_list(
+        'pokemon_id', 'pokemontype__name', 'pokemontype__color'
+    ):
+        types_by_pokemon_pk[pokemon_pk].append({'name': type_name, 'color': type_color})
+
+    edges_by_chain = defaultdict(list)
+    for evolution in Evolution.objects.select_related('from_pokemon', 'to_pokemon'):
+        edges_by_chain[evolution.chain_id].append(evolution)
+
+    for chain in EvolutionChain.objects.select_related('base_pokemon'):
+        members = [chain.base_pokemon]
+        for evolution in edges_by_chain[chain.pk]:
+            members.extend([evolution.from_pokemon, evolution.to_pokemon])
+
+        nodes = {}
+        for pokemon in members:
+            nodes[str(pokemon.pokedex_id)] = {
+                'pokedex_id': pokemon.pokedex_id,
+                'name': pokemon.name,
+                'sprite_front': pokemon.sprite_front,
+                'types': types_by_pokemon_pk.get(pokemon.pk, []),
+            }
+
+        chain.graph = {
+            'base': chain.base_pokemon.pokedex_id,
+            'nodes': nodes,
+            'edges': [
+                {
+                    'from': evolution.from_pokemon.pokedex_id,
+                    'to': evolution.to_pokemon.pokedex_id,
+                    'trigger': evolution.trigger,
+                    'min_level': evolution.min_level,
+                    'item': evolution.item,
+                    'condition': evolution.condition,
+                }
+                for evolution in edges_by_chain[chain.pk]
+            ],
+        }
+        chain.save(update_fields=['graph'])
+        Pokemon.objects.filter(pk__in=[pokemon.pk for pokemon in members]).update(evolution_chain=chain)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0003_evolution_graph'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_evolution_graphs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:09
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def populate_total_stats(apps, schema_editor):
+    Pokemon = apps.get_model('pokemon', 'Pokemon')
+    Pokemon.objects.update(
+        total_stats=F('hp') + F('attack') + F('defense') + F('special_attack') + F('special_defense') + F('speed')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0004_populate_evolution_graphs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemon',
+            name='total_stats',
+            field=models.IntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(populate_total_stats, migrations.RunPython.noop),
+    ]
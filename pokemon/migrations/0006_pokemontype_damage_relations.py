@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0005_pokemon_total_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemontype',
+            name='damage_relations',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
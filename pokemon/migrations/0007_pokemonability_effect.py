@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0006_pokemontype_damage_relations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemonability',
+            name='effect',
+            field=models.TextField(blank=True),
+        ),
+    ]
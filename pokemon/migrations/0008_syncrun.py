@@ -0,0 +1,36 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0007_pokemonability_effect'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SyncRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('running', 'Running'), ('failed', 'Failed'), ('interrupted', 'Interrupted'), ('completed', 'Completed')], db_index=True, default='running', max_length=20)),
+                ('offset', models.IntegerField(default=0)),
+                ('limit', models.IntegerField()),
+                ('batch_size', models.IntegerField()),
+                ('next_offset', models.IntegerField(default=0)),
+                ('options', models.JSONField(blank=True, default=dict)),
+                ('failed_ids', models.JSONField(blank=True, default=dict)),
+                ('evolution_chain_ids', models.JSONField(blank=True, default=list)),
+                ('stats', models.JSONField(blank=True, default=dict)),
+                ('timings', models.JSONField(blank=True, default=dict)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
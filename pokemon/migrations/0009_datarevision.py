@@ -0,0 +1,21 @@
+# Generated by Django 5.2.1 on 2026-10-18 04:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0008_syncrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('revision', models.PositiveBigIntegerField(default=0)),
+                ('bumped_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
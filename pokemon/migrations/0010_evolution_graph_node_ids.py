@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def store_node_ids(apps, schema_editor):
+    """Replace the name/sprite/types copies in EvolutionChain.graph nodes with pokedex IDs."""
+    EvolutionChain = apps.get_model('pokemon', 'EvolutionChain')
+
+    updated = []
+    for chain in EvolutionChain.objects.only('pk', 'graph'):
+        nodes = (chain.graph or {}).get('nodes')
+        if isinstance(nodes, dict):
+            chain.graph['nodes'] = [node['pokedex_id'] for node in nodes.values()]
+            updated.append(chain)
+    EvolutionChain.objects.bulk_update(updated, ['graph'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0009_datarevision'),
+    ]
+
+    operations = [
+        migrations.RunPython(store_node_ids, migrations.RunPython.noop),
+    ]
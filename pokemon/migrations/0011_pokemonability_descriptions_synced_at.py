@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 05:01
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def mark_synced_abilities(apps, schema_editor):
+    """Abilities that already have text were fetched before the marker existed."""
+    PokemonAbility = apps.get_model('pokemon', 'PokemonAbility')
+    PokemonAbility.objects.exclude(description='', effect='').update(descriptions_synced_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pokemon', '0010_evolution_graph_node_ids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokemonability',
+            name='descriptions_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(mark_synced_abilities, migrations.RunPython.noop),
+    ]
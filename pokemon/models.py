@@ -3,9 +3,25 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 import json
 
 
+# National dex ranges of each generation
+GENERATION_RANGES = {
+    1: (1, 151),
+    2: (152, 251),
+    3: (252, 386),
+    4: (387, 493),
+    5: (494, 649),
+    6: (650, 721),
+    7: (722, 809),
+    8: (810, 905),
+    9: (906, 1025),
+}
+
+
 class PokemonType(models.Model):
     name = models.CharField(max_length=50, unique=True)
     color = models.CharField(max_length=7, default='#000000')  # Hex color for UI
+    # Attacking relations from PokeAPI: {"double_damage_to": [names], "half_damage_to": [...], "no_damage_to": [...]}
+    damage_relations = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return self.name.title()
@@ -30,6 +46,8 @@ class Pokemon(models.Model):
     special_attack = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(255)])
     special_defense = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(255)])
     speed = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(255)])
+    # Sum of the six base stats, stored so it can be filtered and sorted in SQL
+    total_stats = models.IntegerField(default=0, db_index=True, editable=False)
 
     # Relationships
     types = models.ManyToManyField(PokemonType, related_name='pokemon')
@@ -39,8 +57,14 @@ class Pokemon(models.Model):
     is_legendary = models.BooleanField(default=False)
     is_mythical = models.BooleanField(default=False)
 
+    # Evolution chain this Pokemon belongs to (set when chains are synced)
+    evolution_chain = models.ForeignKey(
+        'EvolutionChain', on_delete=models.SET_NULL, null=True, blank=True, related_name='members'
+    )
+
     # API data cache
     api_data_cached_at = models.DateTimeField(null=True, blank=True)
+    api_data_hash = models.CharField(max_length=64, blank=True)  # SHA-256 of the synced data
 
     class Meta:
         ordering = ['pokedex_id']
@@ -48,8 +72,14 @@ class Pokemon(models.Model):
     def __str__(self):
         return f"#{self.pokedex_id:03d} {self.name.title()}"
 
-    @property
-    def total_stats(self):
+    def save(self, *args, **kwargs):
+        self.total_stats = self.compute_total_stats()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'total_stats' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['total_stats']
+        super().save(*args, **kwargs)
+
+    def compute_total_stats(self):
         return self.hp + self.attack + self.defense + self.special_attack + self.special_defense + self.speed
 
     @property
@@ -60,10 +90,19 @@ class Pokemon(models.Model):
     def weight_kg(self):
         return self.weight / 10  # Convert hectograms to kg
 
+    @property
+    def render_version(self):
+        """Key for cached renders of this Pokemon; changes when a sync rewrites it with new data."""
+        if self.api_data_hash:
+            return self.api_data_hash
+        return self.api_data_cached_at.isoformat() if self.api_data_cached_at else ''
+
 
 class PokemonAbility(models.Model):
     name = models.CharField(max_length=100, unique=True)
-    description = models.TextField(blank=True)
+    description = models.TextField(blank=True)  # English flavour text
+    effect = models.TextField(blank=True)  # English effect text
+    descriptions_synced_at = models.DateTimeField(null=True, blank=True)  # None until the text has been fetched
     is_hidden = models.BooleanField(default=False)
 
     class Meta:
@@ -86,6 +125,8 @@ class PokemonAbilityLink(models.Model):
 class EvolutionChain(models.Model):
     chain_id = models.IntegerField(unique=True)
     base_pokemon = models.ForeignKey(Pokemon, on_delete=models.CASCADE, related_name='evolution_chains')
+    # Serialized graph built at sync time: {"nodes": {pokedex_id: {...}}, "edges": [...]}
+    graph = models.JSONField(default=dict, blank=True)
 
     def __str__(self):
         return f"Evolution Chain {self.chain_id}"
@@ -111,3 +152,54 @@ class UserFavorite(models.Model):
 
     class Meta:
         unique_together = ['session_key', 'pokemon']
+
+
+class SyncRun(models.Model):
+    """A sync_pokemon run, checkpointed after every committed batch so it can be resumed."""
+    STATUS_RUNNING = 'running'
+    STATUS_FAILED = 'failed'
+    STATUS_INTERRUPTED = 'interrupted'
+    STATUS_COMPLETED = 'completed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_FAILED, 'Failed'),
+        (STATUS_INTERRUPTED, 'Interrupted'),
+        (STATUS_COMPLETED, 'Completed'),
+    ]
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING, db_index=True)
+    offset = models.IntegerField(default=0)
+    limit = models.IntegerField()
+    batch_size = models.IntegerField()
+    next_offset = models.IntegerField(default=0)  # first offset whose batch has not been committed
+    options = models.JSONField(default=dict, blank=True)  # sync options reused by --resume
+    failed_ids = models.JSONField(default=dict, blank=True)  # {pokedex_id: attempts} not synced yet
+    evolution_chain_ids = models.JSONField(default=list, blank=True)
+    stats = models.JSONField(default=dict, blank=True)  # SyncStats counters
+    timings = models.JSONField(default=dict, blank=True)  # seconds spent per stage
+    error = models.TextField(blank=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Sync run {self.pk} ({self.status}, offset {self.next_offset}/{self.offset + self.limit})"
+
+    @property
+    def is_finished(self):
+        return self.status == self.STATUS_COMPLETED
+
+
+class DataRevision(models.Model):
+    """
+    Single row counting committed data changes (see services.DataVersion), so
+    every process sees a sync's bump whatever cache backend it uses.
+    """
+    revision = models.PositiveBigIntegerField(default=0)
+    bumped_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Data revision {self.revision}"
@@ -0,0 +1,95 @@
+# pokemon/pagination.py
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from django.core.cache import cache
+from django.db.models import CharField, Q, TextField
+
+from .services import DataVersion
+
+SortKeys = Sequence[Tuple[str, bool]]  # [(field, descending)]
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values), separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, length: int) -> List[Any]:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Cursor does not match the requested sort order")
+    return values
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a queryset.
+
+    Rows are ordered by the sort keys with pokedex_id as the unique
+    tiebreaker, and a page starts right after the row the cursor was taken
+    from (WHERE (sort, pokedex_id) > cursor values) instead of at an OFFSET.
+    Every page therefore costs one indexed range query however deep it is,
+    and no COUNT(*) is run unless asked for.
+    """
+
+    def __init__(self, queryset, sort_keys: SortKeys = (), page_size: int = 20):
+        keys = []
+        for field, descending in sort_keys or [('pokedex_id', False)]:
+            keys.append((field, descending))
+            if field == 'pokedex_id':
+                break  # unique: later keys can never break a tie
+        else:
+            keys.append(('pokedex_id', False))
+        self.keys = keys
+        self.queryset = queryset.order_by(*[f'-{field}' if descending else field for field, descending in keys])
+        self.page_size = page_size
+
+    def after(self, values: Sequence[Any]) -> Q:
+        """Filter selecting the rows that sort strictly after values."""
+        condition = Q()
+        equal = Q()
+        for (field, descending), value in zip(self.keys, values):
+            condition |= equal & Q(**{f'{field}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{field: value})
+        return condition
+
+    def decode(self, cursor: str) -> List[Any]:
+        """Cursor values, checked against the types of their sort fields."""
+        values = decode_cursor(cursor, len(self.keys))
+        meta = self.queryset.model._meta
+        for (field, _), value in zip(self.keys, values):
+            expected = str if isinstance(meta.get_field(field), (CharField, TextField)) else int
+            if type(value) is not expected:  # also rejects None, and bools posing as ints
+                raise InvalidCursor(f"Cursor value for {field} must be {'a string' if expected is str else 'an integer'}")
+        return values
+
+    def page(self, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Return (rows, next_cursor); next_cursor is None on the last page."""
+        queryset = self.queryset
+        if cursor:
+            queryset = queryset.filter(self.after(self.decode(cursor)))
+
+        # One extra row tells whether another page follows
+        rows = list(queryset[:self.page_size + 1])
+        next_cursor = None
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            next_cursor = encode_cursor([getattr(rows[-1], field) for field, _ in self.keys])
+        return rows, next_cursor
+
+    def count(self, cache_key: str, timeout: int = 60 * 60) -> int:
+        """Total row count, cached per data version under cache_key."""
+        cache_key = f"keyset_count:{DataVersion.get()}:{cache_key}"
+        total = cache.get(cache_key)
+        if total is None:
+            total = self.queryset.order_by().count()
+            cache.set(cache_key, total, timeout)
+        return total
@@ -0,0 +1,303 @@
+# pokemon/pokeapi_stub.py
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+from .dump_reader import PokemonDumpReader
+from .services import PokemonDataManager
+
+logger = logging.getLogger(__name__)
+
+STUB_URL = 'https://pokeapi.co/api/v2'  # base of the resource URLs inside payloads
+
+# Syllables of synthetic Pokemon names, so names start as variously as a real dex's do
+NAME_SYLLABLES = (
+    'bul', 'ba', 'saur', 'char', 'man', 'der', 'squir', 'tle', 'pi', 'ka', 'chu', 'ee', 'vee', 'geo', 'dude',
+    'on', 'ix', 'gas', 'tly', 'mew', 'dra', 'ti', 'ni', 'zu', 'bat', 'gol', 'em', 'lap', 'ras', 'snor', 'lax',
+    'ar', 'ca', 'nine', 'vul', 'pix', 'jig', 'gly', 'puff', 'odd', 'ish', 'mag', 'ne', 'mite', 'tan', 'gel',
+    'kan', 'lu', 'cario', 'rai', 'quaza', 'tor', 'chic', 'mud', 'kip', 'tree', 'cko', 'sab', 'leye', 'gar',
+    'chomp', 'zor', 'ua', 'froa', 'kie', 'row', 'let', 'pop', 'plio', 'sne', 'sel', 'fen', 'nec', 'koff',
+    'wee', 'zing', 'hoot', 'scy', 'ther', 'ele', 'buzz', 'tar', 'tau', 'ros', 'grim', 'er', 'slow', 'poke',
+)
+
+
+def synthetic_names(count: int, rng: random.Random):
+    """`count` distinct names of two or three syllables."""
+    names = []
+    seen = set()
+    while len(names) < count:
+        name = ''.join(rng.choice(NAME_SYLLABLES) for _ in range(rng.choice((2, 2, 3))))
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+class StubFixtures:
+    """PokeAPI payloads served by the stub, keyed by endpoint such as 'pokemon/25' or 'type/fire'."""
+
+    def __init__(self, payloads: Dict[str, Dict], source: str = 'synthetic'):
+        self.payloads = payloads
+        self.source = source
+        self.pokemon_ids = sorted(
+            int(endpoint.split('/')[1]) for endpoint in payloads
+            if endpoint.startswith('pokemon/') and endpoint.split('/')[1].isdigit()
+        )
+
+    @classmethod
+    def from_dump(cls, path) -> 'StubFixtures':
+        """Load recorded payloads from a PokeAPI dump (see PokemonDumpReader)."""
+        payloads = {}
+        for resource, object_id, data in PokemonDumpReader(path).records():
+            payloads[f"{resource}/{object_id}"] = data
+            if resource == 'type' and data.get('name'):
+                payloads[f"type/{data['name']}"] = data  # sync_pokemon fetches types by name
+        return cls(payloads, source=str(path))
+
+    @classmethod
+    def synthetic(cls, count: int = 300, seed: int = 0) -> 'StubFixtures':
+        """
+        Generate payloads shaped like PokeAPI's for `count` Pokemon: distinct
+        syllable names, one or two types each, abilities shared by about
+        three Pokemon each, species and three-stage evolution chains, and
+        every type and ability resource.
+        """
+        rng = random.Random(seed)
+        type_names = list(PokemonDataManager.TYPE_COLORS)
+        ability_names = [f"ability-{number}" for number in range(1, max(3, count // 3) + 1)]
+        stat_names = ('hp', 'attack', 'defense', 'special-attack', 'special-defense', 'speed')
+        names = dict(zip(range(1, count + 1), synthetic_names(count, rng)))
+
+        def resource(name, endpoint):
+            return {'name': name, 'url': f"{STUB_URL}/{endpoint}/"}
+
+        payloads = {}
+        for pokemon_id in range(1, count + 1):
+            name = names[pokemon_id]
+            abilities = rng.sample(ability_names, 3)
+            payloads[f"pokemon/{pokemon_id}"] = {
+                'id': pokemon_id,
+                'name': name,
+                'height': rng.randint(2, 50),
+                'weight': rng.randint(10, 2000),
+                'base_experience': rng.randint(40, 300),
+                'sprites': {
+                    'front_default': f"https://example.com/sprites/{pokemon_id}.png",
+                    'back_default': f"https://example.com/sprites/back/{pokemon_id}.png",
+                    'other': {'official-artwork': {'front_default': f"https://example.com/artwork/{pokemon_id}.png"}},
+                },
+                'stats': [{'base_stat': rng.randint(20, 150), 'stat': resource(stat, f"stat/{stat}")} for stat in stat_names],
+                'types': [
+                    {'slot': slot, 'type': resource(type_name, f"type/{type_name}")}
+                    for slot, type_name in enumerate(rng.sample(type_names, rng.choice((1, 2))), start=1)
+                ],
+                'abilities': [
+                    {'ability': resource(ability, f"ability/{ability}"), 'is_hidden': slot == 3, 'slot': slot}
+                    for slot, ability in zip((1, 2, 3), abilities)
+                ],
+                'species': resource(name, f"pokemon-species/{pokemon_id}"),
+            }
+            payloads[f"pokemon-species/{pokemon_id}"] = {
+                'id': pokemon_id,
+                'name': name,
+                'is_legendary': pokemon_id % 50 == 0,
+                'is_mythical': pokemon_id % 97 == 0,
+                'evolution_chain': {'url': f"{STUB_URL}/evolution-chain/{(pokemon_id - 1) // 3 + 1}/"},
+            }
+
+        for chain_id in range(1, (count - 1) // 3 + 2):
+            members = [pokemon_id for pokemon_id in range(chain_id * 3 - 2, chain_id * 3 + 1) if pokemon_id <= count]
+            node = None
+            for level, pokemon_id in reversed(list(enumerate(members))):
+                node = {
+                    'species': resource(names[pokemon_id], f"pokemon-species/{pokemon_id}"),
+                    'evolution_details': [
+                        {'trigger': {'name': 'level-up'}, 'min_level': 16 * level, 'item': None}
+                    ] if level else [],
+                    'evolves_to': [node] if node else [],
+                }
+            payloads[f"evolution-chain/{chain_id}"] = {'id': chain_id, 'chain': node}
+
+        for type_name in type_names:
+            others = [other for other in type_names if other != type_name]
+            picked = rng.sample(others, 6)
+            payloads[f"type/{type_name}"] = {
+                'name': type_name,
+                'damage_relations': {
+                    'double_damage_to': [resource(other, f"type/{other}") for other in picked[:3]],
+                    'half_damage_to': [resource(other, f"type/{other}") for other in picked[3:5]],
+                    'no_damage_to': [resource(other, f"type/{other}") for other in picked[5:]],
+                },
+            }
+
+        for ability in ability_names:
+            payloads[f"ability/{ability}"] = {
+                'name': ability,
+                'effect_entries': [{'language': {'name': 'en'}, 'effect': f"Effect of {ability}.",
+                                    'short_effect': f"Short effect of {ability}."}],
+                'flavor_text_entries': [{'language': {'name': 'en'}, 'flavor_text': f"Flavour text\nof {ability}."}],
+            }
+
+        return cls(payloads)
+
+    def get(self, endpoint: str, query: Dict[str, str]) -> Optional[Dict]:
+        """The payload for an endpoint, building the paginated pokemon list on the fly."""
+        if endpoint == 'pokemon':
+            limit = int(query.get('limit', 20))
+            offset = int(query.get('offset', 0))
+            return {
+                'count': len(self.pokemon_ids),
+                'results': [
+                    {'name': self.payloads[f"pokemon/{pokemon_id}"].get('name'),
+                     'url': f"{STUB_URL}/pokemon/{pokemon_id}/"}
+                    for pokemon_id in self.pokemon_ids[offset:offset + limit]
+                ],
+            }
+        return self.payloads.get(endpoint)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; with Nagle on, keep-alive
+    # clients would wait out delayed ACKs on every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        logger.debug(f"PokeAPI stub: {format % args}")
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlparse(self.path)
+        endpoint = url.path.replace('/api/v2', '', 1).strip('/')
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        stub.record_request(endpoint)
+
+        if stub.latency:
+            time.sleep(stub.latency)
+        status = stub.scripted_status(f"{endpoint}?{url.query}" if url.query else endpoint)
+        if status is None and stub.should_throttle():
+            status = 429
+        if status is not None:
+            stub.count('throttled' if status == 429 else 'errors')
+            self.send_response(status)
+            if status == 429:
+                self.send_header('Retry-After', str(stub.retry_after))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        data = stub.fixtures.get(endpoint, query)
+        if data is None:
+            stub.count('not_found')
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if self.headers.get('If-None-Match') == etag:
+            stub.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        stub.count('served')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class PokeAPIStubServer:
+    """
+    Local HTTP server answering PokeAPI requests from fixtures.
+
+    Every response is delayed by `latency` seconds, and a `throttle_rate`
+    fraction of requests (picked with a seeded RNG) is answered with 429 and
+    a Retry-After of `retry_after` seconds, to exercise retries; fail_next()
+    scripts the status codes of an endpoint's next responses. Responses
+    carry an ETag, and a matching If-None-Match is answered with 304. Use as a
+    context manager; point PokeAPIService.BASE_URL at base_url.
+    """
+
+    def __init__(self, fixtures: StubFixtures, latency: float = 0.0, throttle_rate: float = 0.0,
+                 retry_after: float = 0.0, seed: int = 0, host: str = '127.0.0.1', port: int = 0):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.counts = Counter()
+        self.endpoint_requests = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scripted = defaultdict(deque)
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/v2"
+
+    def count(self, event: str):
+        with self._lock:
+            self.counts[event] += 1
+
+    def record_request(self, endpoint: str):
+        with self._lock:
+            self.counts['requests'] += 1
+            self.endpoint_requests[endpoint] += 1
+
+    def should_throttle(self) -> bool:
+        if not self.throttle_rate:
+            return False
+        with self._lock:
+            return self._rng.random() < self.throttle_rate
+
+    def fail_next(self, endpoint: str, *status_codes: int):
+        """
+        Answer the next requests for endpoint with these status codes, in
+        order. The endpoint may include a query string ('pokemon?limit=4&offset=8')
+        to only fail that exact request.
+        """
+        with self._lock:
+            self._scripted[endpoint].extend(status_codes)
+
+    def scripted_status(self, request: str) -> Optional[int]:
+        with self._lock:
+            for key in (request, request.split('?')[0]):
+                pending = self._scripted.get(key)
+                if pending:
+                    return pending.popleft()
+        return None
+
+    def start(self) -> 'PokeAPIStubServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), name='pokeapi-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,140 @@
+# pokemon/response_store.py
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StoredResponse(NamedTuple):
+    data: Dict
+    etag: str
+    last_modified: str
+    fetched_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers for revalidating this response with a conditional GET."""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseStore:
+    """
+    Persistent, size-bounded store of PokeAPI JSON responses.
+
+    Bodies are kept zlib-compressed in a single SQLite file together with
+    their ETag/Last-Modified validators, so a restarted process can replay
+    them from disk and revalidate stale ones with conditional requests.
+    When the store grows past max_bytes the least recently used entries
+    are evicted.
+    """
+
+    EVICT_CHECK_INTERVAL = 100  # writes between size checks
+
+    def __init__(self, path, max_bytes: int = 200 * 1024 * 1024):
+        self.path = str(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._writes_since_check = 0
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' url TEXT PRIMARY KEY,'
+            ' body BLOB NOT NULL,'
+            " etag TEXT NOT NULL DEFAULT '',"
+            " last_modified TEXT NOT NULL DEFAULT '',"
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL,'
+            ' size INTEGER NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at)')
+
+    def get(self, url: str) -> Optional[StoredResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT body, etag, last_modified, fetched_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+
+        body, etag, last_modified, fetched_at = row
+        try:
+            data = json.loads(zlib.decompress(body))
+        except (zlib.error, ValueError) as e:
+            logger.warning(f"Discarding corrupt stored response for {url}: {e}")
+            self.delete(url)
+            return None
+        return StoredResponse(data, etag, last_modified, fetched_at)
+
+    def put(self, url: str, content: bytes, etag: str = '', last_modified: str = ''):
+        """Store a raw JSON response body with its validators."""
+        body = zlib.compress(content)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses'
+                ' (url, body, etag, last_modified, fetched_at, accessed_at, size)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (url, body, etag or '', last_modified or '', now, now, len(body)),
+            )
+            self._writes_since_check += 1
+            if self._writes_since_check >= self.EVICT_CHECK_INTERVAL:
+                self._writes_since_check = 0
+                self._evict()
+
+    def touch(self, url: str):
+        """Mark a stored response as freshly validated (after a 304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE url = ?', (now, now, url)
+            )
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM responses')
+
+    def total_size(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the store is below 90% of max_bytes."""
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        target = self.max_bytes * 0.9
+        freed = 0
+        evicted = []
+        rows = self._conn.execute('SELECT url, size FROM responses ORDER BY accessed_at').fetchall()
+        for url, size in rows:
+            if total - freed <= target:
+                break
+            evicted.append((url,))
+            freed += size
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        logger.info(f"Evicted {len(evicted)} stored PokeAPI responses ({freed} bytes)")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,266 @@
+# pokemon/search_index.py
+import logging
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+from django.conf import settings
+
+from .models import Pokemon
+from .services import DataVersion
+
+logger = logging.getLogger(__name__)
+
+# Result tiers, best first
+EXACT, PREFIX, WORD_PREFIX, ID_PREFIX, SUBSTRING, FUZZY = range(6)
+
+# Deletions are indexed for up to this many leading characters of each name
+# (SymSpell's prefix length): enough to tell names apart while keeping the
+# index at under a hundred entries per name.
+FUZZY_PREFIX_LENGTH = 7
+FUZZY_MIN_QUERY_LENGTH = 3
+
+
+class SearchHit(NamedTuple):
+    pokedex_id: int
+    name: str
+    sprite: str
+    tier: int
+    distance: int = 0  # edit distance, for FUZZY hits
+
+
+def trigrams(text: str) -> Set[str]:
+    """Return the set of 3-character slices of text."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """Return word and every string obtained from it by up to max_distance deletions."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {
+            candidate[:i] + candidate[i + 1:]
+            for candidate in frontier if len(candidate) > 1
+            for i in range(len(candidate))
+        } - results
+        results |= frontier
+    return results
+
+
+def distance_row(a: str, b: str, max_distance: int) -> Optional[List[int]]:
+    """
+    Optimal string alignment distances (Levenshtein plus adjacent
+    transpositions) from a to every prefix of b: row[j] is the distance to
+    b[:j]. Returns None once every distance is known to exceed max_distance.
+    """
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                current[j] = min(current[j], previous_previous[j - 2] + 1)
+        if min(current) > max_distance:
+            return None
+        previous_previous, previous = previous, current
+    return previous
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Distance between a and b, or max_distance + 1 once it is known to be larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    row = distance_row(a, b, max_distance)
+    return max_distance + 1 if row is None else min(row[-1], max_distance + 1)
+
+
+def max_distance_for(query: str) -> int:
+    """Typos tolerated for a query: one for short queries, two otherwise."""
+    return 1 if len(query) <= 5 else 2
+
+
+class SearchIndex:
+    """
+    In-memory name/ID index for the autocomplete API.
+
+    Prefix lookups binary-search a sorted array of keys (full names plus the
+    parts after each hyphen, so "mime" finds mr-mime); substring and fuzzy
+    lookups go through a trigram -> rows map, and misspellings through a
+    SymSpell-style deletion index: every string reachable from a prefix of
+    a name (up to FUZZY_PREFIX_LENGTH characters) by up to two deletions
+    maps back to the name, so a typo is found by looking up the query's own deletions and
+    verifying the candidates' edit distance.
+
+    Results are ranked exact match first, then name prefix, word prefix, ID
+    prefix, substring and finally misspellings (closest first, whole-name
+    matches before partially typed ones), ties broken by pokedex_id.
+    """
+
+    def __init__(self, version: str, rows):
+        self.version = version
+        self.pokedex_ids: List[int] = []
+        self.names: List[str] = []
+        self.sprites: List[str] = []
+        self.position_by_name: Dict[str, int] = {}
+
+        prefix_entries = []
+        self._trigram_rows: Dict[str, Set[int]] = defaultdict(set)
+        self._deletes: Dict[str, List[int]] = defaultdict(list)
+        for position, (pokedex_id, name, sprite) in enumerate(rows):
+            name = name.lower()
+            self.pokedex_ids.append(pokedex_id)
+            self.names.append(name)
+            self.sprites.append(sprite or '')
+            self.position_by_name[name] = position
+
+            prefix_entries.append((name, position, PREFIX))
+            for i, char in enumerate(name):
+                if char == '-' and i + 1 < len(name):
+                    prefix_entries.append((name[i + 1:], position, WORD_PREFIX))
+
+            for trigram in trigrams(name):
+                self._trigram_rows[trigram].add(position)
+            # Every prefix is indexed too, so partially typed names are found
+            name_deletes = set()
+            for length in range(2, min(len(name), FUZZY_PREFIX_LENGTH) + 1):
+                name_deletes |= deletes(name[:length], 2)
+            for deletion in name_deletes:
+                if len(deletion) >= 2:
+                    self._deletes[deletion].append(position)
+
+        prefix_entries.sort()
+        self._prefix_keys = [key for key, _, _ in prefix_entries]
+        self._prefix_entries = prefix_entries
+        self._id_keys = sorted((str(pokedex_id), position) for position, pokedex_id in enumerate(self.pokedex_ids))
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'SearchIndex':
+        """Load the index from the database (one query)."""
+        version = version or DataVersion.get()
+        rows = list(Pokemon.objects.order_by('pokedex_id').values_list('pokedex_id', 'name', 'sprite_front'))
+        logger.info(f"Built search index for {len(rows)} Pokemon (data version {version})")
+        return cls(version, rows)
+
+    def search(self, query: str, limit: int = 10, fuzzy: bool = True) -> List[SearchHit]:
+        """Return up to `limit` ranked matches for query."""
+        query = query.strip().lower()
+        if not query or limit < 1:
+            return []
+
+        tiers: Dict[int, int] = {}
+
+        def add(position: int, tier: int):
+            if tier < tiers.get(position, FUZZY + 1):
+                tiers[position] = tier
+
+        exact = self.position_by_name.get(query)
+        if exact is not None:
+            add(exact, EXACT)
+
+        start = bisect_left(self._prefix_keys, query)
+        for key, position, tier in self._prefix_entries[start:]:
+            if not key.startswith(query):
+                break
+            add(position, tier)
+
+        if query.isdigit():
+            start = bisect_left(self._id_keys, (query,))
+            for key, position in self._id_keys[start:]:
+                if not key.startswith(query):
+                    break
+                add(position, ID_PREFIX)
+            for position, pokedex_id in enumerate(self.pokedex_ids):
+                if position not in tiers and query in str(pokedex_id):
+                    add(position, SUBSTRING)
+
+        for position in self._substring_candidates(query):
+            if position not in tiers and query in self.names[position]:
+                add(position, SUBSTRING)
+
+        ranked = sorted(tiers, key=lambda position: (tiers[position], self.pokedex_ids[position]))
+        hits = [
+            SearchHit(self.pokedex_ids[position], self.names[position], self.sprites[position], tiers[position])
+            for position in ranked[:limit]
+        ]
+        if fuzzy and len(hits) < limit:
+            found = {self.pokedex_ids[position] for position in tiers}
+            hits += [hit for hit in self.fuzzy_search(query, limit) if hit.pokedex_id not in found]
+        return hits[:limit]
+
+    def fuzzy_search(self, query: str, limit: int = 10, max_distance: Optional[int] = None) -> List[SearchHit]:
+        """
+        Return names within max_distance typos of query, closest first.
+
+        A name matches if either the whole name or the part of it the user
+        has typed so far is close enough, so "pikch" finds pikachu.
+        """
+        query = query.strip().lower()
+        if len(query) < FUZZY_MIN_QUERY_LENGTH or query.isdigit():
+            return []
+        if max_distance is None:
+            max_distance = max_distance_for(query)
+
+        candidates = set()
+        for deletion in deletes(query[:FUZZY_PREFIX_LENGTH], max_distance):
+            candidates.update(self._deletes.get(deletion, ()))
+
+        scored = []
+        for position in candidates:
+            name = self.names[position]
+            row = distance_row(query, name, max_distance)
+            if row is None:
+                continue
+            # Whole name, or the prefix of it around the query's length
+            distance = row[-1]
+            prefix_distance = min(row[max(1, len(query) - max_distance):len(query) + max_distance + 1],
+                                  default=max_distance + 1)
+            partial = prefix_distance < distance
+            distance = min(distance, prefix_distance)
+            if distance <= max_distance:
+                scored.append((distance, partial, self.pokedex_ids[position], position))
+
+        scored.sort()
+        return [
+            SearchHit(self.pokedex_ids[position], self.names[position], self.sprites[position], FUZZY, distance)
+            for distance, _, _, position in scored[:limit]
+        ]
+
+    def _substring_candidates(self, query: str):
+        query_trigrams = trigrams(query)
+        if not query_trigrams:
+            # Shorter than a trigram; the dex is small enough to scan
+            return [position for position, name in enumerate(self.names) if query in name]
+        postings = sorted((self._trigram_rows.get(trigram, set()) for trigram in query_trigrams), key=len)
+        candidates = set(postings[0])
+        for rows in postings[1:]:
+            candidates &= rows
+            if not candidates:
+                break
+        return candidates
+
+
+_index: Optional[SearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_search_index() -> Optional[SearchIndex]:
+    """
+    Return the process-wide search index, rebuilding it if the data version changed.
+
+    Returns None when disabled with settings.POKEMON_SEARCH_INDEX = False.
+    """
+    global _index
+    if not getattr(settings, 'POKEMON_SEARCH_INDEX', True):
+        return None
+
+    version = DataVersion.get()
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = SearchIndex.build(version)
+    return _index
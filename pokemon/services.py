@@ -1,22 +1,240 @@
 # pokemon/services.py
 import requests
+import hashlib
+import json
 import logging
-from typing import Dict, List, Optional, Tuple
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone as dt_timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from requests.adapters import HTTPAdapter
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
-from django.core.cache import cache
-from .models import Pokemon, PokemonType, PokemonAbility, PokemonAbilityLink, EvolutionChain, Evolution
+from django.core.cache import cache, caches
+from django.db.models import Count, F, Max
+from .models import DataRevision, Pokemon, PokemonType, PokemonAbility, PokemonAbilityLink, EvolutionChain, Evolution
+from .response_store import ResponseStore
 
 logger = logging.getLogger(__name__)
 
 
+class RateLimiter:
+    """Thread-safe token bucket limiting how often requests may be started."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then consume it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
 class PokeAPIService:
     BASE_URL = "https://pokeapi.co/api/v2"
     CACHE_TIMEOUT = 3600  # 1 hour
+    CACHE_ALIAS = 'pokeapi'  # falls back to the default cache when not configured
+    REQUEST_TIMEOUT = 10
+    # Stored responses younger than this are replayed without revalidating
+    RESPONSE_STORE_MAX_AGE = getattr(settings, 'POKEAPI_RESPONSE_STORE_MAX_AGE', 60 * 60 * 24)
+
+    # Connection pooling and retry policy
+    POOL_SIZE = 10
+    MAX_RETRIES = 3
+    BACKOFF_BASE = 0.5  # seconds, doubled on every retry
+    BACKOFF_MAX = 30.0
+    RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    # Optional RateLimiter shared by every outgoing request (cache hits are free)
+    rate_limiter: Optional[RateLimiter] = None
+
+    _session: Optional[requests.Session] = None
+    _session_lock = threading.Lock()
+
+    # Persistent response store; None until first use, False when disabled
+    _response_store = None
+    _response_store_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+    _endpoint_stats: Dict[str, Counter] = defaultdict(Counter)
+
+    # Class-wide settings a command may change for the length of one run
+    RUN_SETTINGS = ('BASE_URL', 'MAX_RETRIES', 'RESPONSE_STORE_MAX_AGE', 'POOL_SIZE', 'rate_limiter', '_response_store')
+
+    @classmethod
+    @contextmanager
+    def run_settings(cls) -> Iterator[None]:
+        """
+        Restore RUN_SETTINGS when the block exits, so one command's base URL,
+        retries, rate limit, pool size and response store do not leak into
+        the rest of the process.
+        """
+        saved = {name: getattr(cls, name) for name in cls.RUN_SETTINGS}
+        try:
+            yield
+        finally:
+            pool_size = cls.POOL_SIZE
+            for name, value in saved.items():
+                setattr(cls, name, value)
+            if pool_size != cls.POOL_SIZE:
+                cls.configure_session()
+
+    @classmethod
+    def set_rate_limit(cls, requests_per_second: float):
+        """Limit outgoing requests to the given rate; 0 disables limiting."""
+        cls.rate_limiter = RateLimiter(requests_per_second) if requests_per_second > 0 else None
+
+    @classmethod
+    def configure_session(cls, pool_size: Optional[int] = None):
+        """(Re)create the shared keep-alive session with the given connection pool size."""
+        with cls._session_lock:
+            if pool_size is not None:
+                cls.POOL_SIZE = pool_size
+            if cls._session is not None:
+                cls._session.close()
+            cls._session = cls._build_session()
+
+    @classmethod
+    def _build_session(cls) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=cls.POOL_SIZE, pool_maxsize=cls.POOL_SIZE)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept'] = 'application/json'
+        return session
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Return the shared pooled session, creating it on first use."""
+        if cls._session is None:
+            with cls._session_lock:
+                if cls._session is None:
+                    cls._session = cls._build_session()
+        return cls._session
+
+    @classmethod
+    def get_response_store(cls) -> Optional[ResponseStore]:
+        """Return the persistent response store configured in settings, if any."""
+        if cls._response_store is None:
+            with cls._response_store_lock:
+                if cls._response_store is None:
+                    path = getattr(settings, 'POKEAPI_RESPONSE_STORE_PATH', None)
+                    cls._response_store = ResponseStore(
+                        path,
+                        max_bytes=getattr(settings, 'POKEAPI_RESPONSE_STORE_MAX_BYTES', 200 * 1024 * 1024),
+                    ) if path else False
+        return cls._response_store or None
+
+    @classmethod
+    def set_response_store(cls, store: Optional[ResponseStore]):
+        """Replace the response store; pass None to disable it."""
+        with cls._response_store_lock:
+            cls._response_store = store or False
+
+    @classmethod
+    def _record(cls, endpoint: str, event: str):
+        """Count a request event ('requests', 'retries', 'failures', ...) for the endpoint type."""
+        endpoint_type = endpoint.lstrip('/').split('?')[0].split('/')[0]
+        with cls._stats_lock:
+            cls._endpoint_stats[endpoint_type][event] += 1
+
+    @classmethod
+    def get_endpoint_stats(cls) -> Dict[str, Dict[str, int]]:
+        """Return request, retry, failure and response store counts per endpoint type."""
+        with cls._stats_lock:
+            return {endpoint_type: dict(counts) for endpoint_type, counts in cls._endpoint_stats.items()}
+
+    @classmethod
+    def reset_endpoint_stats(cls):
+        with cls._stats_lock:
+            cls._endpoint_stats.clear()
+
+    @classmethod
+    def _retry_delay(cls, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """
+        Seconds to wait before the next attempt.
+
+        A Retry-After header (seconds or HTTP date) wins; otherwise use
+        exponential backoff with full jitter.
+        """
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = (parsedate_to_datetime(retry_after) - timezone.now()).total_seconds()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(max(delay, 0.0), cls.BACKOFF_MAX)
+
+        return random.uniform(0, min(cls.BACKOFF_MAX, cls.BACKOFF_BASE * (2 ** attempt)))
+
+    @classmethod
+    def _get_with_retries(cls, url: str, endpoint: str,
+                          headers: Optional[Dict[str, str]] = None) -> requests.Response:
+        """GET the URL on the shared session, retrying transient failures."""
+        session = cls.get_session()
+        attempt = 0
+        while True:
+            if cls.rate_limiter:
+                cls.rate_limiter.acquire()
+            cls._record(endpoint, 'requests')
+
+            response = None
+            try:
+                response = session.get(url, headers=headers, timeout=cls.REQUEST_TIMEOUT)
+                if response.status_code not in cls.RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Error for url: {url}", response=response
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+
+            if attempt >= cls.MAX_RETRIES:
+                raise error
+
+            delay = cls._retry_delay(attempt, response)
+            cls._record(endpoint, 'retries')
+            logger.warning(f"PokeAPI request failed ({error}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            attempt += 1
+
+    @classmethod
+    def get_cache(cls):
+        return caches[cls.CACHE_ALIAS if cls.CACHE_ALIAS in settings.CACHES else 'default']
 
     @classmethod
     def _make_request(cls, endpoint: str) -> Optional[Dict]:
-        """Make a request to PokeAPI with error handling and caching."""
+        """
+        Make a request to PokeAPI with error handling, retries and caching.
+
+        Lookups go through the Django cache, then the persistent response
+        store. Stored responses older than RESPONSE_STORE_MAX_AGE are
+        revalidated with a conditional request instead of re-downloaded.
+        """
+        cache = cls.get_cache()
         cache_key = f"pokeapi_{endpoint.replace('/', '_')}"
         cached_data = cache.get(cache_key)
 
@@ -25,22 +243,60 @@ class PokeAPIService:
 
         try:
             url = f"{cls.BASE_URL}/{endpoint.lstrip('/')}"
+            store = cls.get_response_store()
+            stored = store.get(url) if store else None
+
+            if stored and stored.age < cls.RESPONSE_STORE_MAX_AGE:
+                cls._record(endpoint, 'stored')
+                cache.set(cache_key, stored.data, cls.CACHE_TIMEOUT)
+                return stored.data
+
             logger.info(f"Making PokeAPI request: {url}")
+            headers = stored.conditional_headers() if stored else None
+            response = cls._get_with_retries(url, endpoint, headers=headers)
 
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
+            if response.status_code == 304 and stored:
+                cls._record(endpoint, 'revalidated')
+                store.touch(url)
+                data = stored.data
+            else:
+                data = response.json()
+                if store:
+                    store.put(
+                        url,
+                        response.content,
+                        etag=response.headers.get('ETag', ''),
+                        last_modified=response.headers.get('Last-Modified', ''),
+                    )
 
-            data = response.json()
             cache.set(cache_key, data, cls.CACHE_TIMEOUT)
             return data
 
         except requests.exceptions.RequestException as e:
+            cls._record(endpoint, 'failures')
             logger.error(f"PokeAPI request failed: {e}")
             return None
         except Exception as e:
+            cls._record(endpoint, 'failures')
             logger.error(f"Unexpected error in PokeAPI request: {e}")
             return None
 
+    @staticmethod
+    def fetch_many(calls: List[Tuple[Callable[[Any], Optional[Dict]], Any]],
+                   concurrency: int = 1) -> List[Optional[Dict]]:
+        """
+        Run (fetch_method, argument) calls and return their results in order.
+
+        With concurrency > 1 the calls run on a bounded thread pool; the shared
+        rate limiter still applies to every request.
+        """
+        if concurrency <= 1:
+            return [fetch(argument) for fetch, argument in calls]
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='pokeapi') as executor:
+            futures = [executor.submit(fetch, argument) for fetch, argument in calls]
+            return [future.result() for future in futures]
+
     @classmethod
     def fetch_pokemon_list(cls, limit: int = 151, offset: int = 0) -> Optional[List[Dict]]:
         """Fetch a list of Pokemon from the API."""
@@ -78,6 +334,104 @@ class PokeAPIService:
         return cls._make_request(endpoint)
 
 
+class DataVersion:
+    """
+    Stamp identifying the currently synced Pokemon data.
+
+    Derived data (in-process indexes, cached responses) is keyed by this
+    stamp and rebuilt when it changes. Syncs call bump() once they commit,
+    which advances the DataRevision row; every process re-reads that row
+    once its cached stamp expires, so the default per-process cache still
+    sees another process's sync within CACHE_TIMEOUT. Before the first bump
+    the stamp falls back to a fingerprint of the Pokemon table.
+    """
+    CACHE_KEY = 'pokemon_data_version'
+    CACHE_TIMEOUT = 30  # seconds a process may serve a stamp without re-reading it
+    REVISION_PK = 1
+
+    @classmethod
+    def get(cls) -> str:
+        version = cache.get(cls.CACHE_KEY)
+        if version is None:
+            version = cls._stored() or cls._fingerprint()
+            cache.set(cls.CACHE_KEY, version, cls.CACHE_TIMEOUT)
+        return version
+
+    @classmethod
+    def bump(cls) -> str:
+        """Record that the data changed; call after a sync has committed."""
+        now = timezone.now()
+        with transaction.atomic():
+            updated = DataRevision.objects.filter(pk=cls.REVISION_PK).update(
+                revision=F('revision') + 1, bumped_at=now)
+            if not updated:
+                DataRevision.objects.get_or_create(
+                    pk=cls.REVISION_PK, defaults={'revision': 1, 'bumped_at': now})
+        version = cls._stored()
+        cache.set(cls.CACHE_KEY, version, cls.CACHE_TIMEOUT)
+        return version
+
+    @classmethod
+    def last_modified(cls, version: Optional[str] = None) -> Optional[datetime]:
+        """
+        When the data identified by version last changed: the bump time if it
+        was bumped, else the newest api_data_cached_at in the fingerprint.
+        """
+        version = version or cls.get()
+        fingerprint, _, bumped_at = version.partition('.')
+        try:
+            timestamp = int(bumped_at, 16) / 1e9 if bumped_at else int(fingerprint.rsplit('-', 1)[1])
+        except (IndexError, ValueError):
+            return None
+        return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc) if timestamp else None
+
+    @classmethod
+    def _stored(cls) -> Optional[str]:
+        row = DataRevision.objects.filter(pk=cls.REVISION_PK).values_list('revision', 'bumped_at').first()
+        if row is None or row[1] is None:
+            return None
+        revision, bumped_at = row
+        return f"r{revision}.{int(bumped_at.timestamp() * 1e9):x}"
+
+    @staticmethod
+    def _fingerprint() -> str:
+        summary = Pokemon.objects.aggregate(count=Count('pk'), latest=Max('api_data_cached_at'))
+        latest = summary['latest']
+        return f"{summary['count']}-{int(latest.timestamp()) if latest else 0}"
+
+
+class SyncBatchError(Exception):
+    """A sync batch could not be processed, e.g. its Pokemon list could not be fetched."""
+
+
+@dataclass
+class ParsedPokemon:
+    """Pokemon parsed from API payloads and ready to be written, keyed by pokedex_id."""
+    rows: Dict[int, Dict] = field(default_factory=dict)  # Pokemon field values
+    type_names: Dict[int, List[str]] = field(default_factory=dict)
+    ability_infos: Dict[int, List[Tuple[str, bool, int]]] = field(default_factory=dict)
+
+
+@dataclass
+class SyncStats:
+    """Counters describing the outcome of a sync run."""
+    seen: int = 0        # IDs returned by the list endpoint
+    skipped: int = 0     # still fresh, not fetched
+    fetched: int = 0
+    unchanged: int = 0   # fetched, but the data hash matched
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+    def add(self, other: 'SyncStats'):
+        """Add another run's (or batch's) counters to these."""
+        for name, value in other.as_dict().items():
+            setattr(self, name, getattr(self, name) + value)
+
+
 class PokemonDataManager:
     """Manages Pokemon data synchronization between API and database."""
 
@@ -111,109 +465,592 @@ class PokemonDataManager:
                 defaults={'color': color}
             )
 
+    # Attacking relations kept from a type's damage_relations
+    DAMAGE_RELATION_KEYS = ('double_damage_to', 'half_damage_to', 'no_damage_to')
+
+    @classmethod
+    def parse_damage_relations(cls, type_data: Dict) -> Dict[str, List[str]]:
+        """Extract the attacking damage relations of a PokeAPI type payload."""
+        relations = type_data.get('damage_relations') or {}
+        return {
+            key: sorted(entry['name'] for entry in relations.get(key, []))
+            for key in cls.DAMAGE_RELATION_KEYS
+        }
+
+    @classmethod
+    def write_type_relations(cls, type_data_by_name: Dict[str, Dict]) -> int:
+        """Store the damage relations of known types; returns the number of types updated."""
+        types_by_name = PokemonType.objects.in_bulk(list(type_data_by_name), field_name='name')
+        updated = []
+        for name, pokemon_type in types_by_name.items():
+            relations = cls.parse_damage_relations(type_data_by_name[name])
+            if pokemon_type.damage_relations != relations:
+                pokemon_type.damage_relations = relations
+                updated.append(pokemon_type)
+        PokemonType.objects.bulk_update(updated, ['damage_relations'])
+        logger.info(f"Updated damage relations of {len(updated)} types")
+        return len(updated)
+
+    @classmethod
+    def sync_type_relations(cls, concurrency: int = 1) -> int:
+        """Fetch every type's damage relations (one request per type) and store them."""
+        type_names = list(cls.TYPE_COLORS)
+        results = PokeAPIService.fetch_many(
+            [(PokeAPIService.fetch_type_data, type_name) for type_name in type_names],
+            concurrency=concurrency,
+        )
+        return cls.write_type_relations({name: data for name, data in zip(type_names, results) if data})
+
+    # Pokemon columns rewritten when an existing row is upserted
+    POKEMON_UPDATE_FIELDS = [
+        'name', 'height', 'weight', 'sprite_front', 'sprite_back', 'official_artwork',
+        'hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed', 'total_stats',
+        'base_experience', 'is_legendary', 'is_mythical', 'api_data_cached_at', 'api_data_hash',
+    ]
+
+    @classmethod
+    def parse_pokemon_fields(cls, pokemon_data: Dict, species_data: Optional[Dict] = None) -> Dict:
+        """Extract Pokemon model field values from API detail and species data."""
+        # Extract sprites
+        sprites = pokemon_data.get('sprites') or {}
+        other_sprites = sprites.get('other') or {}
+        official_artwork = (other_sprites.get('official-artwork') or {}).get('front_default')
+
+        # Extract stats
+        stats = {stat['stat']['name']: stat['base_stat'] for stat in pokemon_data['stats']}
+
+        # Determine if legendary/mythical from species data
+        is_legendary = species_data.get('is_legendary', False) if species_data else False
+        is_mythical = species_data.get('is_mythical', False) if species_data else False
+
+        fields = {
+            'pokedex_id': pokemon_data['id'],
+            'name': pokemon_data['name'],
+            'height': pokemon_data['height'],
+            'weight': pokemon_data['weight'],
+            'sprite_front': sprites.get('front_default'),
+            'sprite_back': sprites.get('back_default'),
+            'official_artwork': official_artwork,
+            'hp': stats.get('hp', 50),
+            'attack': stats.get('attack', 50),
+            'defense': stats.get('defense', 50),
+            'special_attack': stats.get('special-attack', 50),
+            'special_defense': stats.get('special-defense', 50),
+            'speed': stats.get('speed', 50),
+            'base_experience': pokemon_data.get('base_experience') or 0,
+            'is_legendary': is_legendary,
+            'is_mythical': is_mythical,
+            'api_data_cached_at': timezone.now(),
+        }
+        fields['total_stats'] = sum(
+            fields[stat] for stat in ('hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed')
+        )
+        return fields
+
+    @staticmethod
+    def parse_pokemon_links(pokemon_data: Dict) -> Tuple[List[str], List[Tuple[str, bool, int]]]:
+        """Extract type names and (ability name, is_hidden, slot) tuples from API detail data."""
+        type_names = [type_info['type']['name'] for type_info in pokemon_data.get('types', [])]
+        abilities = [
+            (
+                ability_info['ability']['name'],
+                ability_info.get('is_hidden', False),
+                ability_info.get('slot', 1),
+            )
+            for ability_info in pokemon_data.get('abilities', [])
+        ]
+        return type_names, abilities
+
+    @staticmethod
+    def compute_data_hash(fields: Dict, type_names: List[str], abilities: List[Tuple[str, bool, int]]) -> str:
+        """
+        Hash the data a sync would write for one Pokemon.
+
+        Only the values we store are hashed (not the raw payload), so upstream
+        changes to fields we ignore do not count as changes.
+        """
+        hashed_fields = {key: value for key, value in fields.items()
+                         if key not in ('api_data_cached_at', 'api_data_hash', 'total_stats')}
+        payload = json.dumps([hashed_fields, type_names, abilities], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
     @classmethod
     def create_or_update_pokemon(cls, pokemon_data: Dict, species_data: Optional[Dict] = None) -> Optional[Pokemon]:
         """Create or update a Pokemon record from API data."""
         try:
-            # Extract basic info
-            pokedex_id = pokemon_data['id']
-            name = pokemon_data['name']
-            height = pokemon_data['height']
-            weight = pokemon_data['weight']
-            base_experience = pokemon_data.get('base_experience', 0)
-
-            # Extract sprites
-            sprites = pokemon_data.get('sprites', {})
-            sprite_front = sprites.get('front_default')
-            sprite_back = sprites.get('back_default')
-            official_artwork = sprites.get('other', {}).get('official-artwork', {}).get('front_default')
-
-            # Extract stats
-            stats = {stat['stat']['name']: stat['base_stat'] for stat in pokemon_data['stats']}
-
-            # Determine if legendary/mythical from species data
-            is_legendary = species_data.get('is_legendary', False) if species_data else False
-            is_mythical = species_data.get('is_mythical', False) if species_data else False
-
-            # Create or update Pokemon
-            pokemon, created = Pokemon.objects.update_or_create(
-                pokedex_id=pokedex_id,
-                defaults={
-                    'name': name,
-                    'height': height,
-                    'weight': weight,
-                    'sprite_front': sprite_front,
-                    'sprite_back': sprite_back,
-                    'official_artwork': official_artwork,
-                    'hp': stats.get('hp', 50),
-                    'attack': stats.get('attack', 50),
-                    'defense': stats.get('defense', 50),
-                    'special_attack': stats.get('special-attack', 50),
-                    'special_defense': stats.get('special-defense', 50),
-                    'speed': stats.get('speed', 50),
-                    'base_experience': base_experience,
-                    'is_legendary': is_legendary,
-                    'is_mythical': is_mythical,
-                    'api_data_cached_at': timezone.now(),
-                }
+            synced = cls.bulk_upsert_pokemon([(pokemon_data, species_data)])
+            return synced[0] if synced else None
+
+        except Exception as e:
+            logger.error(f"Error creating/updating Pokemon: {e}")
+            return None
+
+    @classmethod
+    def bulk_upsert_pokemon(cls, payloads: List[Tuple[Dict, Optional[Dict]]],
+                            skip_unchanged: bool = False,
+                            stats: Optional['SyncStats'] = None) -> List[Pokemon]:
+        """
+        Create or update many Pokemon from (detail, species) API payloads.
+
+        Uses a fixed number of statements per call regardless of batch size:
+        one upsert for the Pokemon rows, preloaded type and ability lookups,
+        and bulk replacement of the type and ability link rows. Payloads that
+        cannot be parsed are logged and skipped.
+
+        With skip_unchanged, rows whose stored data hash matches the payload
+        only get their api_data_cached_at refreshed. Returns the written rows.
+        """
+        return cls.write_parsed_pokemon(cls.parse_pokemon_payloads(payloads, stats),
+                                        skip_unchanged=skip_unchanged, stats=stats)
+
+    @classmethod
+    def parse_pokemon_payloads(cls, payloads: List[Tuple[Dict, Optional[Dict]]],
+                               stats: Optional['SyncStats'] = None) -> 'ParsedPokemon':
+        """Parse and hash (detail, species) payloads without touching the database."""
+        parsed = ParsedPokemon()
+        for pokemon_data, species_data in payloads:
+            try:
+                fields = cls.parse_pokemon_fields(pokemon_data, species_data)
+                links = cls.parse_pokemon_links(pokemon_data)
+            except (KeyError, TypeError) as e:
+                logger.error(f"Error parsing Pokemon data: {e}")
+                if stats:
+                    stats.failed += 1
+                continue
+
+            pokedex_id = fields['pokedex_id']
+            fields['api_data_hash'] = cls.compute_data_hash(fields, *links)
+            parsed.rows[pokedex_id] = fields
+            parsed.type_names[pokedex_id], parsed.ability_infos[pokedex_id] = links
+        return parsed
+
+    @classmethod
+    def write_parsed_pokemon(cls, parsed: 'ParsedPokemon', skip_unchanged: bool = False,
+                             stats: Optional['SyncStats'] = None) -> List[Pokemon]:
+        """Write parsed Pokemon; see bulk_upsert_pokemon."""
+        rows = dict(parsed.rows)
+        type_names = dict(parsed.type_names)
+        ability_infos = dict(parsed.ability_infos)
+        if not rows:
+            return []
+
+        existing_hashes = {}
+        if skip_unchanged or stats:
+            existing_hashes = dict(
+                Pokemon.objects.filter(pokedex_id__in=list(rows)).values_list('pokedex_id', 'api_data_hash')
+            )
+
+        if skip_unchanged:
+            unchanged = [pokedex_id for pokedex_id, fields in rows.items()
+                         if existing_hashes.get(pokedex_id) == fields['api_data_hash']]
+            if unchanged:
+                Pokemon.objects.filter(pokedex_id__in=unchanged).update(api_data_cached_at=timezone.now())
+                for pokedex_id in unchanged:
+                    del rows[pokedex_id], type_names[pokedex_id], ability_infos[pokedex_id]
+            if stats:
+                stats.unchanged += len(unchanged)
+            if not rows:
+                return []
+
+        if stats:
+            updated = sum(1 for pokedex_id in rows if pokedex_id in existing_hashes)
+            stats.updated += updated
+            stats.created += len(rows) - updated
+
+        with transaction.atomic():
+            Pokemon.objects.bulk_create(
+                [Pokemon(**fields) for fields in rows.values()],
+                update_conflicts=True,
+                unique_fields=['pokedex_id'],
+                update_fields=cls.POKEMON_UPDATE_FIELDS,
             )
+            pokemon_by_dex_id = Pokemon.objects.in_bulk(list(rows), field_name='pokedex_id')
+            pokemon_pks = [pokemon.pk for pokemon in pokemon_by_dex_id.values()]
 
             # Handle types
-            pokemon.types.clear()
-            for type_info in pokemon_data.get('types', []):
-                type_name = type_info['type']['name']
-                pokemon_type, _ = PokemonType.objects.get_or_create(
-                    name=type_name,
-                    defaults={'color': cls.TYPE_COLORS.get(type_name, '#000000')}
-                )
-                pokemon.types.add(pokemon_type)
+            types_by_name = cls._get_or_create_types(
+                {name for names in type_names.values() for name in names}
+            )
+            TypeLink = Pokemon.types.through
+            TypeLink.objects.filter(pokemon_id__in=pokemon_pks).delete()
+            TypeLink.objects.bulk_create([
+                TypeLink(pokemon_id=pokemon_by_dex_id[pokedex_id].pk, pokemontype_id=types_by_name[name].pk)
+                for pokedex_id, names in type_names.items()
+                for name in dict.fromkeys(names)
+            ])
 
             # Handle abilities
-            PokemonAbilityLink.objects.filter(pokemon=pokemon).delete()
-            for ability_info in pokemon_data.get('abilities', []):
-                ability_name = ability_info['ability']['name']
-                is_hidden = ability_info.get('is_hidden', False)
-                slot = ability_info.get('slot', 1)
-
-                ability, _ = PokemonAbility.objects.get_or_create(
-                    name=ability_name,
-                    defaults={'is_hidden': is_hidden}
-                )
+            abilities_by_name = cls._get_or_create_abilities(
+                {name: is_hidden for infos in ability_infos.values() for name, is_hidden, _ in infos}
+            )
+            PokemonAbilityLink.objects.filter(pokemon_id__in=pokemon_pks).delete()
+            ability_links = []
+            for pokedex_id, infos in ability_infos.items():
+                seen = set()
+                for name, is_hidden, slot in infos:
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    ability_links.append(PokemonAbilityLink(
+                        pokemon=pokemon_by_dex_id[pokedex_id],
+                        ability=abilities_by_name[name],
+                        is_hidden=is_hidden,
+                        slot=slot,
+                    ))
+            PokemonAbilityLink.objects.bulk_create(ability_links)
 
-                PokemonAbilityLink.objects.create(
-                    pokemon=pokemon,
-                    ability=ability,
-                    is_hidden=is_hidden,
-                    slot=slot
-                )
+        logger.info(f"Upserted {len(rows)} Pokemon")
+        return [pokemon_by_dex_id[pokedex_id] for pokedex_id in rows]
 
-            logger.info(f"{'Created' if created else 'Updated'} Pokemon: {pokemon}")
-            return pokemon
+    @classmethod
+    def _get_or_create_types(cls, names) -> Dict[str, PokemonType]:
+        """Return {name: PokemonType} for the given names, creating missing types."""
+        types_by_name = PokemonType.objects.in_bulk(list(names), field_name='name')
+        missing = set(names) - set(types_by_name)
+        if missing:
+            PokemonType.objects.bulk_create(
+                [PokemonType(name=name, color=cls.TYPE_COLORS.get(name, '#000000')) for name in missing],
+                ignore_conflicts=True,
+            )
+            types_by_name.update(PokemonType.objects.in_bulk(list(missing), field_name='name'))
+        return types_by_name
 
-        except Exception as e:
-            logger.error(f"Error creating/updating Pokemon: {e}")
+    @classmethod
+    def _get_or_create_abilities(cls, hidden_by_name: Dict[str, bool]) -> Dict[str, PokemonAbility]:
+        """Return {name: PokemonAbility} for the given names, creating missing abilities."""
+        abilities_by_name = PokemonAbility.objects.in_bulk(list(hidden_by_name), field_name='name')
+        missing = set(hidden_by_name) - set(abilities_by_name)
+        if missing:
+            PokemonAbility.objects.bulk_create(
+                [PokemonAbility(name=name, is_hidden=hidden_by_name[name]) for name in missing],
+                ignore_conflicts=True,
+            )
+            abilities_by_name.update(PokemonAbility.objects.in_bulk(list(missing), field_name='name'))
+        return abilities_by_name
+
+    @classmethod
+    def fetch_pokemon_payloads(cls, pokemon_ids: Iterable[int],
+                               concurrency: int = 1) -> Dict[int, Tuple[Optional[Dict], Optional[Dict]]]:
+        """
+        Fetch detail and species data for the given Pokemon IDs.
+
+        With concurrency > 1 every detail and species request of the batch is
+        issued in parallel on a bounded thread pool; the shared rate limiter
+        of PokeAPIService still applies. Returns {pokemon_id: (detail, species)}.
+        """
+        pokemon_ids = list(pokemon_ids)
+        results = PokeAPIService.fetch_many(
+            [(PokeAPIService.fetch_pokemon_detail, pokemon_id) for pokemon_id in pokemon_ids] +
+            [(PokeAPIService.fetch_pokemon_species, pokemon_id) for pokemon_id in pokemon_ids],
+            concurrency=concurrency,
+        )
+        return {
+            pokemon_id: (results[i], results[len(pokemon_ids) + i])
+            for i, pokemon_id in enumerate(pokemon_ids)
+        }
+
+    @staticmethod
+    def _pokemon_ids_from_list(pokemon_list: Dict) -> List[int]:
+        """Extract Pokemon IDs from the URLs of a list endpoint response."""
+        return [
+            int(pokemon_info['url'].rstrip('/').split('/')[-1])
+            for pokemon_info in pokemon_list.get('results', [])
+        ]
+
+    @staticmethod
+    def _id_from_url(url: Optional[str]) -> Optional[int]:
+        """Extract the trailing numeric ID from a PokeAPI resource URL."""
+        if not url:
+            return None
+        last_part = url.rstrip('/').split('/')[-1]
+        return int(last_part) if last_part.isdigit() else None
+
+    @classmethod
+    def evolution_chain_id(cls, species_data: Optional[Dict]) -> Optional[int]:
+        """Return the evolution chain ID referenced by species data."""
+        if not species_data:
             return None
+        return cls._id_from_url((species_data.get('evolution_chain') or {}).get('url'))
+
+    @classmethod
+    def flatten_evolution_chain(cls, chain_data: Dict) -> Tuple[Optional[int], List[Dict]]:
+        """
+        Flatten the recursive evolves_to tree of an evolution-chain payload.
+
+        Returns the base species ID and a list of edges with from_id, to_id,
+        trigger, min_level, item and condition. Species IDs match the
+        pokedex_id of the default form.
+        """
+        root = chain_data.get('chain') or {}
+        base_id = cls._id_from_url((root.get('species') or {}).get('url'))
+        edges = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            from_id = cls._id_from_url((node.get('species') or {}).get('url'))
+            for child in node.get('evolves_to') or []:
+                to_id = cls._id_from_url((child.get('species') or {}).get('url'))
+                details = (child.get('evolution_details') or [{}])[0]
+                if from_id and to_id:
+                    edges.append({'from_id': from_id, 'to_id': to_id, **cls._parse_evolution_details(details)})
+                stack.append(child)
+        return base_id, edges
+
+    @staticmethod
+    def _parse_evolution_details(details: Dict) -> Dict:
+        """Extract trigger, min_level, item and a readable condition from evolution_details."""
+        def value_name(value):
+            return value.get('name', '') if isinstance(value, dict) else str(value)
+
+        conditions = [
+            f"{key.replace('_', ' ')}: {value_name(value)}"
+            for key, value in sorted(details.items())
+            if key not in ('trigger', 'min_level', 'item') and value not in (None, '', False, [])
+        ]
+        return {
+            'trigger': value_name(details.get('trigger') or {}) or 'unknown',
+            'min_level': details.get('min_level'),
+            'item': value_name(details.get('item') or {}),
+            'condition': ', '.join(conditions)[:200],
+        }
+
+    @classmethod
+    def bulk_write_evolution_chains(cls, chains: Dict[int, Dict]) -> int:
+        """
+        Write evolution-chain payloads ({chain_id: payload}) in bulk.
+
+        Existing edges of the given chains are replaced. Chains whose base
+        Pokemon is not in the database are skipped, as are edges to Pokemon
+        that are missing. Returns the number of chains written.
+        """
+        flattened = {chain_id: cls.flatten_evolution_chain(data) for chain_id, data in chains.items()}
+        species_ids = {base_id for base_id, _ in flattened.values() if base_id}
+        species_ids.update(
+            species_id for _, edges in flattened.values() for edge in edges
+            for species_id in (edge['from_id'], edge['to_id'])
+        )
+        pokemon_by_dex_id = Pokemon.objects.in_bulk(list(species_ids), field_name='pokedex_id')
+
+        writable = {}
+        for chain_id, (base_id, edges) in flattened.items():
+            if base_id in pokemon_by_dex_id:
+                writable[chain_id] = edges
+            else:
+                logger.warning(f"Skipping evolution chain {chain_id}: base Pokemon {base_id} is not synced")
+        if not writable:
+            return 0
+
+        with transaction.atomic():
+            EvolutionChain.objects.bulk_create(
+                [
+                    EvolutionChain(chain_id=chain_id, base_pokemon=pokemon_by_dex_id[flattened[chain_id][0]])
+                    for chain_id in writable
+                ],
+                update_conflicts=True,
+                unique_fields=['chain_id'],
+                update_fields=['base_pokemon'],
+            )
+            chain_by_id = EvolutionChain.objects.in_bulk(list(writable), field_name='chain_id')
+
+            Evolution.objects.filter(chain__chain_id__in=list(writable)).delete()
+            Evolution.objects.bulk_create([
+                Evolution(
+                    chain=chain_by_id[chain_id],
+                    from_pokemon=pokemon_by_dex_id[edge['from_id']],
+                    to_pokemon=pokemon_by_dex_id[edge['to_id']],
+                    trigger=edge['trigger'],
+                    min_level=edge['min_level'],
+                    item=edge['item'],
+                    condition=edge['condition'],
+                )
+                for chain_id, edges in writable.items()
+                for edge in edges
+                if edge['from_id'] in pokemon_by_dex_id and edge['to_id'] in pokemon_by_dex_id
+            ])
+
+            # Materialize each chain's graph and point its members at it, so
+            # the detail page gets its evolutions from the chain row alone
+            members = []
+            for chain_id, chain in chain_by_id.items():
+                base_id, edges = flattened[chain_id]
+                chain.graph = cls.build_evolution_graph(base_id, edges, pokemon_by_dex_id)
+                for pokedex_id in chain.graph['nodes']:
+                    pokemon = pokemon_by_dex_id[pokedex_id]
+                    pokemon.evolution_chain = chain
+                    members.append(pokemon)
+            EvolutionChain.objects.bulk_update(list(chain_by_id.values()), ['graph'])
+            # Species no longer in a rewritten chain stop pointing at it
+            Pokemon.objects.filter(evolution_chain__in=list(chain_by_id.values())).exclude(
+                pk__in=[pokemon.pk for pokemon in members]
+            ).update(evolution_chain=None)
+            Pokemon.objects.bulk_update(members, ['evolution_chain'])
+
+        return len(writable)
+
+    @staticmethod
+    def build_evolution_graph(base_id: int, edges: List[Dict], pokemon_by_dex_id: Dict[int, Pokemon]) -> Dict:
+        """
+        Serialize a flattened chain into the graph stored on EvolutionChain.graph.
+
+        Nodes are pokedex IDs only; names and sprites are joined when the
+        graph is read, so they never go stale when a member is re-synced.
+        """
+        nodes = []
+        for pokedex_id in [base_id] + [edge[key] for edge in edges for key in ('from_id', 'to_id')]:
+            if pokedex_id in pokemon_by_dex_id and pokedex_id not in nodes:
+                nodes.append(pokedex_id)
+        return {
+            'base': base_id,
+            'nodes': nodes,
+            'edges': [
+                {
+                    'from': edge['from_id'],
+                    'to': edge['to_id'],
+                    'trigger': edge['trigger'],
+                    'min_level': edge['min_level'],
+                    'item': edge['item'],
+                    'condition': edge['condition'],
+                }
+                for edge in edges
+                if edge['from_id'] in pokemon_by_dex_id and edge['to_id'] in pokemon_by_dex_id
+            ],
+        }
+
+    @classmethod
+    def sync_evolution_chains(cls, chain_ids: Iterable[int], concurrency: int = 1,
+                              batch_size: int = 100) -> int:
+        """
+        Fetch and write the given evolution chains.
+
+        Each distinct chain is fetched once, however many species share it,
+        and chains are written batch_size at a time. Returns the number of
+        chains written.
+        """
+        chain_ids = sorted(set(chain_ids))
+        written = 0
+        for start in range(0, len(chain_ids), batch_size):
+            batch_ids = chain_ids[start:start + batch_size]
+            results = PokeAPIService.fetch_many(
+                [(PokeAPIService.fetch_evolution_chain, chain_id) for chain_id in batch_ids],
+                concurrency=concurrency,
+            )
+            written += cls.bulk_write_evolution_chains({
+                chain_id: data for chain_id, data in zip(batch_ids, results) if data
+            })
+        return written
+
+    @staticmethod
+    def parse_ability_text(ability_data: Dict, language: str = 'en') -> Tuple[str, str]:
+        """Return an ability's (flavour text, effect) in the given language, '' where missing."""
+        def in_language(entries):
+            return [entry for entry in entries or [] if (entry.get('language') or {}).get('name') == language]
+
+        # Later flavour texts come from newer games; all of them contain hard line breaks
+        flavor_texts = in_language(ability_data.get('flavor_text_entries'))
+        effects = in_language(ability_data.get('effect_entries'))
+        description = ' '.join(flavor_texts[-1].get('flavor_text', '').split()) if flavor_texts else ''
+        effect = ' '.join(effects[-1].get('effect', '').split()) if effects else ''
+        return description, effect
+
+    @classmethod
+    def sync_ability_descriptions(cls, concurrency: int = 1, batch_size: int = 100) -> Tuple[int, int]:
+        """
+        Fetch the text of abilities whose text has not been fetched yet.
+
+        Each distinct ability is fetched once however many Pokemon share it,
+        and each batch is written as soon as it has been fetched, so an
+        interrupted run resumes with the abilities not yet fetched. An
+        ability without English text is still marked as synced; only failed
+        fetches are retried. Returns (updated, failed).
+        """
+        names = list(
+            PokemonAbility.objects.filter(descriptions_synced_at__isnull=True)
+            .order_by('name').values_list('name', flat=True)
+        )
+        updated = failed = 0
+        for start in range(0, len(names), batch_size):
+            batch_names = names[start:start + batch_size]
+            results = PokeAPIService.fetch_many(
+                [(PokeAPIService.fetch_ability_data, name) for name in batch_names],
+                concurrency=concurrency,
+            )
+            abilities_by_name = PokemonAbility.objects.in_bulk(batch_names, field_name='name')
+            synced_at = timezone.now()
+            changed = []
+            for name, ability_data in zip(batch_names, results):
+                ability = abilities_by_name.get(name)
+                if not ability_data:
+                    failed += 1
+                    continue
+                if ability is not None:
+                    ability.description, ability.effect = cls.parse_ability_text(ability_data)
+                    ability.descriptions_synced_at = synced_at
+                    changed.append(ability)
+            PokemonAbility.objects.bulk_update(changed, ['description', 'effect', 'descriptions_synced_at'])
+            updated += len(changed)
+            logger.info(f"Wrote text of {updated} abilities ({start + len(batch_names)}/{len(names)} fetched)")
+        return updated, failed
 
     @classmethod
-    def sync_pokemon_batch(cls, limit: int = 151, offset: int = 0) -> List[Pokemon]:
-        """Sync a batch of Pokemon from the API."""
+    def sync_pokemon_batch(cls, limit: int = 151, offset: int = 0, concurrency: int = 1,
+                           stale_before: Optional[datetime] = None,
+                           stats: Optional[SyncStats] = None,
+                           evolution_chain_ids: Optional[Set[int]] = None,
+                           failed_ids: Optional[List[int]] = None) -> List[Pokemon]:
+        """
+        Sync a batch of Pokemon from the API.
+
+        All network requests for the batch complete before anything is written,
+        so the database work is not interleaved with network waits.
+
+        With stale_before, Pokemon cached at or after that time are skipped
+        without being fetched, and fetched Pokemon whose data is unchanged are
+        not rewritten. Evolution chain IDs referenced by the fetched species
+        are added to evolution_chain_ids, and IDs that could not be fetched to
+        failed_ids. Returns the created or updated Pokemon.
+        """
+        stats = stats if stats is not None else SyncStats()
         pokemon_list = PokeAPIService.fetch_pokemon_list(limit, offset)
+        if pokemon_list is None:
+            raise SyncBatchError(f"Could not fetch the Pokemon list at offset {offset}")
         if not pokemon_list:
             return []
 
-        synced_pokemon = []
-        for pokemon_info in pokemon_list.get('results', []):
-            # Extract ID from URL
-            pokemon_id = int(pokemon_info['url'].rstrip('/').split('/')[-1])
+        pokemon_ids = cls._pokemon_ids_from_list(pokemon_list)
+        stats.seen += len(pokemon_ids)
+        return cls.sync_pokemon_ids(
+            pokemon_ids, concurrency=concurrency, stale_before=stale_before, stats=stats,
+            evolution_chain_ids=evolution_chain_ids, failed_ids=failed_ids,
+        )
 
-            # Fetch detailed data
-            pokemon_data = PokeAPIService.fetch_pokemon_detail(pokemon_id)
-            species_data = PokeAPIService.fetch_pokemon_species(pokemon_id)
+    @classmethod
+    def sync_pokemon_ids(cls, pokemon_ids: List[int], concurrency: int = 1,
+                         stale_before: Optional[datetime] = None,
+                         stats: Optional[SyncStats] = None,
+                         evolution_chain_ids: Optional[Set[int]] = None,
+                         failed_ids: Optional[List[int]] = None) -> List[Pokemon]:
+        """Fetch and write the given Pokemon; see sync_pokemon_batch."""
+        stats = stats if stats is not None else SyncStats()
+        if stale_before is not None:
+            fresh_ids = set(
+                Pokemon.objects.filter(pokedex_id__in=pokemon_ids, api_data_cached_at__gte=stale_before)
+                .values_list('pokedex_id', flat=True)
+            )
+            pokemon_ids = [pokemon_id for pokemon_id in pokemon_ids if pokemon_id not in fresh_ids]
+            stats.skipped += len(fresh_ids)
+
+        payloads = cls.fetch_pokemon_payloads(pokemon_ids, concurrency=concurrency)
 
-            if pokemon_data:
-                pokemon = cls.create_or_update_pokemon(pokemon_data, species_data)
-                if pokemon:
-                    synced_pokemon.append(pokemon)
+        fetched = [payloads[pokemon_id] for pokemon_id in pokemon_ids if payloads[pokemon_id][0]]
+        stats.fetched += len(fetched)
+        stats.failed += len(pokemon_ids) - len(fetched)
+        if failed_ids is not None:
+            failed_ids.extend(pokemon_id for pokemon_id in pokemon_ids if not payloads[pokemon_id][0])
+
+        if evolution_chain_ids is not None:
+            evolution_chain_ids.update(
+                chain_id for chain_id in (cls.evolution_chain_id(species) for _, species in fetched) if chain_id
+            )
 
-        return synced_pokemon
+        return cls.bulk_upsert_pokemon(fetched, skip_unchanged=stale_before is not None, stats=stats)
 
@@ -0,0 +1,314 @@
+# pokemon/stat_index.py
+import logging
+import random
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Pokemon, GENERATION_RANGES
+from .services import DataVersion
+
+logger = logging.getLogger(__name__)
+
+STAT_COLUMNS = ('hp', 'attack', 'defense', 'special_attack', 'special_defense', 'speed', 'total_stats')
+SORT_COLUMNS = ('pokedex_id', 'name') + STAT_COLUMNS
+
+
+def _bitset(flags: Iterable[bool]) -> int:
+    """Pack per-row booleans into an int with bit i set for row i."""
+    bits = ''.join('1' if flag else '0' for flag in flags)[::-1]
+    return int(bits, 2) if bits else 0
+
+
+class StatIndex:
+    """
+    Process-local columnar copy of the Pokemon table for filtering and sorting.
+
+    The dex is small, so IDs, stats, flags and type memberships are held in
+    compact arrays ordered by pokedex_id. Categorical filters are int bitsets
+    (one bit per row) combined with &, and each sortable column has a
+    precomputed row order, so a page of results costs a scan of the sorted
+    order at most; only the rows shown are then loaded from the database.
+    """
+
+    def __init__(self, version: str, rows: Sequence[Tuple], pokemon_types: Sequence[Tuple[int, str]]):
+        self.version = version
+        self.size = len(rows)
+        columns = zip(*rows) if rows else [()] * (6 + len(STAT_COLUMNS))
+        pks, pokedex_ids, names, sprites, *stats, legendary, mythical = columns
+
+        self.pks = array('q', pks)
+        self.pokedex_ids = array('l', pokedex_ids)
+        self.names = [name.lower() for name in names]
+        self.sprites = list(sprites)
+        self.columns = {column: array('H', values) for column, values in zip(STAT_COLUMNS, stats)}
+        self.position_by_pk = {pk: position for position, pk in enumerate(self.pks)}
+
+        # Type membership: a bit per type for every row, and a row bitset per type
+        type_names = sorted({type_name for _, type_name in pokemon_types})
+        self.type_bits = {type_name: 1 << bit for bit, type_name in enumerate(type_names)}
+        self.type_masks = array('L', [0] * self.size)
+        self.types = [() for _ in range(self.size)]  # type names per row, in slot order
+        for pokemon_pk, type_name in pokemon_types:
+            position = self.position_by_pk.get(pokemon_pk)
+            if position is not None:
+                self.type_masks[position] |= self.type_bits[type_name]
+                self.types[position] += (type_name,)
+        self._type_rows = {
+            type_name: _bitset(mask & bit for mask in self.type_masks)
+            for type_name, bit in self.type_bits.items()
+        }
+
+        self._all_rows = (1 << self.size) - 1
+        self._legendary_rows = _bitset(legendary)
+        self._mythical_rows = _bitset(mythical)
+
+        # Pokedex IDs matching each filter combination asked for by random_pokedex_id
+        self._pick_pools: Dict[Tuple, array] = {}
+        self._pick_pools_lock = threading.Lock()
+
+        # Row order of every sortable column, ascending and descending, ties
+        # broken by ascending pokedex_id either way (as the database path does)
+        self._orders = {'pokedex_id': list(range(self.size))}
+        self._descending_orders = {'pokedex_id': self._orders['pokedex_id'][::-1]}
+        for column, values in [('name', self.names), *self.columns.items()]:
+            # Sorting is stable, also with reverse=True, and rows are in pokedex_id order
+            self._orders[column] = sorted(range(self.size), key=values.__getitem__)
+            self._descending_orders[column] = sorted(range(self.size), key=values.__getitem__, reverse=True)
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'StatIndex':
+        """Load the index from the database (two queries)."""
+        version = version or DataVersion.get()
+        rows = list(
+            Pokemon.objects.order_by('pokedex_id').values_list(
+                'pk', 'pokedex_id', 'name', 'sprite_front', *STAT_COLUMNS, 'is_legendary', 'is_mythical'
+            )
+        )
+        pokemon_types = list(
+            Pokemon.types.through.objects.order_by('pk').values_list('pokemon_id', 'pokemontype__name')
+        )
+        logger.info(f"Built stat index for {len(rows)} Pokemon (data version {version})")
+        return cls(version, rows, pokemon_types)
+
+    def filter(self, type_name: Optional[str] = None, generation: Optional[int] = None,
+               legendary: Optional[bool] = None, mythical: Optional[bool] = None,
+               ranges: Optional[Dict[str, Tuple[Optional[int], Optional[int]]]] = None,
+               search: Optional[str] = None) -> int:
+        """
+        Return the bitset of rows matching every given filter.
+
+        ranges maps stat columns to inclusive (min, max) bounds, either of
+        which may be None. search matches name or pokedex_id substrings, like
+        the list view's icontains search.
+        """
+        rows = self._all_rows
+        if type_name:
+            rows &= self._type_rows.get(type_name, 0)
+        if generation is not None:
+            low, high = GENERATION_RANGES.get(generation, (0, -1))
+            start = bisect_left(self.pokedex_ids, low)
+            end = bisect_right(self.pokedex_ids, high)
+            rows &= ((1 << end) - 1) ^ ((1 << start) - 1)
+        if legendary is not None:
+            rows &= self._legendary_rows if legendary else ~self._legendary_rows
+        if mythical is not None:
+            rows &= self._mythical_rows if mythical else ~self._mythical_rows
+        for column, (low, high) in (ranges or {}).items():
+            values = self.columns[column]
+            low = 0 if low is None else low
+            high = 0xFFFF if high is None else high
+            rows &= _bitset(low <= value <= high for value in values)
+        if search:
+            search = search.lower()
+            rows &= _bitset(
+                search in name or search in str(pokedex_id)
+                for name, pokedex_id in zip(self.names, self.pokedex_ids)
+            )
+        return rows & self._all_rows
+
+    def position_of(self, pokedex_id: int) -> Optional[int]:
+        position = bisect_left(self.pokedex_ids, pokedex_id)
+        if position < self.size and self.pokedex_ids[position] == pokedex_id:
+            return position
+        return None
+
+    def rows_for_pokedex_ids(self, pokedex_ids: Iterable[int]) -> int:
+        """Return the bitset of rows with the given pokedex IDs."""
+        rows = 0
+        for pokedex_id in pokedex_ids:
+            position = self.position_of(pokedex_id)
+            if position is not None:
+                rows |= 1 << position
+        return rows
+
+    def stats_row(self, position: int) -> Dict:
+        row = {'id': self.pokedex_ids[position], 'name': self.names[position]}
+        for column in STAT_COLUMNS:
+            row[column] = self.columns[column][position]
+        row['types'] = list(self.types[position])
+        return row
+
+    def order(self, rows: int, sort_keys: Sequence[Tuple[str, bool]] = (('pokedex_id', False),)) -> List[int]:
+        """Return positions of the selected rows, sorted by (column, descending) keys."""
+        selected = bin(rows)[2:][::-1]
+        selected += '0' * (self.size - len(selected))
+
+        column, descending = sort_keys[0] if sort_keys else ('pokedex_id', False)
+        order = (self._descending_orders if descending else self._orders)[column]
+        positions = [position for position in order if selected[position] == '1']
+
+        # Further keys: stable sorts from the least significant key up
+        if len(sort_keys) > 1:
+            for column, descending in reversed(sort_keys):
+                values = self.names if column == 'name' else (
+                    self.pokedex_ids if column == 'pokedex_id' else self.columns[column])
+                positions.sort(key=values.__getitem__, reverse=descending)
+        return positions
+
+    def count(self, rows: int) -> int:
+        return bin(rows).count('1')
+
+    def random_pokedex_id(self, type_name: Optional[str] = None, generation: Optional[int] = None,
+                          legendary: Optional[bool] = None, mythical: Optional[bool] = None) -> Optional[int]:
+        """
+        Pick a random pokedex_id among the rows matching the filters.
+
+        Unfiltered picks index the ID column directly; filtered ones draw from
+        a pool of matching IDs built on first use and kept with the index, so
+        every later pick with the same filters is constant time. Only known
+        types and generations get a pool, and empty pools are not kept, so
+        the pools stay bounded whatever filters are requested.
+        """
+        if not any(value is not None for value in (type_name, generation, legendary, mythical)):
+            return self.pokedex_ids[random.randrange(self.size)] if self.size else None
+        if type_name and type_name not in self.type_bits:
+            return None
+        if generation is not None and generation not in GENERATION_RANGES:
+            return None
+
+        key = (type_name, generation, legendary, mythical)
+        pool = self._pick_pools.get(key)
+        if pool is None:
+            rows = self.filter(type_name=type_name, generation=generation, legendary=legendary, mythical=mythical)
+            pool = array('l', (self.pokedex_ids[position] for position in self.order(rows)))
+            if not pool:
+                return None
+            with self._pick_pools_lock:
+                self._pick_pools[key] = pool
+        return pool[random.randrange(len(pool))]
+
+
+class IndexedPokemonList:
+    """
+    Sequence of index positions that loads Pokemon from the database lazily.
+
+    len() and count() answer from the index; slicing (as Paginator does)
+    hydrates only the requested rows, in index order, from `queryset`.
+    """
+
+    def __init__(self, index: StatIndex, positions: List[int], queryset=None):
+        self.index = index
+        self.positions = positions
+        self.queryset = queryset if queryset is not None else Pokemon.objects.all()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def count(self):
+        return len(self.positions)
+
+    def pks(self, key=slice(None)) -> List[int]:
+        return [self.index.pks[position] for position in self.positions[key]]
+
+    def __getitem__(self, key):
+        if isinstance(key, int):
+            return self[key:key + 1 if key != -1 else None][0]
+        pks = self.pks(key)
+        pokemon_by_pk = self.queryset.in_bulk(pks)
+        return [pokemon_by_pk[pk] for pk in pks if pk in pokemon_by_pk]
+
+    def __iter__(self):
+        return iter(self[:])
+
+
+_index: Optional[StatIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_stat_index() -> Optional[StatIndex]:
+    """
+    Return the process-wide index, rebuilding it if the data version changed.
+
+    Returns None when disabled with settings.POKEMON_STAT_INDEX = False.
+    """
+    global _index
+    if not getattr(settings, 'POKEMON_STAT_INDEX', True):
+        return None
+
+    version = DataVersion.get()
+    if _index is None or _index.version != version:
+        with _index_lock:
+            if _index is None or _index.version != version:
+                _index = StatIndex.build(version)
+    return _index
+
+
+def random_pokedex_id(type_name: Optional[str] = None, generation: Optional[int] = None,
+                      legendary: Optional[bool] = None, mythical: Optional[bool] = None) -> Optional[int]:
+    """
+    Return a random pokedex_id matching the filters, or None if nothing matches.
+
+    Uses the stat index when enabled; otherwise the matching IDs are cached
+    per data version, so the table is queried once per filter combination
+    rather than sorted randomly on every pick.
+    """
+    index = get_stat_index()
+    if index is not None:
+        return index.random_pokedex_id(type_name, generation, legendary, mythical)
+
+    if generation is not None and generation not in GENERATION_RANGES:
+        return None
+    cache_key = f"random_pokedex_ids:{DataVersion.get()}:{type_name}:{generation}:{legendary}:{mythical}"
+    pokedex_ids = cache.get(cache_key)
+    if pokedex_ids is None:
+        queryset = Pokemon.objects.all()
+        if type_name:
+            queryset = queryset.filter(types__name=type_name)
+        if generation is not None:
+            queryset = queryset.filter(pokedex_id__range=GENERATION_RANGES.get(generation, (0, -1)))
+        if legendary is not None:
+            queryset = queryset.filter(is_legendary=legendary)
+        if mythical is not None:
+            queryset = queryset.filter(is_mythical=mythical)
+        pokedex_ids = list(queryset.order_by('pokedex_id').values_list('pokedex_id', flat=True))
+        if pokedex_ids:  # unknown types would otherwise each leave an entry behind
+            cache.set(cache_key, pokedex_ids, 60 * 60)
+    return random.choice(pokedex_ids) if pokedex_ids else None
+
+
+def pokemon_stats_rows(pokedex_ids: Sequence[int]) -> List[Dict]:
+    """
+    Stats and type names of the given Pokemon, in the order asked for;
+    unknown IDs are skipped. Served from the stat index when enabled,
+    otherwise from two queries however many IDs are asked for.
+    """
+    index = get_stat_index()
+    if index is not None:
+        positions = (index.position_of(pokedex_id) for pokedex_id in pokedex_ids)
+        return [index.stats_row(position) for position in positions if position is not None]
+
+    rows_by_id = {}
+    rows_by_pk = {}
+    values = Pokemon.objects.filter(pokedex_id__in=pokedex_ids).values_list('pk', 'pokedex_id', 'name', *STAT_COLUMNS)
+    for pk, pokedex_id, name, *stats in values:
+        row = {'id': pokedex_id, 'name': name.lower(), **dict(zip(STAT_COLUMNS, stats)), 'types': []}
+        rows_by_id[pokedex_id] = rows_by_pk[pk] = row
+    type_links = Pokemon.types.through.objects.filter(pokemon_id__in=rows_by_pk).order_by('pk')
+    for pokemon_pk, type_name in type_links.values_list('pokemon_id', 'pokemontype__name'):
+        rows_by_pk[pokemon_pk]['types'].append(type_name)
+    return [rows_by_id[pokedex_id] for pokedex_id in pokedex_ids if pokedex_id in rows_by_id]
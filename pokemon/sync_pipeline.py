@@ -0,0 +1,221 @@
+# pokemon/sync_pipeline.py
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set
+
+from .models import Pokemon
+from .services import PokeAPIService, PokemonDataManager, ParsedPokemon, SyncBatchError, SyncStats
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class PipelineBatch:
+    """One list-endpoint window of Pokemon on its way from the API to the database."""
+    offset: int
+    size: int
+    pokemon_ids: List[int] = field(default_factory=list)
+    payloads: list = field(default_factory=list)  # (detail, species) pairs that were fetched
+    parsed: Optional[ParsedPokemon] = None
+    failed_ids: List[int] = field(default_factory=list)
+    evolution_chain_ids: Set[int] = field(default_factory=set)
+    stats: SyncStats = field(default_factory=SyncStats)  # counted only once the batch is committed
+    error: Optional[Exception] = None
+
+    @property
+    def exhausted(self) -> bool:
+        """The list endpoint returned no Pokemon: the end of the dex was reached."""
+        return self.error is None and not self.stats.seen
+
+
+@dataclass
+class StageStats:
+    """Where a stage's time went: working, starved of input, or blocked by a full queue."""
+    busy: float = 0.0
+    waiting: float = 0.0
+    blocked: float = 0.0
+    batches: int = 0
+
+
+class SyncPipeline:
+    """
+    Fetch, parse and write Pokemon as overlapping stages.
+
+    A fetch thread lists each batch and fetches its details and species on
+    the shared PokeAPI thread pool, a parse thread turns payloads into rows,
+    and the caller writes them: batches() yields parsed batches in offset
+    order. The stages are connected by queues of `depth` batches, so a slow
+    writer holds the fetchers back instead of letting payloads pile up,
+    while the network keeps working on the next batches during each write.
+
+    Every batch carries its own counters, failed IDs and evolution chain IDs,
+    to be added to the run's totals when the caller commits it. An error in
+    any batch is raised from batches() in its place, after the batches
+    before it have been yielded.
+    """
+
+    def __init__(self, offset: int, end_offset: int, batch_size: int, concurrency: int = 1,
+                 stale_before: Optional[datetime] = None, depth: int = 2, delay: float = 0.0):
+        self.offset = offset
+        self.end_offset = end_offset
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.stale_before = stale_before
+        self.depth = max(depth, 1)
+        self.delay = delay  # optional pause between batch fetches
+        self.stages = {name: StageStats() for name in ('fetch', 'parse', 'write')}
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+
+        # Read up front so that only the writer touches the database
+        self._fresh_ids = set()
+        if stale_before is not None:
+            self._fresh_ids = set(
+                Pokemon.objects.filter(api_data_cached_at__gte=stale_before).values_list('pokedex_id', flat=True)
+            )
+
+    def batches(self) -> Iterator[PipelineBatch]:
+        fetched = queue.Queue(maxsize=self.depth)
+        parsed = queue.Queue(maxsize=self.depth)
+        threads = [
+            threading.Thread(target=self._fetch_stage, args=(fetched,), name='sync-fetch', daemon=True),
+            threading.Thread(target=self._parse_stage, args=(fetched, parsed), name='sync-parse', daemon=True),
+        ]
+        started_at = time.monotonic()
+        for thread in threads:
+            thread.start()
+
+        write = self.stages['write']
+        try:
+            while True:
+                batch = self._get(parsed, write)
+                if batch is _DONE:
+                    return
+                if batch.error is not None:
+                    raise batch.error
+
+                # Time until the caller asks for the next batch is the write stage's
+                resumed_at = time.monotonic()
+                yield batch
+                write.busy += time.monotonic() - resumed_at
+                write.batches += 1
+                if batch.exhausted:
+                    return
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            self.elapsed += time.monotonic() - started_at
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Percentage of the pipeline's wall time each stage spent busy, starved and blocked."""
+        elapsed = self.elapsed or 1.0
+        return {
+            name: {
+                'busy': round(100 * stage.busy / elapsed, 1),
+                'waiting': round(100 * stage.waiting / elapsed, 1),
+                'blocked': round(100 * stage.blocked / elapsed, 1),
+                'batches': stage.batches,
+            }
+            for name, stage in self.stages.items()
+        }
+
+    # Stages
+
+    def _fetch_stage(self, output: queue.Queue):
+        stage = self.stages['fetch']
+        try:
+            for offset in range(self.offset, self.end_offset, self.batch_size):
+                if self._stop.is_set():
+                    return
+                batch = PipelineBatch(offset, min(self.batch_size, self.end_offset - offset))
+                started_at = time.monotonic()
+                try:
+                    self._fetch(batch)
+                except Exception as e:
+                    batch.error = e
+                stage.busy += time.monotonic() - started_at
+                stage.batches += 1
+
+                self._put(output, batch, stage)
+                if batch.error is not None or batch.exhausted:
+                    return
+                if self.delay > 0:
+                    time.sleep(self.delay)
+        finally:
+            self._put(output, _DONE, stage)
+
+    def _fetch(self, batch: PipelineBatch):
+        pokemon_list = PokeAPIService.fetch_pokemon_list(batch.size, batch.offset)
+        if pokemon_list is None:
+            raise SyncBatchError(f"Could not fetch the Pokemon list at offset {batch.offset}")
+        pokemon_ids = PokemonDataManager._pokemon_ids_from_list(pokemon_list) if pokemon_list else []
+        batch.stats.seen = len(pokemon_ids)
+
+        batch.pokemon_ids = [pokemon_id for pokemon_id in pokemon_ids if pokemon_id not in self._fresh_ids]
+        batch.stats.skipped = len(pokemon_ids) - len(batch.pokemon_ids)
+
+        payloads = PokemonDataManager.fetch_pokemon_payloads(batch.pokemon_ids, concurrency=self.concurrency)
+        for pokemon_id in batch.pokemon_ids:
+            detail, species = payloads[pokemon_id]
+            if detail:
+                batch.payloads.append((detail, species))
+                chain_id = PokemonDataManager.evolution_chain_id(species)
+                if chain_id:
+                    batch.evolution_chain_ids.add(chain_id)
+            else:
+                batch.failed_ids.append(pokemon_id)
+        batch.stats.fetched = len(batch.payloads)
+        batch.stats.failed = len(batch.failed_ids)
+
+    def _parse_stage(self, source: queue.Queue, output: queue.Queue):
+        stage = self.stages['parse']
+        try:
+            while not self._stop.is_set():
+                batch = self._get(source, stage)
+                if batch is _DONE:
+                    return
+                if batch.error is None:
+                    started_at = time.monotonic()
+                    try:
+                        batch.parsed = PokemonDataManager.parse_pokemon_payloads(batch.payloads, batch.stats)
+                    except Exception as e:
+                        batch.error = e
+                    batch.payloads = []
+                    stage.busy += time.monotonic() - started_at
+                    stage.batches += 1
+                self._put(output, batch, stage)
+        finally:
+            self._put(output, _DONE, stage)
+
+    # Queues
+
+    def _get(self, source: queue.Queue, stage: StageStats):
+        """Take the next item, waiting for the stage before; _DONE once the pipeline stops."""
+        started_at = time.monotonic()
+        item = _DONE
+        while not self._stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+                break
+            except queue.Empty:
+                continue
+        stage.waiting += time.monotonic() - started_at
+        return item
+
+    def _put(self, output: queue.Queue, item, stage: StageStats):
+        """Put item, blocking while the queue is full (backpressure) unless the pipeline stops."""
+        started_at = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                output.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        stage.blocked += time.monotonic() - started_at
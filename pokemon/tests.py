@@ -1,3 +1,1252 @@
-from django.test import TestCase
+import base64
+import csv
+import importlib.util
+import io
+import itertools
+import json
+import logging
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import zlib
+from unittest import mock, skipUnless
 
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
+from .cache_backends import CompressedValue, InstrumentedCache
+from .models import DataRevision, Evolution, EvolutionChain, Pokemon, PokemonAbility, PokemonAbilityLink, PokemonType, SyncRun
+from .pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from .pokeapi_stub import PokeAPIStubServer, StubFixtures
+from .response_store import ResponseStore
+from .search_index import (
+    EXACT, FUZZY, ID_PREFIX, PREFIX, SUBSTRING, WORD_PREFIX, SearchIndex, deletes, edit_distance, get_search_index,
+)
+from .services import DataVersion, PokeAPIService, PokemonDataManager, RateLimiter, SyncBatchError, SyncStats
+from .stat_index import StatIndex
+from .type_chart import TypeChartUnavailable, get_type_chart
+from .views import MAX_BATCH_IDS, parse_id_list
+from .sync_pipeline import SyncPipeline
+
+
+def make_pokemon(pokedex_id, name=None, **stats):
+    fields = dict(hp=50, attack=50, defense=50, special_attack=50, special_defense=50, speed=50)
+    fields.update(stats)
+    return Pokemon.objects.create(pokedex_id=pokedex_id, name=name or f"pokemon-{pokedex_id}",
+                                  height=10, weight=100, **fields)
+
+
+def synthetic_payloads(count):
+    """(detail, species) payload pairs for `count` synthetic Pokemon."""
+    payloads = StubFixtures.synthetic(count).payloads
+    return [(payloads[f"pokemon/{pokemon_id}"], payloads[f"pokemon-species/{pokemon_id}"])
+            for pokemon_id in range(1, count + 1)]
+
+
+def raw_cursor(values):
+    """A cursor holding arbitrary JSON, as a client could forge one."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+class KeysetCursorTests(TestCase):
+    BAD_CURSORS = {
+        'string for an integer field': ['abc'],
+        'list': [[1]],
+        'object': [{'a': 1}],
+        'null': [None],
+        'bool': [True],
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id in range(1, 6):
+            make_pokemon(pokedex_id, speed=10 * pokedex_id)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cursor_round_trip(self):
+        paginator = KeysetPaginator(Pokemon.objects.all(), [('speed', True)], page_size=2)
+        rows, cursor = paginator.page()
+        self.assertEqual([p.pokedex_id for p in rows], [5, 4])
+        rows, cursor = paginator.page(cursor)
+        self.assertEqual([p.pokedex_id for p in rows], [3, 2])
+
+    def test_wrong_value_types_are_invalid(self):
+        paginator = KeysetPaginator(Pokemon.objects.all(), page_size=2)
+        for label, values in self.BAD_CURSORS.items():
+            with self.subTest(label), self.assertRaises(InvalidCursor):
+                paginator.page(raw_cursor(values))
+
+    def test_name_cursor_needs_a_string(self):
+        paginator = KeysetPaginator(Pokemon.objects.all(), [('name', False)], page_size=2)
+        with self.assertRaises(InvalidCursor):
+            paginator.page(encode_cursor([1, 1]))
+        rows, _ = paginator.page(encode_cursor(['pokemon-2', 2]))
+        self.assertEqual([p.pokedex_id for p in rows], [3, 4])
+
+    def test_api_answers_bad_cursors_with_400(self):
+        for label, values in self.BAD_CURSORS.items():
+            with self.subTest(label):
+                response = self.client.get(reverse('pokemon:list_api'), {'cursor': raw_cursor(values)})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('error', response.json())
+
+    def test_list_page_falls_back_to_first_page_on_bad_cursors(self):
+        for label, values in self.BAD_CURSORS.items():
+            with self.subTest(label):
+                response = self.client.get(reverse('pokemon:list'), {'cursor': raw_cursor(values)})
+                self.assertEqual(response.status_code, 200)
+
+
+class PokeAPIStubTestMixin:
+    """Runs PokeAPIService against a local stub server, with its caches and response store out of the way."""
+    stub_latency = 0.0
+
+    def setUp(self):
+        super().setUp()
+        self.stub = PokeAPIStubServer(StubFixtures.synthetic(12), latency=self.stub_latency, retry_after=0.05)
+        self.stub.start()
+        self.addCleanup(self.stub.stop)
+        # sync_pokemon reconfigures these class attributes; restore them afterwards
+        patcher = mock.patch.multiple(PokeAPIService, BASE_URL=self.stub.base_url, rate_limiter=None,
+                                      MAX_RETRIES=PokeAPIService.MAX_RETRIES, BACKOFF_BASE=0.001)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        PokeAPIService.set_response_store(None)
+        self.addCleanup(setattr, PokeAPIService, '_response_store', None)
+        PokeAPIService.get_cache().clear()
+        PokeAPIService.reset_endpoint_stats()
+        logging.disable(logging.ERROR)  # retries and failures are expected here
+        self.addCleanup(logging.disable, logging.NOTSET)
+
+
+class PokeAPIRetryTests(PokeAPIStubTestMixin, SimpleTestCase):
+    def fetch_with_recorded_sleeps(self, pokemon_id):
+        with mock.patch('pokemon.services.time.sleep') as sleep:
+            data = PokeAPIService.fetch_pokemon_detail(pokemon_id)
+        return data, [call.args[0] for call in sleep.call_args_list]
+
+    def test_429_waits_for_retry_after(self):
+        self.stub.fail_next('pokemon/1', 429, 429)
+        data, sleeps = self.fetch_with_recorded_sleeps(1)
+        self.assertEqual(data['id'], 1)
+        self.assertEqual(sleeps, [0.05, 0.05])
+        self.assertEqual(self.stub.counts['requests'], 3)
+        self.assertEqual(PokeAPIService.get_endpoint_stats()['pokemon']['retries'], 2)
+
+    def test_5xx_backs_off_exponentially(self):
+        self.stub.fail_next('pokemon/2', 500, 502, 503)
+        with mock.patch.object(PokeAPIService, 'BACKOFF_BASE', 0.1), \
+                mock.patch('pokemon.services.random.uniform', side_effect=lambda low, high: high):
+            data, sleeps = self.fetch_with_recorded_sleeps(2)
+        self.assertEqual(data['id'], 2)
+        self.assertEqual(sleeps, [0.1, 0.2, 0.4])
+
+    def test_gives_up_after_max_retries(self):
+        self.stub.fail_next('pokemon/3', *[503] * (PokeAPIService.MAX_RETRIES + 1))
+        data, sleeps = self.fetch_with_recorded_sleeps(3)
+        self.assertIsNone(data)
+        self.assertEqual(len(sleeps), PokeAPIService.MAX_RETRIES)
+        self.assertEqual(self.stub.counts['requests'], PokeAPIService.MAX_RETRIES + 1)
+        self.assertEqual(PokeAPIService.get_endpoint_stats()['pokemon']['failures'], 1)
+
+    def test_404_is_not_retried(self):
+        data, sleeps = self.fetch_with_recorded_sleeps(999)
+        self.assertIsNone(data)
+        self.assertEqual(sleeps, [])
+        self.assertEqual(self.stub.counts['not_found'], 1)
+
+    def test_successful_responses_are_cached(self):
+        PokeAPIService.fetch_pokemon_detail(4)
+        PokeAPIService.fetch_pokemon_detail(4)
+        self.assertEqual(self.stub.counts['requests'], 1)
+
+
+class RateLimiterTests(PokeAPIStubTestMixin, SimpleTestCase):
+    def test_burst_then_steady_rate(self):
+        limiter = RateLimiter(rate=20, burst=3)
+        started_at = time.monotonic()
+        for _ in range(3):
+            limiter.acquire()
+        self.assertLess(time.monotonic() - started_at, 0.04)
+        for _ in range(4):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - started_at, 4 / 20 - 0.01)
+
+    def test_limits_outgoing_requests(self):
+        PokeAPIService.rate_limiter = RateLimiter(25, burst=1)
+        started_at = time.monotonic()
+        PokeAPIService.fetch_many([(PokeAPIService.fetch_pokemon_detail, pokemon_id) for pokemon_id in range(1, 7)],
+                                  concurrency=6)
+        self.assertGreaterEqual(time.monotonic() - started_at, 5 / 25 - 0.01)
+        self.assertEqual(self.stub.counts['requests'], 6)
+
+
+class FetchManyTests(PokeAPIStubTestMixin, SimpleTestCase):
+    stub_latency = 0.1
+
+    def test_runs_calls_concurrently_in_order(self):
+        calls = [(PokeAPIService.fetch_pokemon_detail, pokemon_id) for pokemon_id in range(1, 9)]
+        started_at = time.monotonic()
+        results = PokeAPIService.fetch_many(calls, concurrency=8)
+        self.assertLess(time.monotonic() - started_at, 8 * self.stub_latency / 2)
+        self.assertEqual([data['id'] for data in results], list(range(1, 9)))
+
+    def test_failures_come_back_as_none_in_place(self):
+        self.stub.fail_next('pokemon/2', *[503] * (PokeAPIService.MAX_RETRIES + 1))
+        calls = [(PokeAPIService.fetch_pokemon_detail, pokemon_id) for pokemon_id in (1, 2, 3, 404)]
+        with mock.patch.object(PokeAPIService, 'BACKOFF_BASE', 0.001):
+            results = PokeAPIService.fetch_many(calls, concurrency=4)
+        self.assertEqual([data and data['id'] for data in results], [1, None, 3, None])
+        self.assertEqual(PokeAPIService.get_endpoint_stats()['pokemon']['failures'], 2)
+
+
+class InstrumentedCacheTests(SimpleTestCase):
+    def make_cache(self, **options):
+        # A location and prefix of its own, so neither data nor counters are shared with other tests
+        name = f"test-{self.id()}"
+        return InstrumentedCache(name, {'KEY_PREFIX': name, 'OPTIONS': {'COMPRESS_MIN_BYTES': 256, **options}})
+
+    def setUp(self):
+        registry = mock.patch.dict(InstrumentedCache._registry)
+        registry.start()
+        self.addCleanup(registry.stop)
+        self.cache = self.make_cache()
+        self.addCleanup(self.cache.clear)
+
+    def test_large_values_are_stored_compressed(self):
+        value = {'moves': ['tackle'] * 500}
+        self.cache.set('payload', value)
+        self.assertIsInstance(self.cache._cache.get('payload'), CompressedValue)
+        self.assertEqual(self.cache.get('payload'), value)
+        self.assertEqual(self.cache.get_many(['payload']), {'payload': value})
+        metrics = self.cache.local_metrics()
+        self.assertEqual(metrics['compressed'], 1)
+        self.assertLess(metrics['stored_bytes'] * 10, metrics['raw_bytes'])
+
+    def test_small_numeric_and_incompressible_values_are_stored_as_is(self):
+        incompressible = os.urandom(1024)
+        self.cache.set_many({'small': 'pikachu', 'number': 25, 'random': incompressible})
+        self.assertEqual(self.cache._cache.get('small'), 'pikachu')
+        self.assertEqual(self.cache._cache.get('random'), incompressible)
+        self.assertEqual(self.cache.incr('number'), 26)
+        self.assertEqual(self.cache.local_metrics()['compressed'], 0)
+
+    def test_without_threshold_nothing_is_compressed(self):
+        cache_backend = InstrumentedCache(f"test-{self.id()}-plain", {'KEY_PREFIX': f"test-{self.id()}-plain"})
+        self.addCleanup(cache_backend.clear)
+        cache_backend.set('payload', 'x' * 10000)
+        self.assertEqual(cache_backend._cache.get('payload'), 'x' * 10000)
+
+    def test_counts_hits_and_misses(self):
+        self.cache.set('a', 1)
+        self.cache.get('a')
+        self.cache.get('b')
+        self.cache.get_many(['a', 'b', 'c'])
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        metrics = self.cache.local_metrics()
+        self.assertEqual((metrics['hits'], metrics['misses'], metrics['sets']), (2, 4, 1))
+
+    def test_flushed_metrics_add_up_across_processes(self):
+        with mock.patch.object(InstrumentedCache, 'METRICS_FLUSH_INTERVAL', 2):
+            self.cache.get('a')
+            self.cache.get('b')  # flushes this process's two misses
+            InstrumentedCache._registry.clear()  # a second worker starts with counters of its own
+            other = self.make_cache()
+            other.set('a', 1)
+            other.get('a')
+        self.assertEqual(other.local_metrics()['misses'], 0)
+        shared = other.shared_metrics()
+        self.assertEqual((shared['hits'], shared['misses'], shared['sets']), (1, 2, 1))
+
+        other.reset_metrics()
+        self.assertEqual(other.shared_metrics()['misses'], 0)
+
+
+class ResponseStoreTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'responses.sqlite3')
+        self.store = ResponseStore(self.path)
+        self.addCleanup(self.store.close)
+
+    def test_round_trip_is_compressed(self):
+        content = json.dumps({'name': 'bulbasaur', 'moves': ['tackle'] * 500}).encode()
+        self.store.put('https://pokeapi.co/api/v2/pokemon/1', content, etag='"abc"', last_modified='Mon, 01 Jan 2024')
+        stored = self.store.get('https://pokeapi.co/api/v2/pokemon/1')
+        self.assertEqual(stored.data, json.loads(content))
+        self.assertEqual(stored.conditional_headers(), {'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 01 Jan 2024'})
+        self.assertLess(self.store.total_size(), len(content) / 10)
+        self.assertIsNone(self.store.get('https://pokeapi.co/api/v2/pokemon/2'))
+
+    def test_survives_reopening(self):
+        self.store.put('url', b'{"id": 1}')
+        self.store.close()
+        self.store = ResponseStore(self.path)
+        self.assertEqual(self.store.get('url').data, {'id': 1})
+
+    def test_corrupt_body_is_discarded(self):
+        self.store.put('url', b'{"id": 1}')
+        self.store._conn.execute("UPDATE responses SET body = x'00'")
+        with self.assertLogs('pokemon.response_store', 'WARNING'):
+            self.assertIsNone(self.store.get('url'))
+        self.assertEqual(self.store.total_size(), 0)
+
+    def test_evicts_least_recently_used(self):
+        contents = {url: json.dumps({'url': url, 'padding': url * 200}).encode() for url in 'abcd'}
+        entry_size = len(zlib.compress(contents['a']))
+        self.store.max_bytes = int(entry_size * 2.5)
+        clock = itertools.count(1000)
+        with mock.patch.object(ResponseStore, 'EVICT_CHECK_INTERVAL', 1), \
+                mock.patch('pokemon.response_store.time.time', side_effect=lambda: next(clock)):
+            self.store.put('a', contents['a'])
+            self.store.put('b', contents['b'])
+            self.store.get('a')  # now more recently used than b
+            self.store.put('c', contents['c'])
+            self.assertIsNone(self.store.get('b'))
+            self.assertIsNotNone(self.store.get('a'))
+            self.assertIsNotNone(self.store.get('c'))
+            self.assertLessEqual(self.store.total_size(), self.store.max_bytes)
+
+
+class ResponseStoreFetchTests(PokeAPIStubTestMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        store = ResponseStore(os.path.join(directory.name, 'responses.sqlite3'))
+        self.addCleanup(store.close)
+        PokeAPIService.set_response_store(store)
+
+    def fetch(self):
+        PokeAPIService.get_cache().clear()  # as a restarted process would
+        return PokeAPIService.fetch_pokemon_detail(1)
+
+    def test_fresh_response_is_replayed_without_request(self):
+        data = self.fetch()
+        self.assertEqual(self.fetch(), data)
+        self.assertEqual(self.stub.endpoint_requests['pokemon/1'], 1)
+        self.assertEqual(PokeAPIService.get_endpoint_stats()['pokemon']['stored'], 1)
+
+    def test_expired_response_is_revalidated(self):
+        data = self.fetch()
+        with mock.patch.object(PokeAPIService, 'RESPONSE_STORE_MAX_AGE', 0):
+            self.assertEqual(self.fetch(), data)
+            self.assertEqual(self.fetch(), data)
+        self.assertEqual(self.stub.endpoint_requests['pokemon/1'], 3)
+        self.assertEqual(self.stub.counts['not_modified'], 2)
+        self.assertEqual(self.stub.counts['served'], 1)
+        self.assertEqual(PokeAPIService.get_endpoint_stats()['pokemon']['revalidated'], 2)
+
+
+class BulkUpsertTests(TestCase):
+    def setUp(self):
+        PokemonDataManager.sync_pokemon_types()
+
+    def link_counts(self):
+        return Pokemon.types.through.objects.count(), PokemonAbilityLink.objects.count()
+
+    def test_second_upsert_adds_no_rows_and_skips_unchanged(self):
+        payloads = synthetic_payloads(10)
+        first = SyncStats()
+        PokemonDataManager.bulk_upsert_pokemon(payloads, skip_unchanged=True, stats=first)
+        self.assertEqual((first.created, first.updated, first.unchanged), (10, 0, 0))
+        links = self.link_counts()
+        cached_at = dict(Pokemon.objects.values_list('pokedex_id', 'api_data_cached_at'))
+
+        second = SyncStats()
+        written = PokemonDataManager.bulk_upsert_pokemon(payloads, skip_unchanged=True, stats=second)
+        self.assertEqual(written, [])
+        self.assertEqual((second.created, second.updated, second.unchanged), (0, 0, 10))
+        self.assertEqual(Pokemon.objects.count(), 10)
+        self.assertEqual(self.link_counts(), links)
+        # Unchanged rows still count as freshly checked
+        for pokedex_id, checked_at in Pokemon.objects.values_list('pokedex_id', 'api_data_cached_at'):
+            self.assertGreaterEqual(checked_at, cached_at[pokedex_id])
+
+    def test_changed_payload_is_rewritten(self):
+        payloads = synthetic_payloads(3)
+        PokemonDataManager.bulk_upsert_pokemon(payloads, skip_unchanged=True)
+        old_hash = Pokemon.objects.get(pokedex_id=2).api_data_hash
+
+        detail, species = payloads[1]
+        detail = {**detail, 'weight': detail['weight'] + 1, 'types': detail['types'][:1]}
+        stats = SyncStats()
+        written = PokemonDataManager.bulk_upsert_pokemon([payloads[0], (detail, species)], skip_unchanged=True,
+                                                         stats=stats)
+        self.assertEqual([pokemon.pokedex_id for pokemon in written], [2])
+        self.assertEqual((stats.updated, stats.unchanged), (1, 1))
+        pokemon = Pokemon.objects.get(pokedex_id=2)
+        self.assertEqual(pokemon.weight, detail['weight'])
+        self.assertNotEqual(pokemon.api_data_hash, old_hash)
+        self.assertEqual(pokemon.types.count(), 1)
+        self.assertEqual(Pokemon.objects.count(), 3)
+
+    def test_upsert_without_skip_rewrites_in_place(self):
+        payloads = synthetic_payloads(5)
+        PokemonDataManager.bulk_upsert_pokemon(payloads)
+        links = self.link_counts()
+        stats = SyncStats()
+        PokemonDataManager.bulk_upsert_pokemon(payloads, stats=stats)
+        self.assertEqual((stats.created, stats.updated), (0, 5))
+        self.assertEqual(Pokemon.objects.count(), 5)
+        self.assertEqual(self.link_counts(), links)
+
+
+class DumpImportTests(TestCase):
+    """import_pokemon_dump over a synthetic dump of six Pokemon (two chains) plus a form of #3."""
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        payloads = StubFixtures.synthetic(6).payloads
+        payloads['pokemon-species/3']['is_legendary'] = True
+        # A form's detail points at its base species; IDs above 10000 have no species of their own
+        form = json.loads(json.dumps(payloads['pokemon/3']))
+        form.update(id=10001, name=f"{form['name']}-mega")
+        payloads['pokemon/10001'] = form
+        self.files = {}
+        for number, (endpoint, data) in enumerate(sorted(payloads.items()), start=1):
+            resource, key = endpoint.split('/')
+            if resource == 'type':
+                data, key = dict(data, id=number), str(number)
+            if resource in ('pokemon', 'pokemon-species', 'evolution-chain', 'type'):
+                self.files[(resource, int(key))] = json.dumps(data).encode()
+
+    def write_directory(self):
+        root = os.path.join(self.directory, 'dump')
+        for (resource, object_id), content in self.files.items():
+            path = os.path.join(root, 'api', 'v2', resource, str(object_id))
+            os.makedirs(path)
+            with open(os.path.join(path, 'index.json'), 'wb') as f:
+                f.write(content)
+        return root
+
+    def write_tar(self):
+        path = os.path.join(self.directory, 'dump.tar.gz')
+        # Details before species, so pairing has to wait for the species
+        order = ('pokemon', 'evolution-chain', 'pokemon-species', 'type')
+        with tarfile.open(path, 'w:gz') as archive:
+            for (resource, object_id), content in sorted(self.files.items(), key=lambda item: order.index(item[0][0])):
+                member = tarfile.TarInfo(f"data/{resource}/{object_id}.json")
+                member.size = len(content)
+                archive.addfile(member, io.BytesIO(content))
+        return path
+
+    def import_dump(self, path, **options):
+        out = io.StringIO()
+        call_command('import_pokemon_dump', path, batch_size=2, stdout=out, **options)
+        return out.getvalue()
+
+    def assert_imported(self):
+        self.assertEqual(sorted(Pokemon.objects.values_list('pokedex_id', flat=True)), [1, 2, 3, 4, 5, 6, 10001])
+        form = Pokemon.objects.get(pokedex_id=10001)
+        self.assertTrue(form.is_legendary)  # paired with species 3, not a species 10001
+        self.assertFalse(Pokemon.objects.get(pokedex_id=2).is_legendary)
+        self.assertEqual(form.types.count(), Pokemon.objects.get(pokedex_id=3).types.count())
+
+        # Chains span batches of two and are written once every member is in
+        self.assertEqual(EvolutionChain.objects.count(), 2)
+        self.assertEqual(Evolution.objects.count(), 4)
+        self.assertEqual(EvolutionChain.objects.get(chain_id=1).graph['nodes'], [1, 2, 3])
+        self.assertEqual(Pokemon.objects.get(pokedex_id=6).evolution_chain.chain_id, 2)
+        self.assertTrue(all(PokemonType.objects.values_list('damage_relations', flat=True)))
+
+    def test_directory_dump(self):
+        output = self.import_dump(self.write_directory())
+        self.assertIn('created 7', output)
+        self.assert_imported()
+
+    def test_tar_dump(self):
+        output = self.import_dump(self.write_tar())
+        self.assertIn('created 7', output)
+        self.assert_imported()
+
+    def test_skip_unchanged(self):
+        path = self.write_directory()
+        self.import_dump(path)
+        version = DataVersion.get()
+        output = self.import_dump(path, skip_unchanged=True)
+        self.assertIn('created 0, updated 0, unchanged 7', output)
+        self.assertNotEqual(DataVersion.get(), version)
+
+        detail_path = os.path.join(path, 'api', 'v2', 'pokemon', '2', 'index.json')
+        with open(detail_path) as f:
+            detail = json.load(f)
+        detail['weight'] += 1
+        with open(detail_path, 'w') as f:
+            json.dump(detail, f)
+        output = self.import_dump(path, skip_unchanged=True)
+        self.assertIn('created 0, updated 1, unchanged 6', output)
+        self.assertEqual(Pokemon.objects.get(pokedex_id=2).weight, detail['weight'])
+
+    def test_missing_dump(self):
+        with self.assertRaisesMessage(CommandError, 'Dump not found'):
+            self.import_dump(os.path.join(self.directory, 'missing'))
+
+
+class ResumeSyncTests(PokeAPIStubTestMixin, TestCase):
+    def sync(self, **options):
+        options = {
+            'limit': 12, 'batch_size': 4, 'max_retries': 0, 'rate_limit': 0, 'base_url': self.stub.base_url,
+            'no_response_store': True, 'skip_evolutions': True, 'skip_abilities': True, 'skip_type_chart': True,
+            **options,
+        }
+        call_command('sync_pokemon', stdout=io.StringIO(), **options)
+
+    def test_client_settings_are_restored_after_run(self):
+        settings = {name: getattr(PokeAPIService, name) for name in PokeAPIService.RUN_SETTINGS}
+        during = {}
+
+        def record_settings(*args, **kwargs):
+            during.update({name: getattr(PokeAPIService, name) for name in PokeAPIService.RUN_SETTINGS})
+            return []
+
+        with mock.patch.object(PokemonDataManager, 'sync_pokemon_types', side_effect=record_settings):
+            self.sync(limit=4, base_url=f"{self.stub.base_url}/", max_retries=1, rate_limit=500,
+                      pool_size=3, revalidate=True)
+
+        self.assertEqual(during['BASE_URL'], self.stub.base_url)
+        self.assertEqual((during['MAX_RETRIES'], during['RESPONSE_STORE_MAX_AGE'], during['POOL_SIZE']), (1, 0, 3))
+        self.assertIsNotNone(during['rate_limiter'])
+        self.assertIs(during['_response_store'], False)
+        self.assertEqual({name: getattr(PokeAPIService, name) for name in PokeAPIService.RUN_SETTINGS}, settings)
+
+    def fetched_detail_ids(self):
+        return sorted(
+            int(endpoint.split('/')[1]) for endpoint in self.stub.endpoint_requests if endpoint.startswith('pokemon/')
+        )
+
+    def test_resume_syncs_only_remaining_and_dead_lettered_ids(self):
+        self.stub.fail_next('pokemon/2', 503)  # dead-lettered
+        self.stub.fail_next('pokemon?limit=4&offset=8', 503)  # the third batch fails
+        with self.assertRaisesMessage(CommandError, '--resume'):
+            self.sync()
+
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.STATUS_FAILED)
+        self.assertEqual(run.next_offset, 8)
+        self.assertEqual(run.failed_ids, {'2': 1})
+        self.assertEqual(sorted(Pokemon.objects.values_list('pokedex_id', flat=True)), [1, 3, 4, 5, 6, 7, 8])
+
+        self.stub.endpoint_requests.clear()
+        PokeAPIService.get_cache().clear()
+        self.sync(resume=True)
+
+        self.assertEqual(self.fetched_detail_ids(), [2, 9, 10, 11, 12])
+        run.refresh_from_db()
+        self.assertEqual(run.status, SyncRun.STATUS_COMPLETED)
+        self.assertEqual(run.failed_ids, {})
+        self.assertEqual(run.next_offset, 12)
+        self.assertEqual(Pokemon.objects.count(), 12)
+        self.assertEqual(SyncRun.objects.count(), 1)
+
+    def test_dead_letter_passes_recover_failed_ids_in_the_same_run(self):
+        self.stub.fail_next('pokemon/5', 503, 503)
+        self.sync(retry_passes=3)
+        run = SyncRun.objects.get()
+        self.assertEqual(run.status, SyncRun.STATUS_COMPLETED)
+        self.assertEqual(run.failed_ids, {})
+        self.assertEqual(self.stub.endpoint_requests['pokemon/5'], 3)
+        self.assertEqual(Pokemon.objects.count(), 12)
+
+    def test_nothing_to_resume_after_a_clean_run(self):
+        self.sync()
+        with self.assertRaisesMessage(CommandError, 'nothing to resume'):
+            self.sync(resume=True)
+
+
+class SyncPipelineTests(PokeAPIStubTestMixin, SimpleTestCase):
+    TIMEOUT = 5.0
+
+    def setUp(self):
+        super().setUp()
+        PokeAPIService.MAX_RETRIES = 0
+
+    def consume(self, pipeline, per_batch=None):
+        """Run pipeline.batches() in a thread; returns (yielded offsets, raised error), failing on a hang."""
+        offsets, outcome = [], {}
+
+        def run():
+            try:
+                for batch in pipeline.batches():
+                    offsets.append(batch.offset)
+                    if per_batch:
+                        per_batch(batch)
+            except Exception as e:
+                outcome['error'] = e
+
+        consumer = threading.Thread(target=run, daemon=True)
+        consumer.start()
+        consumer.join(self.TIMEOUT)
+        self.assertFalse(consumer.is_alive(), 'pipeline did not finish')
+        self.assertFalse([thread.name for thread in threading.enumerate()
+                          if thread.name in ('sync-fetch', 'sync-parse')])
+        return offsets, outcome.get('error')
+
+    def test_runs_all_batches_in_order(self):
+        offsets, error = self.consume(SyncPipeline(0, 12, 4, concurrency=2, depth=1))
+        self.assertIsNone(error)
+        self.assertEqual(offsets, [0, 4, 8])
+
+    def test_fetch_error_is_raised_after_earlier_batches(self):
+        self.stub.fail_next('pokemon?limit=4&offset=8', 503)
+        # A slow writer keeps the depth-1 queues full while the fetcher fails
+        offsets, error = self.consume(SyncPipeline(0, 16, 4, concurrency=2, depth=1),
+                                      per_batch=lambda batch: time.sleep(0.1))
+        self.assertIsInstance(error, SyncBatchError)
+        self.assertEqual(offsets, [0, 4])
+
+    def test_parse_error_is_raised_in_place_of_its_batch(self):
+        parse = PokemonDataManager.parse_pokemon_payloads
+        calls = []
+
+        def failing_parse(payloads, stats=None):
+            calls.append(1)
+            if len(calls) == 2:
+                raise ValueError('unparseable batch')
+            return parse(payloads, stats)
+
+        with mock.patch.object(PokemonDataManager, 'parse_pokemon_payloads', side_effect=failing_parse):
+            offsets, error = self.consume(SyncPipeline(0, 12, 4, concurrency=2, depth=1))
+        self.assertIsInstance(error, ValueError)
+        self.assertEqual(offsets, [0])
+
+    def test_writer_stopping_early_releases_blocked_stages(self):
+        pipeline = SyncPipeline(0, 12, 2, concurrency=2, depth=1)
+
+        def stop(batch):
+            time.sleep(0.2)  # let the fetch and parse stages fill their queues and block
+            raise RuntimeError('writer failed')
+
+        offsets, error = self.consume(pipeline, per_batch=stop)
+        self.assertIsInstance(error, RuntimeError)
+        self.assertEqual(offsets, [0])
+        self.assertGreater(pipeline.stages['fetch'].blocked, 0)
+
+
+class DataVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_falls_back_to_fingerprint_before_first_bump(self):
+        make_pokemon(1)
+        self.assertEqual(DataVersion.get(), '1-0')
+
+    def test_bump_is_seen_by_a_process_with_its_own_cache(self):
+        make_pokemon(1)
+        before = DataVersion.get()
+        bumped = DataVersion.bump()
+        self.assertNotEqual(bumped, before)
+        cache.clear()  # another process's cache never saw the bump
+        self.assertEqual(DataVersion.get(), bumped)
+
+    def test_bump_changes_stamp_when_only_related_data_changed(self):
+        first = DataVersion.bump()
+        PokemonType.objects.create(name='fire')
+        second = DataVersion.bump()
+        self.assertNotEqual(second, first)
+        self.assertEqual(DataRevision.objects.get().revision, 2)
+
+    def test_last_modified_is_bump_time(self):
+        DataVersion.bump()
+        bumped_at = DataRevision.objects.get().bumped_at
+        self.assertAlmostEqual(DataVersion.last_modified().timestamp(), bumped_at.timestamp(), places=3)
+
+
+def chain_node(species_id, *evolves_to, **details):
+    """An evolution-chain node as PokeAPI nests them."""
+    return {
+        'species': {'name': f"species-{species_id}", 'url': f"https://pokeapi.co/api/v2/pokemon-species/{species_id}/"},
+        'evolution_details': [details] if details else [],
+        'evolves_to': list(evolves_to),
+    }
+
+
+class EvolutionChainTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id, name in ((133, 'eevee'), (134, 'vaporeon'), (135, 'jolteon'), (1, 'bulbasaur'), (2, 'ivysaur')):
+            make_pokemon(pokedex_id, name)
+
+    def setUp(self):
+        cache.clear()
+
+    def eevee_chain(self, *branches):
+        return {'id': 67, 'chain': chain_node(133, *branches)}
+
+    def test_flatten_branching_chain(self):
+        base_id, edges = PokemonDataManager.flatten_evolution_chain(self.eevee_chain(
+            chain_node(134, trigger={'name': 'use-item'}, item={'name': 'water-stone'}),
+            chain_node(135, trigger={'name': 'use-item'}, item={'name': 'thunder-stone'}, time_of_day='day'),
+        ))
+        self.assertEqual(base_id, 133)
+        self.assertEqual(
+            sorted((edge['from_id'], edge['to_id'], edge['trigger'], edge['item'], edge['condition']) for edge in edges),
+            [(133, 134, 'use-item', 'water-stone', ''), (133, 135, 'use-item', 'thunder-stone', 'time of day: day')],
+        )
+
+    def test_graph_stores_ids_and_skips_missing_species(self):
+        chains = {67: self.eevee_chain(chain_node(134), chain_node(136))}
+        self.assertEqual(PokemonDataManager.bulk_write_evolution_chains(chains), 1)
+        graph = EvolutionChain.objects.get(chain_id=67).graph
+        self.assertEqual(graph['nodes'], [133, 134])
+        self.assertEqual([(edge['from'], edge['to']) for edge in graph['edges']], [(133, 134)])
+        self.assertEqual(
+            sorted(Pokemon.objects.filter(evolution_chain__chain_id=67).values_list('pokedex_id', flat=True)),
+            [133, 134],
+        )
+
+    def test_members_dropped_from_chain_are_cleared(self):
+        PokemonDataManager.bulk_write_evolution_chains({67: self.eevee_chain(chain_node(134), chain_node(135))})
+        PokemonDataManager.bulk_write_evolution_chains({67: self.eevee_chain(chain_node(134))})
+        self.assertIsNone(Pokemon.objects.get(pokedex_id=135).evolution_chain)
+        self.assertIsNotNone(Pokemon.objects.get(pokedex_id=134).evolution_chain)
+
+    def test_skips_chain_whose_base_is_missing(self):
+        with self.assertLogs('pokemon.services', 'WARNING'):
+            written = PokemonDataManager.bulk_write_evolution_chains({1: {'chain': chain_node(999, chain_node(1))}})
+        self.assertEqual(written, 0)
+        self.assertFalse(EvolutionChain.objects.exists())
+
+    def test_detail_view_shows_current_names_of_neighbours(self):
+        PokemonDataManager.bulk_write_evolution_chains({
+            67: self.eevee_chain(chain_node(134, trigger={'name': 'use-item'}, item={'name': 'water-stone'})),
+        })
+        Pokemon.objects.filter(pokedex_id=134).update(name='vaporeon-renamed')
+
+        response = self.client.get(reverse('pokemon:detail', args=[134]))
+        self.assertEqual([row['pokemon'].name for row in response.context['pre_evolutions']], ['eevee'])
+        response = self.client.get(reverse('pokemon:detail', args=[133]))
+        evolutions = response.context['evolutions']
+        self.assertEqual([(row['pokemon'].name, row['item']) for row in evolutions], [('vaporeon-renamed', 'water-stone')])
+        self.assertContains(response, 'Vaporeon-Renamed')
+
+
+def ability_payload(*entries):
+    """An ability payload with (language, flavour text, effect) entries, oldest first."""
+    return {
+        'flavor_text_entries': [
+            {'language': {'name': language}, 'flavor_text': text} for language, text, _ in entries
+        ],
+        'effect_entries': [
+            {'language': {'name': language}, 'effect': effect} for language, _, effect in entries
+        ],
+    }
+
+
+class FragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id, name in ((133, 'eevee'), (134, 'vaporeon'), (135, 'jolteon')):
+            make_pokemon(pokedex_id, name)
+
+    def setUp(self):
+        cache.clear()
+        PokemonDataManager.bulk_write_evolution_chains({67: {'chain': chain_node(133, chain_node(134), chain_node(135))}})
+
+    def detail(self, pokedex_id):
+        return self.client.get(reverse('pokemon:detail', args=[pokedex_id])).content.decode()
+
+    def test_body_is_cached_until_pokemon_data_changes(self):
+        self.assertIn('<span class="stat-value">50</span>', self.detail(133))
+        Pokemon.objects.filter(pokedex_id=133).update(hp=77)
+        self.assertNotIn('<span class="stat-value">77</span>', self.detail(133))  # same render_version
+        Pokemon.objects.filter(pokedex_id=133).update(api_data_hash='resynced')
+        self.assertIn('<span class="stat-value">77</span>', self.detail(133))
+
+    def test_body_follows_renamed_evolution(self):
+        self.assertIn('Vaporeon', self.detail(133))
+        Pokemon.objects.filter(pokedex_id=134).update(name='aquaeon')
+        content = self.detail(133)
+        self.assertIn('Aquaeon', content)
+        self.assertNotIn('Vaporeon', content)
+
+    def test_body_follows_rewritten_chain(self):
+        self.assertIn('Jolteon', self.detail(133))
+        self.assertIn('Evolution Chain', self.detail(135))
+        PokemonDataManager.bulk_write_evolution_chains({67: {'chain': chain_node(133, chain_node(134))}})
+        self.assertNotIn('Jolteon', self.detail(133))
+        self.assertNotIn('Evolution Chain', self.detail(135))
+
+    def test_list_card_is_cached_until_pokemon_data_changes(self):
+        self.client.get(reverse('pokemon:list'))
+        Pokemon.objects.filter(pokedex_id=134).update(name='aquaeon')
+        self.assertNotContains(self.client.get(reverse('pokemon:list')), 'Aquaeon')
+        Pokemon.objects.filter(pokedex_id=134).update(api_data_hash='resynced')
+        self.assertContains(self.client.get(reverse('pokemon:list')), 'Aquaeon')
+
+
+class AbilityDescriptionTests(TestCase):
+    def test_parse_collapses_line_breaks_and_takes_latest_entry(self):
+        payload = ability_payload(
+            ('en', 'Old\ntext.', 'Old effect.'),
+            ('de', 'Deutscher Text.', 'Effekt.'),
+            ('en', 'Powers up\nFire-type\x0cmoves  in a pinch.', 'Boosts\nFire moves.'),
+        )
+        self.assertEqual(PokemonDataManager.parse_ability_text(payload),
+                         ('Powers up Fire-type moves in a pinch.', 'Boosts Fire moves.'))
+        self.assertEqual(PokemonDataManager.parse_ability_text(payload, language='de'), ('Deutscher Text.', 'Effekt.'))
+        self.assertEqual(PokemonDataManager.parse_ability_text(ability_payload(('ja', 'テキスト', '効果'))), ('', ''))
+
+    def test_resume_fetches_only_unsynced_abilities(self):
+        for name in ('blaze', 'overgrow', 'torrent'):
+            PokemonAbility.objects.create(name=name)
+        payloads = {
+            'blaze': ability_payload(('en', 'Blaze text.', 'Blaze effect.')),
+            'overgrow': ability_payload(('ja', 'テキスト', '効果')),  # no English text
+            'torrent': None,  # fetch fails
+        }
+        requested = []
+
+        def fetch_many(calls, concurrency=1):
+            names = [name for _, name in calls]
+            requested.append(names)
+            return [payloads[name] for name in names]
+
+        with mock.patch.object(PokeAPIService, 'fetch_many', side_effect=fetch_many):
+            self.assertEqual(PokemonDataManager.sync_ability_descriptions(), (2, 1))
+            payloads['torrent'] = ability_payload(('en', 'Torrent text.', ''))
+            self.assertEqual(PokemonDataManager.sync_ability_descriptions(), (1, 0))
+            self.assertEqual(PokemonDataManager.sync_ability_descriptions(), (0, 0))
+
+        self.assertEqual(requested, [['blaze', 'overgrow', 'torrent'], ['torrent']])
+        abilities = {ability.name: ability for ability in PokemonAbility.objects.all()}
+        self.assertEqual(abilities['blaze'].description, 'Blaze text.')
+        self.assertEqual((abilities['overgrow'].description, abilities['overgrow'].effect), ('', ''))
+        self.assertIsNotNone(abilities['overgrow'].descriptions_synced_at)
+        self.assertEqual(abilities['torrent'].description, 'Torrent text.')
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fire = PokemonType.objects.create(name='fire')
+        for pokedex_id, name in ((4, 'charmander'), (1, 'bulbasaur'), (7, 'squirtle')):
+            make_pokemon(pokedex_id, name)
+        Pokemon.objects.get(pokedex_id=4).types.set([fire])
+        blaze, solar_power = PokemonAbility.objects.create(name='blaze'), PokemonAbility.objects.create(name='solar-power')
+        charmander = Pokemon.objects.get(pokedex_id=4)
+        PokemonAbilityLink.objects.create(pokemon=charmander, ability=solar_power, is_hidden=True, slot=3)
+        PokemonAbilityLink.objects.create(pokemon=charmander, ability=blaze, slot=1)
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = os.path.join(directory.name, 'cache')
+        self.output = os.path.join(directory.name, 'out')
+        settings_override = override_settings(POKEMON_EXPORT_DIR=self.cache_dir)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def export(self, export_format='ndjson', **options):
+        out = io.StringIO()
+        call_command('export_pokemon', format=export_format, output=self.output, chunk_size=2, stdout=out, **options)
+        with open(self.output, 'rb') as f:
+            return f.read(), out.getvalue()
+
+    def cached_files(self):
+        return sorted(os.listdir(self.cache_dir)) if os.path.isdir(self.cache_dir) else []
+
+    def test_ndjson(self):
+        content, _ = self.export()
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([row['pokedex_id'] for row in rows], [1, 4, 7])
+        self.assertEqual(rows[1]['types'], ['fire'])
+        self.assertEqual((rows[1]['abilities'], rows[1]['hidden_abilities']), (['blaze'], ['solar-power']))
+        self.assertEqual(rows[1]['total_stats'], 300)
+
+    def test_csv_joins_list_fields(self):
+        content, _ = self.export('csv')
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual([row['name'] for row in rows], ['bulbasaur', 'charmander', 'squirtle'])
+        self.assertEqual((rows[1]['types'], rows[1]['abilities'], rows[0]['types']), ('fire', 'blaze', ''))
+
+    def test_columnar_batches_by_chunk_size(self):
+        content, _ = self.export('columnar')
+        batches = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual([batch['pokedex_id'] for batch in batches], [[1, 4], [7]])
+        self.assertEqual(batches[0]['types'], [[], ['fire']])
+
+    def test_export_is_reused_until_data_version_changes(self):
+        first, message = self.export()
+        self.assertIn('from database', message)
+        self.assertEqual(len(self.cached_files()), 1)
+
+        second, message = self.export()
+        self.assertIn('from cached export', message)
+        self.assertEqual(second, first)
+
+        Pokemon.objects.filter(pokedex_id=1).update(name='bulbasaur-renamed')
+        DataVersion.bump()
+        third, message = self.export()
+        self.assertIn('from database', message)
+        self.assertIn(b'bulbasaur-renamed', third)
+        self.assertEqual(len(self.cached_files()), 1)  # the previous version's export was removed
+
+    def test_no_cache_leaves_export_cache_alone(self):
+        self.export(no_cache=True)
+        self.assertEqual(self.cached_files(), [])
+
+    def test_no_cache_parquet_is_not_written_to_export_cache(self):
+        def write_parquet(rows, f, batch_size):
+            f.write(json.dumps([row['pokedex_id'] for row in rows]).encode())
+
+        with mock.patch('pokemon.management.commands.export_pokemon.write_parquet', side_effect=write_parquet):
+            content, _ = self.export('parquet', no_cache=True)
+        self.assertEqual(content, b'[1, 4, 7]')
+        self.assertEqual(self.cached_files(), [])
+
+    @skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet(self):
+        import pyarrow.parquet as pq
+
+        self.export('parquet')
+        table = pq.read_table(self.output)
+        self.assertEqual(table.column('pokedex_id').to_pylist(), [1, 4, 7])
+        self.assertEqual(table.column('hidden_abilities').to_pylist(), [[], ['solar-power'], []])
+        self.assertEqual(len(self.cached_files()), 1)
+
+    @skipUnless(importlib.util.find_spec('pyarrow') is None, 'pyarrow is installed')
+    def test_parquet_without_pyarrow(self):
+        with self.assertRaisesMessage(CommandError, 'needs pyarrow'):
+            self.export('parquet')
+
+
+class TotalStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id, speed in ((1, 10), (2, 100), (3, 50), (4, 100)):
+            make_pokemon(pokedex_id, speed=speed)
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()
+
+    def list_ids(self, **params):
+        response = self.client.get(reverse('pokemon:list'), params)
+        return [pokemon.pokedex_id for pokemon in response.context['pokemon_list']]
+
+    def test_save_keeps_total_in_step(self):
+        pokemon = Pokemon.objects.get(pokedex_id=1)
+        self.assertEqual(pokemon.total_stats, 260)
+        pokemon.attack = 150
+        pokemon.save(update_fields=['attack'])
+        self.assertEqual(Pokemon.objects.get(pokedex_id=1).total_stats, 360)
+
+    def test_bulk_upsert_computes_total(self):
+        detail, species = synthetic_payloads(1)[0]
+        PokemonDataManager.bulk_upsert_pokemon([(detail, species)])
+        pokemon = Pokemon.objects.get(pokedex_id=detail['id'])
+        self.assertEqual(pokemon.total_stats, sum(stat['base_stat'] for stat in detail['stats']))
+
+    def test_filter_and_sort_by_total(self):
+        for stat_index in (True, False):
+            with self.subTest(stat_index=stat_index), override_settings(POKEMON_STAT_INDEX=stat_index):
+                self.assertEqual(self.list_ids(min_total=300), [2, 3, 4])
+                self.assertEqual(self.list_ids(min_total=300, max_total=340), [3])
+                self.assertEqual(self.list_ids(sort='-total_stats'), [2, 4, 3, 1])
+                self.assertEqual(self.list_ids(sort='total_stats', paginate='cursor'), [1, 3, 2, 4])
+
+    @skipUnless(connection.vendor == 'sqlite', 'query plans differ between databases')
+    def test_total_filter_uses_index(self):
+        plan = Pokemon.objects.filter(total_stats__gte=300).order_by().values('pk').explain()
+        self.assertIn('INDEX pokemon_pokemon_total_stats', plan)
+
+
+class TotalStatsMigrationTests(TransactionTestCase):
+    before, after = ('pokemon', '0004_populate_evolution_graphs'), ('pokemon', '0005_pokemon_total_stats')
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_backfills_existing_rows(self):
+        old_apps = self.migrate([self.before])
+        old_apps.get_model('pokemon', 'Pokemon').objects.create(
+            pokedex_id=1, name='bulbasaur', height=7, weight=69,
+            hp=45, attack=49, defense=49, special_attack=65, special_defense=65, speed=45,
+        )
+        new_apps = self.migrate([self.after])
+        self.assertEqual(new_apps.get_model('pokemon', 'Pokemon').objects.get().total_stats, 318)
+
+
+class StatIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        fire, water = PokemonType.objects.create(name='fire'), PokemonType.objects.create(name='water')
+        for pokedex_id, speed, types in ((1, 30, [fire]), (2, 50, [water]), (3, 50, [fire, water]),
+                                         (152, 50, [water]), (153, 70, [fire])):
+            make_pokemon(pokedex_id, speed=speed).types.set(types)
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()  # other tests' data may share this data's fingerprint
+        self.index = StatIndex.build(version='test')
+
+    def list_ids(self, **params):
+        response = self.client.get(reverse('pokemon:list'), params)
+        return [pokemon.pokedex_id for pokemon in response.context['pokemon_list']]
+
+    def test_random_pick_respects_filters(self):
+        for _ in range(20):
+            self.assertIn(self.index.random_pokedex_id(type_name='fire', generation=1), (1, 3))
+        self.assertEqual(len(self.index._pick_pools), 1)
+
+    def test_unknown_filters_do_not_grow_pick_pools(self):
+        for suffix in range(100):
+            self.assertIsNone(self.index.random_pokedex_id(type_name=f'zzz{suffix}'))
+            self.assertIsNone(self.index.random_pokedex_id(generation=100 + suffix))
+        # Known filters matching nothing are not kept either
+        self.assertIsNone(self.index.random_pokedex_id(type_name='water', generation=3))
+        self.assertEqual(self.index._pick_pools, {})
+
+    def test_random_view_redirects_to_list_for_unknown_type(self):
+        response = self.client.get(reverse('pokemon:random'), {'type': 'zzz'})
+        self.assertRedirects(response, reverse('pokemon:list'), fetch_redirect_response=False)
+
+    def test_descending_sort_breaks_ties_by_ascending_pokedex_id(self):
+        positions = self.index.order(self.index.filter(), [('speed', True)])
+        self.assertEqual([self.index.pokedex_ids[position] for position in positions], [153, 2, 3, 152, 1])
+
+    def test_list_orders_ties_the_same_with_and_without_index(self):
+        for params in ({'sort': 'speed', 'reverse': 'true'}, {'sort': '-speed'}, {'sort': 'speed'},
+                       {'sort': '-speed,name'}):
+            with self.subTest(**params):
+                indexed = self.list_ids(**params)
+                with override_settings(POKEMON_STAT_INDEX=False):
+                    self.assertEqual(self.list_ids(**params), indexed)
+                self.assertEqual(self.list_ids(paginate='cursor', **params), indexed)
+
+    def test_unknown_generation_is_ignored(self):
+        for params in ({'generation': 99}, {'generation': 0}, {'generation': 'x'}):
+            with self.subTest(**params):
+                self.assertEqual(self.list_ids(**params), [1, 2, 3, 152, 153])
+                with override_settings(POKEMON_STAT_INDEX=False):
+                    self.assertEqual(self.list_ids(**params), [1, 2, 3, 152, 153])
+        self.assertEqual(self.list_ids(generation=2), [152, 153])
+        response = self.client.get(reverse('pokemon:random'), {'generation': 99})
+        self.assertTrue(response.url.startswith('/pokemon/'))
+
+    def test_list_without_total_bounds_skips_range_scan(self):
+        with mock.patch.object(StatIndex, 'filter', autospec=True, side_effect=StatIndex.filter) as index_filter:
+            self.assertEqual(self.list_ids(type='fire'), [1, 3, 153])
+            self.assertNotIn('ranges', index_filter.call_args.kwargs)
+            self.assertEqual(self.list_ids(min_total=310), [153])
+            self.assertEqual(index_filter.call_args.kwargs['ranges'], {'total_stats': (310, None)})
+
+
+TYPE_RELATIONS = {
+    'fire': {'double_damage_to': ['grass'], 'half_damage_to': ['fire', 'water']},
+    'water': {'double_damage_to': ['fire', 'ground'], 'half_damage_to': ['grass', 'water']},
+    'grass': {'double_damage_to': ['ground', 'water'], 'half_damage_to': ['fire', 'flying', 'grass']},
+    'ground': {'double_damage_to': ['fire'], 'half_damage_to': ['grass'], 'no_damage_to': ['flying']},
+    'flying': {'double_damage_to': ['grass']},
+}
+
+
+class TypeChartTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        types = {name: PokemonType.objects.create(name=name, damage_relations=relations)
+                 for name, relations in TYPE_RELATIONS.items()}
+        for pokedex_id, name, type_names in ((1, 'bulbasaur', ['grass']), (4, 'charmander', ['fire']),
+                                             (6, 'charizard', ['fire', 'flying']), (7, 'squirtle', ['water']),
+                                             (50, 'diglett', ['ground'])):
+            make_pokemon(pokedex_id, name).types.set([types[type_name] for type_name in type_names])
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()
+        patcher = mock.patch('pokemon.type_chart._chart', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.chart = get_type_chart()
+
+    def test_multiplier_combines_both_defending_types(self):
+        chart = self.chart
+        attacking = {name: index for index, name in enumerate(chart.types)}
+        self.assertEqual(chart.multiplier(attacking['water'], chart.bits['fire'] | chart.bits['ground']), 4.0)
+        self.assertEqual(chart.multiplier(attacking['grass'], chart.bits['fire'] | chart.bits['flying']), 0.25)
+        self.assertEqual(chart.multiplier(attacking['ground'], chart.bits['fire'] | chart.bits['flying']), 0.0)
+        self.assertEqual(chart.matrix()[attacking['fire']], [0.5, 0.5, 2.0, 1.0, 1.0])
+
+    def test_team_coverage(self):
+        coverage = self.chart.team_coverage([self.chart.position('charmander'), self.chart.position(1)])
+        self.assertEqual(coverage['weaknesses'], ['flying'])
+        self.assertEqual(coverage['super_effective_against'], ['water', 'grass', 'ground'])
+        self.assertEqual(coverage['not_very_effective_against'], ['fire'])
+        self.assertEqual(coverage['dex_coverage'], 0.6)
+
+    def test_counters_rank_by_score_then_offense(self):
+        counters = self.chart.counters(self.chart.position(4))
+        self.assertEqual([(row['id'], row['score']) for row in counters], [(7, 4.0), (50, 2.0), (6, 2.0)])
+
+    def test_views(self):
+        response = self.client.get(reverse('pokemon:team_coverage_api'), {'team': 'charmander,1'})
+        self.assertEqual(response.json()['weaknesses'], ['flying'])
+        response = self.client.get(reverse('pokemon:counters_api', args=[4]), {'limit': 1})
+        self.assertEqual([row['id'] for row in response.json()['counters']], [7])
+
+    def test_unsynced_chart_is_not_kept(self):
+        PokemonType.objects.update(damage_relations={})
+        DataVersion.bump()
+        with self.assertRaises(TypeChartUnavailable):
+            get_type_chart()
+        # Relations written without a version bump are still picked up
+        for name, relations in TYPE_RELATIONS.items():
+            PokemonType.objects.filter(name=name).update(damage_relations=relations)
+        self.assertTrue(get_type_chart().synced)
+
+    def test_rebuilt_when_data_version_changes(self):
+        self.assertIs(get_type_chart(), self.chart)
+        DataVersion.bump()
+        self.assertIsNot(get_type_chart(), self.chart)
+
+
+SEARCH_ROWS = [
+    (pokedex_id, name, f"https://example.com/{pokedex_id}.png") for pokedex_id, name in (
+        (1, 'bulbasaur'), (10, 'caterpie'), (25, 'pikachu'), (26, 'raichu'), (100, 'voltorb'), (101, 'electrode'),
+        (122, 'mr-mime'), (172, 'pichu'), (439, 'mime-jr'), (866, 'mr-rime'),
+    )
+]
+
+
+class SearchIndexTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = SearchIndex('test', SEARCH_ROWS)
+
+    def hits(self, query, **kwargs):
+        return [(hit.name, hit.tier) for hit in self.index.search(query, **kwargs)]
+
+    def test_ranks_exact_then_prefix_then_word_prefix(self):
+        self.assertEqual(self.hits('pichu')[0], ('pichu', EXACT))
+        self.assertEqual(self.hits('mime', fuzzy=False), [('mime-jr', PREFIX), ('mr-mime', WORD_PREFIX)])
+
+    def test_id_prefix_and_substring(self):
+        self.assertEqual(self.hits('10', fuzzy=False), [('caterpie', ID_PREFIX), ('voltorb', ID_PREFIX),
+                                                        ('electrode', ID_PREFIX)])
+        self.assertEqual(self.hits('chu', fuzzy=False), [('pikachu', SUBSTRING), ('raichu', SUBSTRING),
+                                                         ('pichu', SUBSTRING)])
+
+    def test_typos_are_found_by_deletion_index(self):
+        self.assertEqual(self.hits('pikchu')[0], ('pikachu', FUZZY))
+        self.assertEqual(self.hits('pikahcu')[0], ('pikachu', FUZZY))  # adjacent transposition
+        self.assertEqual(self.hits('bulbsa')[0], ('bulbasaur', FUZZY))  # partially typed
+        # A typo past FUZZY_PREFIX_LENGTH characters is verified against the whole name
+        self.assertEqual(self.index.fuzzy_search('electrdoe')[0].name, 'electrode')
+
+    def test_fuzzy_search_limits(self):
+        self.assertEqual(self.index.fuzzy_search('pk'), [])  # too short to tell names apart
+        self.assertEqual(self.index.fuzzy_search('zzzzzz'), [])
+        self.assertEqual(len(self.index.search('i', limit=3)), 3)
+
+    def test_distance_helpers(self):
+        self.assertEqual(deletes('abc', 1), {'abc', 'bc', 'ac', 'ab'})
+        self.assertEqual(edit_distance('pikachu', 'pikahcu', 2), 1)
+        self.assertEqual(edit_distance('pikachu', 'bulbasaur', 2), 3)
+
+
+class SearchIndexViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id, name, _ in SEARCH_ROWS:
+            make_pokemon(pokedex_id, name)
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()
+
+    def search_api(self, query):
+        return [row['name'] for row in self.client.get(reverse('pokemon:search_api'), {'q': query}).json()['results']]
+
+    def test_api_uses_index(self):
+        self.assertEqual(self.search_api('pikchu')[0], 'Pikachu')
+        self.assertEqual(self.search_api('mime')[:2], ['Mime-Jr', 'Mr-Mime'])
+        cache.clear()  # responses are cached per data version
+        with override_settings(POKEMON_SEARCH_INDEX=False):
+            self.assertEqual(self.search_api('pikchu'), [])
+            self.assertEqual(self.search_api('mime'), ['Mr-Mime', 'Mime-Jr'])
+
+    def test_rebuilt_when_data_version_changes(self):
+        index = get_search_index()
+        self.assertIs(get_search_index(), index)
+        Pokemon.objects.filter(pokedex_id=25).update(name='pikachu-renamed')
+        DataVersion.bump()
+        self.assertIn('pikachu-renamed', get_search_index().names)
+
+
+class FuzzySearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for pokedex_id, name in ((25, 'pikachu'), (26, 'raichu'), (122, 'mr-mime'), (172, 'pichu')):
+            make_pokemon(pokedex_id, name)
+
+    def setUp(self):
+        cache.clear()
+        DataVersion.bump()
+
+    def search(self, query, **params):
+        response = self.client.get(reverse('pokemon:list'), {'search': query, **params})
+        return [pokemon.name for pokemon in response.context['pokemon_list']], response.context['is_fuzzy_search']
+
+    def test_typo_falls_back_to_close_names(self):
+        for stat_index in (True, False):
+            with self.subTest(stat_index=stat_index), override_settings(POKEMON_STAT_INDEX=stat_index):
+                names, fuzzy = self.search('pikchu')
+                self.assertTrue(fuzzy)
+                self.assertEqual(names[0], 'pikachu')
+                self.assertEqual(self.search('mime'), (['mr-mime'], False))
+                self.assertEqual(self.search('pikchu', paginate='cursor')[0][0], 'pikachu')
+
+    def test_fallback_keeps_other_filters(self):
+        with override_settings(POKEMON_STAT_INDEX=False):
+            self.assertEqual(self.search('pikchu', generation=2), (['pichu'], True))
+
+    def test_orm_search_runs_no_extra_exists_query(self):
+        with override_settings(POKEMON_STAT_INDEX=False), CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.search('chu'), (['pikachu', 'raichu', 'pichu'], False))
+        self.assertFalse([query['sql'] for query in queries if 'SELECT 1 AS "a" FROM "pokemon_pokemon"' in query['sql']])
+
+    def test_api_falls_back_to_close_names(self):
+        response = self.client.get(reverse('pokemon:list_api'), {'search': 'pikchu', 'count': 'true'})
+        data = response.json()
+        self.assertEqual(data['results'][0]['name'], 'Pikachu')
+        self.assertEqual(data['count'], len(data['results']))
+
+
+class ParseIdListTests(SimpleTestCase):
+    def test_ids_and_ranges(self):
+        self.assertEqual(parse_id_list('4, 1-3,2,7'), [4, 1, 2, 3, 7])
+
+    def test_reversed_range_is_reported_as_such(self):
+        with self.assertRaisesMessage(ValueError, "Invalid range: end before start in '3-1'"):
+            parse_id_list('3-1')
+
+    def test_too_many_ids(self):
+        with self.assertRaisesMessage(ValueError, f'At most {MAX_BATCH_IDS} IDs'):
+            parse_id_list(f'1-{MAX_BATCH_IDS + 1}')
+
+    def test_malformed_part(self):
+        with self.assertRaisesMessage(ValueError, 'Invalid ID or range'):
+            parse_id_list('1,x')
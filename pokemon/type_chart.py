@@ -0,0 +1,228 @@
+# pokemon/type_chart.py
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .models import Pokemon, PokemonType
+from .services import DataVersion
+
+logger = logging.getLogger(__name__)
+
+MAX_TEAM_SIZE = 6
+IMMUNE_SCORE = 0.125  # stands in for a 0x hit when ranking counters, so immunities rank above 1/4 resists
+
+
+class TypeChartUnavailable(Exception):
+    pass
+
+
+class TypeChart:
+    """
+    Type effectiveness matrix plus the dex grouped by type combination.
+
+    Each attacking type's relations are packed into three bitmasks over the
+    defending types (super effective, not very effective, no effect), so the
+    multiplier against a one- or two-type defender is a few ANDs and
+    popcounts. Pokemon are grouped by their type combination (under two
+    hundred in the whole dex), so a scan of the dex scores each combination
+    once instead of looking up every Pokemon.
+    """
+
+    def __init__(self, version: str, type_relations: Sequence[Tuple[str, Dict]],
+                 rows: Sequence[Tuple], pokemon_types: Sequence[Tuple[int, str]]):
+        self.version = version
+        self.types = [name for name, _ in type_relations]
+        self.bits = {name: 1 << bit for bit, name in enumerate(self.types)}
+        self.synced = any(relations for _, relations in type_relations)
+
+        def mask(names):
+            return sum(self.bits[name] for name in set(names) if name in self.bits)
+
+        self._super = [mask(relations.get('double_damage_to', ())) for _, relations in type_relations]
+        self._resisted = [mask(relations.get('half_damage_to', ())) for _, relations in type_relations]
+        self._immune = [mask(relations.get('no_damage_to', ())) for _, relations in type_relations]
+
+        # Dex rows in pokedex order: pokedex_id, name, sprite, total_stats, type names, type mask
+        self.size = len(rows)
+        position_by_pk = {}
+        self.pokedex_ids, self.names, self.sprites, self.total_stats = [], [], [], []
+        for position, (pk, pokedex_id, name, sprite, total_stats) in enumerate(rows):
+            position_by_pk[pk] = position
+            self.pokedex_ids.append(pokedex_id)
+            self.names.append(name.lower())
+            self.sprites.append(sprite)
+            self.total_stats.append(total_stats)
+        self.position_by_id = {pokedex_id: position for position, pokedex_id in enumerate(self.pokedex_ids)}
+        self.position_by_name = {name: position for position, name in enumerate(self.names)}
+
+        self.pokemon_types = [() for _ in range(self.size)]
+        for pokemon_pk, type_name in pokemon_types:
+            position = position_by_pk.get(pokemon_pk)
+            if position is not None:
+                self.pokemon_types[position] += (type_name,)
+        self.type_masks = [mask(names) for names in self.pokemon_types]
+
+        # Positions sharing each type mask, strongest first
+        self.combinations: Dict[int, List[int]] = {}
+        for position in sorted(range(self.size), key=lambda p: (-self.total_stats[p], self.pokedex_ids[p])):
+            self.combinations.setdefault(self.type_masks[position], []).append(position)
+
+    @classmethod
+    def build(cls, version: Optional[str] = None) -> 'TypeChart':
+        """
+        Load the chart and dex from the database (three queries, or one while
+        no type relations have been synced, since such a chart is unusable).
+        """
+        version = version or DataVersion.get()
+        type_relations = list(PokemonType.objects.order_by('pk').values_list('name', 'damage_relations'))
+        rows, pokemon_types = [], []
+        if any(relations for _, relations in type_relations):
+            rows = list(
+                Pokemon.objects.order_by('pokedex_id').values_list('pk', 'pokedex_id', 'name', 'sprite_front', 'total_stats')
+            )
+            pokemon_types = list(
+                Pokemon.types.through.objects.order_by('pk').values_list('pokemon_id', 'pokemontype__name')
+            )
+        logger.info(f"Built type chart for {len(type_relations)} types and {len(rows)} Pokemon (data version {version})")
+        return cls(version, type_relations, rows, pokemon_types)
+
+    def multiplier(self, attacking: int, defending_mask: int) -> float:
+        """Damage multiplier of the attacking type (by index) against a defender's type mask."""
+        if self._immune[attacking] & defending_mask:
+            return 0.0
+        exponent = (self._super[attacking] & defending_mask).bit_count() - (self._resisted[attacking] & defending_mask).bit_count()
+        return 2.0 ** exponent
+
+    def best_multiplier(self, attacking_mask: int, defending_mask: int) -> float:
+        """Best multiplier any type in attacking_mask gets against the defender."""
+        return max(
+            (self.multiplier(index, defending_mask) for index in range(len(self.types)) if attacking_mask >> index & 1),
+            default=1.0,
+        )
+
+    def matrix(self) -> List[List[float]]:
+        """Rows are attacking types, columns defending types, in self.types order."""
+        return [[self.multiplier(attacking, bit) for bit in self.bits.values()] for attacking in range(len(self.types))]
+
+    def position(self, key) -> Optional[int]:
+        """Dex position of a Pokemon given by pokedex ID or name."""
+        key = str(key).strip().lower()
+        if key.isdigit():
+            return self.position_by_id.get(int(key))
+        return self.position_by_name.get(key)
+
+    def pokemon_row(self, position: int) -> Dict:
+        return {
+            'id': self.pokedex_ids[position],
+            'name': self.names[position].title(),
+            'types': list(self.pokemon_types[position]),
+        }
+
+    def team_coverage(self, positions: Sequence[int]) -> Dict:
+        """
+        Defensive and offensive summary of a team.
+
+        Defense lists every attacking type's multiplier against each member
+        and counts weak, resisting and immune members; a type is a team
+        weakness when more members are weak to it than resist it. Offense
+        uses the members' own (STAB) types against every single type and
+        against every Pokemon in the dex.
+        """
+        masks = [self.type_masks[position] for position in positions]
+        attacking_mask = 0
+        for member_mask in masks:
+            attacking_mask |= member_mask
+
+        defense = []
+        for attacking, type_name in enumerate(self.types):
+            multipliers = [self.multiplier(attacking, member_mask) for member_mask in masks]
+            weak = sum(1 for value in multipliers if value > 1)
+            resist = sum(1 for value in multipliers if 0 < value < 1)
+            immune = sum(1 for value in multipliers if value == 0)
+            defense.append({
+                'type': type_name, 'multipliers': multipliers, 'weak': weak, 'resist': resist, 'immune': immune,
+            })
+
+        offense = []
+        for type_name, bit in self.bits.items():
+            offense.append({'type': type_name, 'best_multiplier': self.best_multiplier(attacking_mask, bit)})
+
+        covered = sum(
+            len(members) for combination, members in self.combinations.items()
+            if self.best_multiplier(attacking_mask, combination) > 1
+        )
+        return {
+            'team': [self.pokemon_row(position) for position in positions],
+            'defense': defense,
+            'weaknesses': [row['type'] for row in defense if row['weak'] > row['resist'] + row['immune']],
+            'offense': offense,
+            'super_effective_against': [row['type'] for row in offense if row['best_multiplier'] > 1],
+            'not_very_effective_against': [row['type'] for row in offense if row['best_multiplier'] < 1],
+            'dex_coverage': round(covered / self.size, 4) if self.size else 0.0,
+        }
+
+    def counters(self, position: int, limit: int = 10) -> List[Dict]:
+        """
+        Pokemon that hit the target super effectively with their own types
+        and take little from the target's types, best first.
+
+        Score is offense / defense: the best multiplier the counter's types
+        get on the target, divided by the worst it takes from the target's
+        types (no effect counts as IMMUNE_SCORE). Ties go to the stronger
+        offense, then the higher base stat total. Only Pokemon scoring above
+        1 are returned.
+        """
+        target_mask = self.type_masks[position]
+        scored = []
+        for combination, members in self.combinations.items():
+            offense = self.best_multiplier(combination, target_mask)
+            defense = self.best_multiplier(target_mask, combination)
+            score = offense / (defense or IMMUNE_SCORE)
+            if score > 1:
+                scored.append((score, offense, defense, members))
+        scored.sort(key=lambda item: -item[0])
+
+        # Whole combinations are taken until limit rows are in, plus any tied with the last one
+        candidates = []
+        for score, offense, defense, members in scored:
+            if len(candidates) >= limit and score < candidates[-1][0]:
+                break
+            candidates.extend((score, offense, defense, member) for member in members if member != position)
+        candidates.sort(key=lambda item: (-item[0], -item[1], -self.total_stats[item[3]], self.pokedex_ids[item[3]]))
+
+        results = []
+        for score, offense, defense, member in candidates[:limit]:
+            row = self.pokemon_row(member)
+            row.update(
+                sprite=self.sprites[member], total_stats=self.total_stats[member],
+                offense=offense, defense=defense, score=score,
+            )
+            results.append(row)
+        return results
+
+
+_chart: Optional[TypeChart] = None
+_chart_lock = threading.Lock()
+
+
+def get_type_chart() -> TypeChart:
+    """
+    Return the process-wide chart, rebuilding it if the data version changed.
+
+    Raises TypeChartUnavailable until type damage relations have been synced.
+    An unsynced chart is never kept, so relations synced without a change in
+    the data version are still picked up by the next call.
+    """
+    global _chart
+    version = DataVersion.get()
+    chart = _chart
+    if chart is None or chart.version != version:
+        with _chart_lock:
+            chart = _chart
+            if chart is None or chart.version != version:
+                chart = TypeChart.build(version)
+                if chart.synced:
+                    _chart = chart
+    if not chart.synced:
+        raise TypeChartUnavailable('Type damage relations have not been synced; run sync_pokemon')
+    return chart
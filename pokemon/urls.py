@@ -11,7 +11,13 @@ urlpatterns = [
 
     # API endpoints
     path('api/search/', views.pokemon_search_api, name='search_api'),
+    path('api/pokemon/', views.PokemonListAPIView.as_view(), name='list_api'),
+    path('api/pokemon/stats/', views.pokemon_stats_batch, name='stats_batch_api'),
+    path('api/pokemon/export/', views.pokemon_export, name='export_api'),
     path('api/pokemon/<int:pokedex_id>/stats/', views.pokemon_stats_json, name='stats_api'),
+    path('api/pokemon/<int:pokedex_id>/counters/', views.pokemon_counters, name='counters_api'),
+    path('api/types/chart/', views.type_chart_json, name='type_chart_api'),
+    path('api/team/coverage/', views.team_coverage, name='team_coverage_api'),
 
     # Actions
     path('<int:pokedex_id>/favorite/', views.toggle_favorite, name='toggle_favorite'),
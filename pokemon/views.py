@@ -1,8 +1,8 @@
-import random
-
+import hashlib
+import json
 import requests
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import FileResponse, JsonResponse, StreamingHttpResponse
 from django.core.cache import cache
 from django.contrib import messages
 
@@ -11,10 +11,19 @@ from django.shortcuts import redirect
 
 from django.views.generic import ListView, DetailView
 from django.views.decorators.http import require_http_methods, require_POST
-from django.db.models import Q
+from django.db.models import Q, prefetch_related_objects
 from django.urls import reverse
 
-from .models import Pokemon, PokemonType, UserFavorite, Evolution, EvolutionChain
+from .export import EXPORT_FORMATS, ExportCache, ExportUnavailable
+from .http_cache import cache_by_data_version, prefetch_uncached_fragments
+from .models import Pokemon, PokemonType, UserFavorite, GENERATION_RANGES
+from .pagination import InvalidCursor, KeysetPaginator
+from .search_index import get_search_index
+from .services import DataVersion
+from .stat_index import (
+    STAT_COLUMNS, get_stat_index, pokemon_stats_rows, random_pokedex_id, IndexedPokemonList,
+)
+from .type_chart import MAX_TEAM_SIZE, TypeChartUnavailable, get_type_chart
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,41 +33,159 @@ class PokemonListView(ListView):
     template_name = 'pokemon/pokemon_list.html'
     context_object_name = 'pokemon_list'
     paginate_by = 20
+    fuzzy_search = False  # set when a search fell back to typo-tolerant matching
+    search_fallback = None  # (filtered queryset, search) while the ORM path answers a search
 
-    def get_queryset(self):
-        queryset = Pokemon.objects.select_related().prefetch_related('types', 'ability_links__ability')
+    sort_fields = ['pokedex_id', 'name', 'hp', 'attack', 'defense', 'speed', 'total_stats']
+
+    def get_sort_keys(self):
+        """
+        Parse ?sort= into [(field, descending)]. Several comma-separated fields
+        may be given, each optionally prefixed with '-'; ?reverse=true flips
+        the first one.
+        """
+        sort_keys = []
+        for field in self.request.GET.get('sort', 'pokedex_id').split(','):
+            field = field.strip()
+            descending = field.startswith('-')
+            field = field.lstrip('-')
+            if field in self.sort_fields:
+                sort_keys.append((field, descending))
+        if sort_keys and self.request.GET.get('reverse') == 'true':
+            sort_keys[0] = (sort_keys[0][0], not sort_keys[0][1])
+        return sort_keys
+
+    def get_int_param(self, name):
+        value = self.request.GET.get(name, '').strip()
+        return int(value) if value.isdigit() else None
+
+    def get_fuzzy_matches(self, search_query):
+        """Pokedex IDs of names close to a search that matched nothing, for typos."""
+        search_index = get_search_index()
+        if search_index is None:
+            return []
+        self.fuzzy_search = True
+        return [hit.pokedex_id for hit in search_index.fuzzy_search(search_query, limit=10)]
+
+    def is_cursor_mode(self):
+        """?paginate=cursor (or a ?cursor=) switches from page numbers to keyset pagination."""
+        return self.request.GET.get('paginate') == 'cursor' or 'cursor' in self.request.GET
 
-        # Search functionality
+    def get_queryset(self):
+        # Related rows are prefetched in get_context_data, for uncached cards only
+        queryset = Pokemon.objects.all()
         search_query = self.request.GET.get('search', '').strip()
+        type_filter = self.request.GET.get('type', '').strip()
+        generation = self.get_int_param('generation')
+        if generation not in GENERATION_RANGES:
+            generation = None  # unknown generations are ignored rather than matching nothing
+        min_total = self.get_int_param('min_total')
+        max_total = self.get_int_param('max_total')
+        sort_keys = self.get_sort_keys()
+
+        # Answer from the in-memory stat index when enabled; only the rows
+        # of the requested page are loaded from the database. Cursor pages
+        # are range queries, which the database answers directly.
+        index = get_stat_index()
+        if index is not None and not self.is_cursor_mode():
+            filters = {'type_name': type_filter or None, 'generation': generation}
+            if min_total is not None or max_total is not None:
+                filters['ranges'] = {'total_stats': (min_total, max_total)}
+            rows = index.filter(search=search_query or None, **filters)
+            if search_query and not rows:
+                fuzzy_ids = self.get_fuzzy_matches(search_query)
+                rows = index.filter(**filters) & index.rows_for_pokedex_ids(fuzzy_ids)
+            return IndexedPokemonList(index, index.order(rows, sort_keys), queryset)
+
+        # Type filtering
+        if type_filter:
+            queryset = queryset.filter(types__name=type_filter)
+
+        # Generation filtering
+        if generation is not None:
+            queryset = queryset.filter(pokedex_id__range=GENERATION_RANGES[generation])
+
+        # Total stats filtering
+        if min_total is not None:
+            queryset = queryset.filter(total_stats__gte=min_total)
+        if max_total is not None:
+            queryset = queryset.filter(total_stats__lte=max_total)
+
+        # Sorting, ties broken by pokedex_id as on the index path
+        if sort_keys:
+            ordering = [f'-{field}' if descending else field for field, descending in sort_keys]
+            if 'pokedex_id' not in dict(sort_keys):
+                ordering.append('pokedex_id')
+            queryset = queryset.order_by(*ordering)
+
+        # Search functionality; when the page's own query comes back empty,
+        # get_search_fallback() retries with names close to the search
         if search_query:
+            self.search_fallback = (queryset, search_query)
             queryset = queryset.filter(
                 Q(name__icontains=search_query) |
                 Q(pokedex_id__icontains=search_query)
             )
 
-        # Type filtering
-        type_filter = self.request.GET.get('type', '').strip()
-        if type_filter:
-            queryset = queryset.filter(types__name=type_filter)
-
-        # Generation filtering (basic - first 151 is Gen 1)
-        generation = self.request.GET.get('generation', '').strip()
-        if generation == '1':
-            queryset = queryset.filter(pokedex_id__lte=151)
-        elif generation == '2':
-            queryset = queryset.filter(pokedex_id__range=(152, 251))
+        return queryset
 
-        # Sorting
-        sort_by = self.request.GET.get('sort', 'pokedex_id')
-        if sort_by in ['pokedex_id', 'name', 'hp', 'attack', 'defense', 'speed']:
-            if self.request.GET.get('reverse') == 'true':
-                sort_by = f'-{sort_by}'
-            queryset = queryset.order_by(sort_by)
+    def get_search_fallback(self):
+        """The filtered Pokemon whose names are close to a search that matched nothing, for typos."""
+        queryset, search_query = self.search_fallback
+        return queryset.filter(pokedex_id__in=self.get_fuzzy_matches(search_query))
+
+    def get_paginator(self, queryset, per_page, *args, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, *args, **kwargs)
+        if self.search_fallback is not None and paginator.count == 0:
+            paginator = super().get_paginator(self.get_search_fallback(), per_page, *args, **kwargs)
+        return paginator
+
+    def get_keyset_page(self, queryset, page_size, cursor):
+        """Rows and next cursor of a cursor page, falling back to typo matches for an empty search."""
+        paginator = self.get_keyset_paginator(queryset, page_size)
+        rows, next_cursor = paginator.page(cursor)
+        if not rows and self.search_fallback is not None:
+            paginator = self.get_keyset_paginator(self.get_search_fallback(), page_size)
+            rows, next_cursor = paginator.page(cursor)
+        return paginator, rows, next_cursor
+
+    def get_keyset_paginator(self, queryset, page_size):
+        return KeysetPaginator(queryset, self.get_sort_keys(), page_size)
+
+    def get_filter_cache_key(self):
+        """Identifies the active filters, for caching their total count."""
+        params = self.request.GET.copy()
+        for name in ('cursor', 'page', 'paginate', 'limit', 'count', 'sort', 'reverse'):
+            params.pop(name, None)
+        return hashlib.sha256(params.urlencode().encode()).hexdigest()[:32]
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.is_cursor_mode():
+            return super().paginate_queryset(queryset, page_size)
 
-        return queryset
+        try:
+            paginator, rows, self.next_cursor = self.get_keyset_page(queryset, page_size, self.request.GET.get('cursor'))
+        except InvalidCursor:
+            paginator, rows, self.next_cursor = self.get_keyset_page(queryset, page_size, None)
+        self.total_count = paginator.count(self.get_filter_cache_key())
+        return None, None, rows, False
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        if self.is_cursor_mode():
+            params = self.request.GET.copy()
+            params['paginate'] = 'cursor'
+            params.pop('cursor', None)
+            context['is_cursor_mode'] = True
+            context['total_count'] = self.total_count
+            context['first_page_query'] = params.urlencode()
+            if self.next_cursor:
+                params['cursor'] = self.next_cursor
+                context['next_page_query'] = params.urlencode()
+
+        context['pokemon_list'] = list(context['pokemon_list'])
+        prefetch_uncached_fragments(context['pokemon_list'], 'pokemon_card', 'types')
+
         session_key = self.request.session.session_key
         if not session_key:
             self.request.session.save()
@@ -72,14 +199,71 @@ class PokemonListView(ListView):
         context['favorite_ids'] = favorite_ids
         context['pokemon_types'] = PokemonType.objects.all().order_by('name')
         context['current_search'] = self.request.GET.get('search', '')
+        context['is_fuzzy_search'] = self.fuzzy_search
         context['current_type'] = self.request.GET.get('type', '')
         context['current_generation'] = self.request.GET.get('generation', '')
+        context['current_min_total'] = self.request.GET.get('min_total', '')
+        context['current_max_total'] = self.request.GET.get('max_total', '')
         context['current_sort'] = self.request.GET.get('sort', 'pokedex_id')
         context['is_reverse'] = self.request.GET.get('reverse') == 'true'
 
         return context
 
 
+class PokemonListAPIView(PokemonListView):
+    """
+    JSON list of Pokemon with the list page's filters and sorting, paginated
+    by cursor: follow `next` until it is null. ?limit= sets the page size
+    (at most max_page_size) and ?count=true adds the total, cached per data
+    version and filter set.
+    """
+    max_page_size = 100
+
+    def is_cursor_mode(self):
+        return True
+
+    def get(self, request, *args, **kwargs):
+        limit = self.get_int_param('limit') or self.paginate_by
+        try:
+            paginator, rows, next_cursor = self.get_keyset_page(
+                self.get_queryset(), min(max(limit, 1), self.max_page_size), request.GET.get('cursor')
+            )
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        prefetch_related_objects(rows, 'types')
+
+        data = {
+            'results': [
+                {
+                    'id': p.pokedex_id,
+                    'name': p.name.title(),
+                    'sprite': p.sprite_front,
+                    'types': [t.name for t in p.types.all()],
+                    'hp': p.hp,
+                    'attack': p.attack,
+                    'defense': p.defense,
+                    'special_attack': p.special_attack,
+                    'special_defense': p.special_defense,
+                    'speed': p.speed,
+                    'total_stats': p.total_stats,
+                    'is_legendary': p.is_legendary,
+                    'is_mythical': p.is_mythical,
+                    'url': reverse('pokemon:detail', kwargs={'pk': p.pokedex_id}),
+                }
+                for p in rows
+            ],
+            'next_cursor': next_cursor,
+            'next': None,
+        }
+        if next_cursor:
+            params = request.GET.copy()
+            params['cursor'] = next_cursor
+            data['next'] = f"{request.path}?{params.urlencode()}"
+        if request.GET.get('count') == 'true':
+            data['count'] = paginator.count(self.get_filter_cache_key())
+        return JsonResponse(data)
+
+
 class PokemonDetailView(DetailView):
     model = Pokemon
     template_name = 'pokemon/pokemon_detail.html'
@@ -121,22 +305,25 @@ class PokemonDetailView(DetailView):
 
     def get_queryset(self):
         """
-        Optimize queryset with select_related and prefetch_related
+        Optimize queryset with select_related and prefetch_related.
+        Evolution data comes from the precomputed graph on the chain row;
+        abilities are only loaded when the cached body needs rendering.
         """
-        return Pokemon.objects.select_related().prefetch_related(
-            'types',
-            'ability_links__ability',
-            'evolves_from__from_pokemon__types',
-            'evolves_to__to_pokemon__types',
-            'evolution_chains__evolutions__to_pokemon'
-        )
+        return Pokemon.objects.select_related('evolution_chain').prefetch_related('types')
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         pokemon = self.object
-        # Get evolution chain information
+
+        # Get evolution chain information; it is part of the cached body,
+        # whose key follows what the evolution section shows
         evolution_data = self.get_evolution_data(pokemon)
         context.update(evolution_data)
+        evolution_version = context['evolution_version'] = self.get_evolution_version(evolution_data)
+        prefetch_uncached_fragments(
+            [pokemon], 'pokemon_detail_body', 'ability_links__ability',
+            vary_on=lambda pokemon: [pokemon.pk, pokemon.render_version, evolution_version],
+        )
 
         # Get related Pokemon (same types)
         context['related_pokemon'] = self.get_related_pokemon(pokemon)
@@ -168,63 +355,53 @@ class PokemonDetailView(DetailView):
 
     def get_evolution_data(self, pokemon):
         """
-        Get comprehensive evolution chain data
+        Get evolution data from the chain graph materialized at sync time,
+        joined with the current name and sprite of each neighbour
         """
         evolution_data = {
             'pre_evolutions': [],
             'evolutions': [],
-            'evolution_chain': None
+            'evolution_chain': pokemon.evolution_chain,
         }
 
-        # Get evolutions FROM this Pokemon
-        evolutions_from = Evolution.objects.filter(
-            from_pokemon=pokemon
-        ).select_related('to_pokemon').prefetch_related('to_pokemon__types')
-
-        evolution_data['evolutions'] = [
-            {
-                'pokemon': evo.to_pokemon,
-                'trigger': evo.trigger,
-                'min_level': evo.min_level,
-                'item': evo.item,
-                'condition': evo.condition,
-            }
-            for evo in evolutions_from
-        ]
+        graph = pokemon.evolution_chain.graph if pokemon.evolution_chain else None
+        if not graph:
+            return evolution_data
+
+        related = []
+        for edge in graph.get('edges', []):
+            if edge['from'] == pokemon.pokedex_id:
+                related.append(('evolutions', edge['to'], edge))
+            elif edge['to'] == pokemon.pokedex_id:
+                related.append(('pre_evolutions', edge['from'], edge))
+        if not related:
+            return evolution_data
+
+        # The graph holds IDs only; names and sprites come from the current rows
+        pokemon_by_id = Pokemon.objects.only('pokedex_id', 'name', 'sprite_front').in_bulk(
+            [other_id for _, other_id, _ in related], field_name='pokedex_id'
+        )
+        for key, other_id, edge in related:
+            if other_id not in pokemon_by_id:
+                continue
+            evolution_data[key].append({
+                'pokemon': pokemon_by_id[other_id],
+                'trigger': edge['trigger'],
+                'min_level': edge['min_level'],
+                'item': edge['item'],
+                'condition': edge['condition'],
+            })
 
-        # Get evolutions TO this Pokemon (pre-evolutions)
-        evolutions_to = Evolution.objects.filter(
-            to_pokemon=pokemon
-        ).select_related('from_pokemon').prefetch_related('from_pokemon__types')
+        return evolution_data
 
-        evolution_data['pre_evolutions'] = [
-            {
-                'pokemon': evo.from_pokemon,
-                'trigger': evo.trigger,
-                'min_level': evo.min_level,
-                'item': evo.item,
-                'condition': evo.condition,
-            }
-            for evo in evolutions_to
+    @staticmethod
+    def get_evolution_version(evolution_data):
+        """Digest of the neighbours the evolution section shows, '' when there are none."""
+        shown = [
+            (key, row['pokemon'].pokedex_id, row['pokemon'].name, row['pokemon'].sprite_front)
+            for key in ('pre_evolutions', 'evolutions') for row in evolution_data[key]
         ]
-
-        # Get full evolution chain if available
-        try:
-            chain = EvolutionChain.objects.filter(
-                Q(base_pokemon=pokemon) |
-                Q(evolutions__from_pokemon=pokemon) |
-                Q(evolutions__to_pokemon=pokemon)
-            ).prefetch_related(
-                'evolutions__from_pokemon__types',
-                'evolutions__to_pokemon__types'
-            ).first()
-
-            if chain:
-                evolution_data['evolution_chain'] = chain
-        except EvolutionChain.DoesNotExist:
-            pass
-
-        return evolution_data
+        return hashlib.sha256(json.dumps(shown).encode()).hexdigest()[:16] if shown else ''
 
     def get_related_pokemon(self, pokemon, limit=6):
         """
@@ -256,12 +433,25 @@ class PokemonDetailView(DetailView):
             'speed': (pokemon.speed / max_stat) * 100,
         }
 
+@cache_by_data_version(max_age=300)
 def pokemon_search_api(request):
     """API endpoint for Pokemon search autocomplete."""
     query = request.GET.get('q', '').strip()
     if len(query) < 2:
         return JsonResponse({'results': []})
 
+    index = get_search_index()
+    if index is not None:
+        return JsonResponse({'results': [
+            {
+                'id': hit.pokedex_id,
+                'name': hit.name.title(),
+                'sprite': hit.sprite,
+                'url': reverse('pokemon:detail', kwargs={'pk': hit.pokedex_id})
+            }
+            for hit in index.search(query, limit=10)
+        ]})
+
     pokemon = Pokemon.objects.filter(
         Q(name__icontains=query) |
         Q(pokedex_id__icontains=query)
@@ -317,6 +507,7 @@ def toggle_favorite(request, pokedex_id):
     return redirect('pokemon:detail', pk=pokedex_id)
 
 
+@cache_by_data_version(max_age=3600)
 def pokemon_stats_json(request, pokedex_id):
     """Return Pokemon stats as JSON for charts."""
     pokemon = get_object_or_404(Pokemon, pokedex_id=pokedex_id)
@@ -338,14 +529,178 @@ def pokemon_stats_json(request, pokedex_id):
     return JsonResponse(stats_data)
 
 
+def parse_bool_param(value):
+    """Map 'true'/'false' query values to booleans; anything else means no filter."""
+    return {'true': True, '1': True, 'false': False, '0': False}.get(value.strip().lower())
+
+
+MAX_BATCH_IDS = 2000
+MAX_COUNTERS = 50
+
+
+def parse_id_list(value, limit=MAX_BATCH_IDS):
+    """Parse '1,4,7', '1-151' or a mix of both into a de-duplicated list of IDs."""
+    pokedex_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        start, _, end = part.partition('-')
+        if not start.isdigit() or (end and not end.isdigit()):
+            raise ValueError(f"Invalid ID or range: {part!r}")
+        start, end = int(start), int(end or start)
+        if end < start:
+            raise ValueError(f"Invalid range: end before start in {part!r}")
+        if len(pokedex_ids) + end - start + 1 > limit:
+            raise ValueError(f"At most {limit} IDs can be requested at once")
+        pokedex_ids.extend(range(start, end + 1))
+    return list(dict.fromkeys(pokedex_ids))
+
+
+@cache_by_data_version(max_age=3600)
+def pokemon_stats_batch(request):
+    """
+    Stats and types for many Pokemon at once: ?ids=1,4,7 or ?ids=1-151.
+
+    ?format=json (default) returns a list of rows, ?format=columnar one array
+    per field (compact for large sets) and ?format=ndjson streams a row per
+    line. Unknown IDs are listed under "missing" (json/columnar).
+    """
+    try:
+        pokedex_ids = parse_id_list(request.GET.get('ids', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    if not pokedex_ids:
+        return JsonResponse({'error': 'Pass Pokemon IDs as ?ids=1,4,7 or ?ids=1-151'}, status=400)
+
+    rows = pokemon_stats_rows(pokedex_ids)
+    for row in rows:
+        row['name'] = row['name'].title()
+
+    output_format = request.GET.get('format', 'json')
+    if output_format == 'ndjson':
+        lines = (json.dumps(row, separators=(',', ':')) + '\n' for row in rows)
+        return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+    found = {row['id'] for row in rows}
+    missing = [pokedex_id for pokedex_id in pokedex_ids if pokedex_id not in found]
+    if output_format == 'columnar':
+        fields = ['id', 'name', *STAT_COLUMNS, 'types']
+        data = {field: [row[field] for row in rows] for field in fields}
+        data['missing'] = missing
+        return JsonResponse(data, json_dumps_params={'separators': (',', ':')})
+    if output_format != 'json':
+        return JsonResponse({'error': f"Unknown format: {output_format!r}"}, status=400)
+    return JsonResponse({'results': rows, 'missing': missing}, json_dumps_params={'separators': (',', ':')})
+
+
+@cache_by_data_version(max_age=3600)
+def pokemon_export(request):
+    """
+    Download every Pokemon with stats, types and abilities:
+    ?format=ndjson (default), csv, columnar or parquet (needs pyarrow).
+
+    The first export of a data version streams from the database while
+    being written to the export cache; later ones are served from that file.
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return JsonResponse({'error': f"Unknown format: {export_format!r}"}, status=400)
+
+    version = DataVersion.get()
+    export_cache = ExportCache()
+    extension, content_type = EXPORT_FORMATS[export_format]
+    filename = f"pokemon.{extension}"
+
+    path = export_cache.get(export_format, version)
+    if path is None and export_format == 'parquet':
+        try:
+            path = export_cache.build(export_format, version=version)
+        except ExportUnavailable as e:
+            return JsonResponse({'error': str(e)}, status=501)
+    if path is not None:
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=filename, content_type=content_type)
+
+    response = StreamingHttpResponse(export_cache.stream_and_store(export_format, version=version),
+                                     content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@cache_by_data_version(max_age=3600)
+def type_chart_json(request):
+    """The type effectiveness matrix: matrix[attacking][defending], in the order of "types"."""
+    try:
+        chart = get_type_chart()
+    except TypeChartUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+    return JsonResponse({'types': chart.types, 'matrix': chart.matrix()})
+
+
+@cache_by_data_version(max_age=3600)
+def team_coverage(request):
+    """
+    Defensive weaknesses and offensive type coverage of a team of up to six
+    Pokemon, given by pokedex ID or name: ?team=charizard,25,blastoise.
+    """
+    try:
+        chart = get_type_chart()
+    except TypeChartUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+    members = [member for member in request.GET.get('team', '').split(',') if member.strip()]
+    if not members:
+        return JsonResponse({'error': 'Pass a team as ?team=charizard,25,blastoise'}, status=400)
+    if len(members) > MAX_TEAM_SIZE:
+        return JsonResponse({'error': f"A team has at most {MAX_TEAM_SIZE} Pokemon"}, status=400)
+
+    positions = [chart.position(member) for member in members]
+    unknown = [member.strip() for member, position in zip(members, positions) if position is None]
+    if unknown:
+        return JsonResponse({'error': 'Unknown Pokemon', 'unknown': unknown}, status=400)
+
+    return JsonResponse(chart.team_coverage(positions))
+
+
+@cache_by_data_version(max_age=3600)
+def pokemon_counters(request, pokedex_id):
+    """Best counters for a Pokemon by type matchup: ?limit=10 (at most 50)."""
+    try:
+        chart = get_type_chart()
+    except TypeChartUnavailable as e:
+        return JsonResponse({'error': str(e)}, status=503)
+
+    position = chart.position(pokedex_id)
+    if position is None:
+        return JsonResponse({'error': 'Pokemon not found'}, status=404)
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), MAX_COUNTERS)
+    except ValueError:
+        return JsonResponse({'error': 'limit must be an integer'}, status=400)
+
+    return JsonResponse({'pokemon': chart.pokemon_row(position), 'counters': chart.counters(position, limit)})
+
+
 def random_pokemon(request):
-    """Redirect to a random Pokemon."""
-    pokemon = Pokemon.objects.order_by('?').first()
-    if pokemon:
-        return redirect('pokemon:detail', pk=pokemon.pokedex_id)
+    """
+    Redirect to a random Pokemon, optionally limited by ?type=, ?generation=,
+    ?legendary= and ?mythical=.
+    """
+    generation = request.GET.get('generation', '').strip()
+    generation = int(generation) if generation.isdigit() else None
+    pokedex_id = random_pokedex_id(
+        type_name=request.GET.get('type', '').strip() or None,
+        generation=generation if generation in GENERATION_RANGES else None,
+        legendary=parse_bool_param(request.GET.get('legendary', '')),
+        mythical=parse_bool_param(request.GET.get('mythical', '')),
+    )
+    if pokedex_id is not None:
+        return redirect('pokemon:detail', pk=pokedex_id)
+    elif request.GET:
+        messages.error(request, "No Pokemon match those filters!")
     else:
         messages.error(request, "No Pokemon found in database!")
-        return redirect('pokemon:list')
+    return redirect('pokemon:list')
 
 
 
@@ -405,9 +760,6 @@ def pokemon_list(request):
     # Sorting
     sort_by = request.GET.get('sort', 'pokedex_id')
     if sort_by in ['name', 'pokedex_id', 'total_stats', 'hp', 'attack', 'defense', 'speed']:
-        if sort_by == 'total_stats':
-            # Can't sort by property, so we'll sort by ID for now
-            sort_by = 'pokedex_id'
         pokemon_list = pokemon_list.order_by(sort_by)
 
     # Pagination
@@ -432,18 +784,7 @@ def pokemon_list(request):
 
 def pokemon_random(request):
     """Redirect to a random Pokemon"""
-    from django.shortcuts import redirect
-
-    # Get a random Pokemon
-    pokemon_count = Pokemon.objects.count()
-    if pokemon_count == 0:
-        messages.error(request, "No Pokemon found in database.")
-        return redirect('pokemon:list')
-
-    random_offset = random.randint(0, pokemon_count - 1)
-    random_pokemon = Pokemon.objects.all()[random_offset]
-
-    return redirect('pokemon:detail', pk=random_pokemon.pokedex_id)
+    return random_pokemon(request)
 
 
 def pokemon_by_type(request, type_name):
@@ -475,6 +816,7 @@ def pokemon_search(request):
     query = request.GET.get('q', '').strip()
     type_filter = request.GET.get('type', '')
     min_stats = request.GET.get('min_stats', '')
+    max_stats = request.GET.get('max_stats', '')
     legendary_filter = request.GET.get('legendary', '')
 
     pokemon_list = Pokemon.objects.all()
@@ -490,30 +832,21 @@ def pokemon_search(request):
 
     if min_stats and min_stats.isdigit():
         # Filter by minimum total stats
-        min_total = int(min_stats)
-        # This is a simplified filter - in a real app you'd want to add a computed field
-        pokemon_list = [p for p in pokemon_list if p.total_stats >= min_total]
+        pokemon_list = pokemon_list.filter(total_stats__gte=int(min_stats))
+
+    if max_stats and max_stats.isdigit():
+        pokemon_list = pokemon_list.filter(total_stats__lte=int(max_stats))
 
     if legendary_filter == 'true':
         pokemon_list = pokemon_list.filter(is_legendary=True)
     elif legendary_filter == 'false':
         pokemon_list = pokemon_list.filter(is_legendary=False)
 
-    # If we used list comprehension, convert back to queryset behavior
-    if isinstance(pokemon_list, list):
-        total_count = len(pokemon_list)
-        # Simple pagination for list
-        page_size = 20
-        page_num = int(request.GET.get('page', 1))
-        start_idx = (page_num - 1) * page_size
-        end_idx = start_idx + page_size
-        pokemon_list = pokemon_list[start_idx:end_idx]
-    else:
-        total_count = pokemon_list.count()
-        # Standard pagination
-        paginator = Paginator(pokemon_list, 20)
-        page_number = request.GET.get('page')
-        pokemon_list = paginator.get_page(page_number)
+    total_count = pokemon_list.count()
+    # Standard pagination
+    paginator = Paginator(pokemon_list, 20)
+    page_number = request.GET.get('page')
+    pokemon_list = paginator.get_page(page_number)
 
     # Get all types for filter
     all_types = PokemonType.objects.all().order_by('name')
@@ -523,6 +856,7 @@ def pokemon_search(request):
         'query': query,
         'type_filter': type_filter,
         'min_stats': min_stats,
+        'max_stats': max_stats,
         'legendary_filter': legendary_filter,
         'all_types': all_types,
         'total_count': total_count,
@@ -557,29 +891,32 @@ def favorites_view(request):
         request.session.create()
         session_key = request.session.session_key
 
+    # Handle sorting (in SQL). Numeric stats are sorted highest first,
+    # date_added most recent first.
+    sort_param = request.GET.get('sort', 'pokedex_id')
+    sort_orders = {
+        'date_added': '-created_at',
+        'total_stats': '-pokemon__total_stats',
+        'pokedex_id': 'pokemon__pokedex_id',
+        'name': 'pokemon__name',
+        'hp': '-pokemon__hp',
+        'attack': '-pokemon__attack',
+        'defense': '-pokemon__defense',
+        'speed': '-pokemon__speed',
+    }
+
     # Get user's favorite Pokemon
-    favorite_objects = UserFavorite.objects.filter(session_key=session_key).select_related('pokemon')
+    favorite_objects = UserFavorite.objects.filter(
+        session_key=session_key
+    ).select_related('pokemon').prefetch_related('pokemon__types')
+    if sort_param in sort_orders:
+        favorite_objects = favorite_objects.order_by(sort_orders[sort_param])
     favorite_pokemon = [fav.pokemon for fav in favorite_objects]
 
     # Add stats percentage to each Pokemon (max possible stats is around 720)
     for pokemon in favorite_pokemon:
         pokemon.stats_percentage = min(round((pokemon.total_stats / 720) * 100, 1), 100)
 
-    # Handle sorting
-    sort_param = request.GET.get('sort', 'pokedex_id')
-
-    if sort_param == 'date_added':
-        # Sort by when they were added to favorites (most recent first)
-        favorite_objects = favorite_objects.order_by('-created_at')
-        favorite_pokemon = [fav.pokemon for fav in favorite_objects]
-    elif sort_param == 'total_stats':
-        # Sort by total stats (highest first)
-        favorite_pokemon = sorted(favorite_pokemon, key=lambda p: p.total_stats, reverse=True)
-    elif sort_param in ['pokedex_id', 'name', 'hp', 'attack', 'defense', 'speed']:
-        # Sort by Pokemon attributes
-        reverse = sort_param not in ['pokedex_id', 'name']  # Numeric stats should be descending
-        favorite_pokemon = sorted(favorite_pokemon, key=lambda p: getattr(p, sort_param), reverse=reverse)
-
     # Calculate statistics
     stats = {}
     if favorite_pokemon: